@@ -1,21 +1,36 @@
 # -*- coding:utf-8 -*-
-import requests
-import pandas as pd
+# 수집 코드(병렬 페이지 수집, 재시도, 빈 응답 처리)는 ch08/data_collection.py 하나만 고치고,
+# 여기서는 ch07 의 서비스키와 저장 위치(ch07/data)로 바꿔서 그대로 실행한다. 테스트 서버도 ch08/openapi_stub.py 를 같이 쓴다.
+# 실행 : ch07 폴더에서  python data_collection.py --year 2023
+#        python ../ch08/openapi_stub.py --port 8088 --csv data/seoul_real_estate.csv
+#        python data_collection.py --base-url http://127.0.0.1:8088 --output /tmp/seoul.csv
+import importlib.util
+import os
+import sys
+
 SERVICE_KEY = '564b7852646a686a34336f4f6c5571'
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CH08_DIR = os.path.join(BASE_DIR, '..', 'ch08')
+
+os.environ.setdefault('SEOUL_DATA_DIR', os.path.join(BASE_DIR, 'data'))
+sys.path.append(CH08_DIR)  # ch08 의 config / store
+
+# 이 파일과 이름이 같으므로 경로로 읽는다.
+_spec = importlib.util.spec_from_file_location('ch08_data_collection', os.path.join(CH08_DIR, 'data_collection.py'))
+collector = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(collector)
+collector.SERVICE_KEY = SERVICE_KEY
+
+fetch_page, to_frame, OpenApiError = collector.fetch_page, collector.to_frame, collector.OpenApiError
+
+
+def collect(base_url=collector.BASE_URL, service_key=SERVICE_KEY, filters=(), max_pages=None,
+            max_workers=collector.MAX_WORKERS):
+    return collector.collect(base_url, service_key, filters, max_pages, max_workers)
+
 
 def main():
-    data = None
-    for j in range(1,20):
-        url = f'http://openapi.seoul.go.kr:8088/{SERVICE_KEY}/json/tbLnOpendataRtmsV/{1+((j-1)*1000)}/{j*1000}'
-        print(url)
-        req = requests.get(url)
-        content = req.json()
-        con = content['tbLnOpendataRtmsV']['row']
-        result = pd.DataFrame(con)
-        data = pd.concat([data, result])
-    data = data.reset_index(drop=True)
-    data['DEAL_YMD'] = pd.to_datetime(data['DEAL_YMD'], format=("%Y%m%d"))
-    data.to_csv('./data/seoul_real_estate.csv', index=False)
+    collector.main()
 
 if __name__ == "__main__":
     main()
@@ -1,28 +1,43 @@
 # -*- coding:utf-8 -*-
+import pandas as pd
 import streamlit as st
-from streamlit_option_menu import option_menu
+from menu import option_menu
 
+import period
+import tracing
 from home import run_home
-from eda.eda_home import run_eda
-from ml.ml_home import run_ml
-from utils import load_data
+from config import BACKEND
+from utils import data_span, load_data
 
 
+# 모든 세션이 DataFrame 하나를 같이 쓰므로, 페이지에서 컬럼을 바꾸면 그 세션의 사본만 바뀌도록 한다.
+# (utils 를 import 하는 명령행 스크립트 / 벤치마크의 pandas 설정은 바꾸지 않는다)
+pd.set_option("mode.copy_on_write", True)
+
 
 def main():
-    total_df = load_data()
+    tracing.begin()
     with st.sidebar:
         selected = option_menu("대시보드 메뉴", ['홈', '탐색적 자료분석', '부동산 예측'],
-            icons=['house', 'file-bar-graph', 'graph-up-arrow'], menu_icon="cast", default_index=0)
+            icons=['house', 'file-bar-graph', 'graph-up-arrow'], menu_icon="cast", default_index=0,
+            key='main_menu')
+    # 모든 페이지가 사이드바에서 고른 기간의 데이터만 읽는다.
+    period.select(*data_span())
+    # DuckDB 백엔드는 페이지마다 필요한 결과만 SQL 로 가져오므로 기간 전체를 미리 읽지 않는다.
+    total_df = load_data() if BACKEND == 'pandas' else None
     if selected == "홈":
         run_home(total_df)
+    # 탐색 / 예측 페이지는 geopandas, prophet 등 무거운 라이브러리를 쓰므로 메뉴를 고를 때 import 한다.
     elif selected == "탐색적 자료분석":
+        from eda.eda_home import run_eda
         run_eda(total_df)
     elif selected == "부동산 예측":
+        from ml.ml_home import run_ml
         run_ml(total_df)
 
     else:
         print("error..")
+    tracing.finish()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,61 @@
+# -*- coding:utf-8 -*-
+# 모델 읽기 시간 / 디스크 크기 : JSON(json.load + model_from_json) vs 배열 파일(ml/artifact.py)
+# 실행 : ch08 폴더에서  python -m ml.artifact && python -m bench.bench_artifact
+import argparse
+import json
+import os
+import time
+
+from prophet.serialize import model_from_json
+
+from bench.bench_predict import district_names
+from ml import artifact
+from ml import forecast as fc
+
+
+def load_json(path):
+    with open(path, 'r') as fin:
+        return model_from_json(json.load(fin))
+
+
+def timeit(fn, paths, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            fn(path)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def disk_size(path):
+    # (파일 크기, 실제로 차지하는 블록 크기)
+    stat = os.stat(path)
+    return stat.st_size, stat.st_blocks * 512
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    paths = [fc.model_path(sgg_nm) for sgg_nm in district_names()]
+    cases = [
+        ('json', load_json, paths),
+        ('bin+checksum', lambda path: artifact.load(artifact.artifact_path(path), path, verify=True), paths),
+        ('bin', lambda path: artifact.load(artifact.artifact_path(path), path), paths),
+    ]
+    json_size = [sum(x) for x in zip(*(disk_size(path) for path in paths))]
+    bin_size = [sum(x) for x in zip(*(disk_size(artifact.artifact_path(path)) for path in paths))]
+
+    print(f"{len(paths)} models")
+    print(f"{'format':<14}{'load all(ms)':>14}{'per model(ms)':>15}")
+    for label, fn, case_paths in cases:
+        total = timeit(fn, case_paths, args.repeat)
+        print(f"{label:<14}{total:>14.1f}{total / len(case_paths):>15.2f}")
+    print(f"{'disk':<14}{'bytes(KB)':>14}{'blocks(KB)':>15}")
+    print(f"{'json':<14}{json_size[0] / 1024:>14.0f}{json_size[1] / 1024:>15.0f}")
+    print(f"{'bin':<14}{bin_size[0] / 1024:>14.0f}{bin_size[1] / 1024:>15.0f}")
+
+if __name__ == "__main__":
+    main()
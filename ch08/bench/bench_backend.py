@@ -0,0 +1,105 @@
+# -*- coding:utf-8 -*-
+# pandas / DuckDB 백엔드 비교 : 같은 Parquet 스냅샷에서 페이지가 쓰는 조회를 백엔드마다 따로 된 프로세스로 잰다.
+# 준비(로드 / 큐브 / 회귀 합계) 시간, 조회 묶음 한 번의 시간(중앙값), 최대 RSS 를 조회 기간(최근 3개월 / 전체)별로 보여준다.
+# 메모리가 모자라면 worker 가 MemoryError 로 끝나도록 주소 공간을 --memory-gb 로 제한하고 실패로 표시한다.
+# 실행 : ch08 폴더에서  python -m bench.bench_backend --rows 1000000 20000000
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKENDS = ['pandas', 'duckdb']
+WINDOWS = ['3m', 'all']
+
+
+def timed(func):
+    began = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - began
+
+
+def query_mix(deals, cube, regression):
+    # 홈 / 시각화 / 통계 / 지도 / 회귀 화면이 rerun 한 번에 부르는 조회
+    months = deals.months()
+    first, last = months[0], months[-1]
+    deals.select('강남구', '아파트', months=[last])
+    cube.query(['DEAL_YMD', 'HOUSE_TYPE'], sgg_cd=cube.code('강남구'))
+    cube.query(['SGG_CD', 'HOUSE_TYPE'], house_type='아파트', months=[last])
+    cube.query(['SGG_CD', 'DEAL_YMD'], house_type='아파트', freq='M')
+    cube.month_totals('아파트', (first, last))
+    deals.select(house_type='아파트', months=[last], columns=['SGG_NM', 'month', 'BLDG_AREA', 'OBJ_AMT'])
+    regression.fit()
+
+
+def worker(window, repeat):
+    import utils
+
+    first_day, last_day = utils.data_span()
+    start = first_day if window == 'all' else (last_day.to_period('M') - 2).to_timestamp()
+    dates = (max(start, first_day), last_day)
+    setup = {}
+    deals, setup['query'] = timed(lambda: utils.load_query(dates))
+    cube, setup['cube'] = timed(lambda: utils.load_cube(dates))
+    regression, setup['regression'] = timed(lambda: utils.load_regression(dates))
+    mix = sorted(timed(lambda: query_mix(deals, cube, regression))[1] for _ in range(repeat))
+    print(json.dumps({'setup': sum(setup.values()), 'mix': mix[len(mix) // 2],
+                      'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def run(data_dir, backend, window, repeat, memory_gb):
+    env = dict(os.environ, SEOUL_DATA_DIR=data_dir, SEOUL_BACKEND=backend)
+    limit = int(memory_gb * 2 ** 30)
+    out = subprocess.run([sys.executable, '-m', 'bench.bench_backend', '--worker', window, '--repeat', str(repeat)],
+                         capture_output=True, text=True, env=env,
+                         preexec_fn=lambda: resource.setrlimit(resource.RLIMIT_AS, (limit, limit)))
+    if out.returncode != 0:
+        error = (out.stderr.strip().splitlines() or [f"exit {out.returncode}"])[-1]
+        return {'error': error[:60]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def build(data_dir):
+    # 20M 행은 pandas 로 한 번에 읽을 수 없으므로 스냅샷은 DuckDB 로 만든다. (두 백엔드가 같은 스냅샷을 읽는다)
+    env = dict(os.environ, SEOUL_DATA_DIR=data_dir, SEOUL_BACKEND='duckdb')
+    subprocess.run([sys.executable, '-c', "import utils; utils.snapshot_meta(utils.source_signature())"],
+                   env=env, check=True, capture_output=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 20_000_000])
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--memory-gb', type=float, default=4)
+    parser.add_argument('--worker', choices=WINDOWS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.repeat)
+        return
+
+    from bench.synthetic import write_csv
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as data_dir:
+            _, seconds = timed(lambda: write_csv(os.path.join(data_dir, "seoul_real_estate.csv"), rows,
+                                                 chunk_rows=1_000_000, start=f"{2024 - args.years}-01-01",
+                                                 days=365 * args.years))
+            _, built = timed(lambda: build(data_dir))
+            print(f"rows={rows:,}  csv={seconds:.0f}s  snapshot(duckdb)={built:.1f}s  memory limit={args.memory_gb}GB")
+            print(f"{'backend':>8}{'window':>8}{'setup(s)':>10}{'mix(ms)':>10}{'rss(MB)':>10}")
+            for backend in BACKENDS:
+                for window in WINDOWS:
+                    r = run(data_dir, backend, window, args.repeat, args.memory_gb)
+                    if 'error' in r:
+                        print(f"{backend:>8}{window:>8}  failed : {r['error']}")
+                    else:
+                        print(f"{backend:>8}{window:>8}{r['setup']:>10.2f}{r['mix'] * 1000:>10.0f}{r['rss_mb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# -*- coding:utf-8 -*-
+# (자치구, 월) 별 건물면적 ~ 아파트 가격 상관계수 : 그룹마다 pingouin.corr vs 한 번에 계산 (corr.py)
+# 실행 : ch08 폴더에서  python -m bench.bench_corr --rows 11000 1000000
+import argparse
+
+import numpy as np
+import pingouin as pg
+
+import corr
+import period
+from bench.bench_predict import timeit
+from bench.synthetic import make_deals
+from query import DealQuery
+
+COLUMNS = ['OBJ_AMT', 'BLDG_AREA', 'SGG_NM', 'month']
+
+
+def pingouin_all(data, method):
+    return {key: pg.corr(group['BLDG_AREA'], group['OBJ_AMT'], method=method)
+            for key, group in data.groupby(['SGG_NM', 'month'], observed=True)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[11000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}{'method':>10}{'groups':>8}{'pingouin(ms)':>14}{'batched(ms)':>13}"
+          f"{'bootstrap(ms)':>15}{'max |dr|':>10}")
+    for rows in args.rows:
+        data = make_deals(rows, start="2023-02-24", days=70)
+        data['month'] = period.month_key(data['DEAL_YMD']).astype('int32')
+        apt = DealQuery(DealQuery.sort(data)).select(house_type='아파트', months=[202303, 202304], columns=COLUMNS)
+        for method in corr.METHODS:
+            loop = timeit(lambda: pingouin_all(apt, method), args.repeat)
+            batched = timeit(lambda: corr.corr_table(apt, 'BLDG_AREA', 'OBJ_AMT', ['SGG_NM', 'month'], method),
+                             args.repeat)
+            boot = timeit(lambda: corr.corr_table(apt, 'BLDG_AREA', 'OBJ_AMT', ['SGG_NM', 'month'], method, True), 1)
+            table = corr.corr_table(apt, 'BLDG_AREA', 'OBJ_AMT', ['SGG_NM', 'month'], method)
+            diff = np.nanmax([abs(ref['r'].values[0] - table.loc[key, 'r'])
+                              for key, ref in pingouin_all(apt, method).items()])
+            print(f"{rows:>10,}{method:>10}{len(table):>8}{loop * 1000:>14.1f}{batched * 1000:>13.1f}"
+                  f"{boot * 1000:>15.0f}{diff:>10.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# -*- coding:utf-8 -*-
+# 페이지별 import 시간 보고서 (python -X importtime)
+# 실행 : ch08 폴더에서  python -m bench.bench_import                  (보고서)
+#                        python -m bench.bench_import --save-baseline  (기준값 저장)
+#                        python -m bench.bench_import --check          (기준값보다 느려졌거나 홈에서 무거운 모듈을 읽으면 실패)
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from config import BASE_DIR
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'import_baseline.json')
+# 메뉴를 고르기 전(홈 화면)에는 읽지 않아야 하는 패키지 (plotly 는 streamlit 이 직접 import 하므로 제외)
+HEAVY = ['prophet', 'cmdstanpy', 'geopandas', 'shapely', 'pingouin', 'statsmodels', 'seaborn', 'sklearn']
+SCENARIOS = {
+    'home': "import app",
+    'eda': "import app, eda.eda_home, eda.viz, eda.stat, eda.map",
+    'ml': "import app, ml.ml_home, ml.houseType, ml.sgg_nm, ml.report",
+}
+
+
+def import_times(code):
+    # -X importtime 은 stderr 에 "self | cumulative | 모듈" 형식으로 남긴다. (마이크로초)
+    # 전체 시간은 따로 잰 벽시계 시간을 쓴다. (pingouin 처럼 스레드에서 import 하는 모듈은 self 시간이 겹친다)
+    timed = f"import time; _t = time.perf_counter(); {code}; print(time.perf_counter() - _t)"
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', timed], cwd=BASE_DIR,
+                         capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return float(out.stdout.strip().splitlines()[-1]), rows
+
+
+def summarize(wall, rows, top):
+    # 패키지(모듈 이름의 첫 부분)별로 self 시간을 더한다.
+    packages = defaultdict(int)
+    for self_us, _, name in rows:
+        packages[name.strip().split('.')[0]] += self_us
+    ranked = sorted(packages.items(), key=lambda x: x[1], reverse=True)[:top]
+    heavy = sorted(package for package in packages if package in HEAVY)
+    return {'total_ms': round(wall * 1000, 1), 'modules': len(rows),
+            'packages': {package: round(us / 1000, 1) for package, us in ranked}, 'heavy': heavy}
+
+
+def report(repeat, top):
+    # 파일 캐시 영향을 줄이려고 여러 번 실행해서 전체 시간이 가장 짧은 결과를 쓴다.
+    results = {}
+    for scenario, code in SCENARIOS.items():
+        runs = [summarize(*import_times(code), top) for _ in range(repeat)]
+        results[scenario] = min(runs, key=lambda r: r['total_ms'])
+    return results
+
+
+def check(results, baseline, tolerance):
+    failures = []
+    if results['home']['heavy']:
+        failures.append(f"home imports heavy packages : {results['home']['heavy']}")
+    for scenario, result in results.items():
+        limit = baseline.get(scenario, {}).get('total_ms')
+        if limit is not None and result['total_ms'] > limit * (1 + tolerance):
+            failures.append(f"{scenario} : {result['total_ms']} ms > baseline {limit} ms (+{tolerance:.0%})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--check', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = report(args.repeat, args.top)
+    for scenario, result in results.items():
+        print(f"[{scenario}] {result['total_ms']:.0f} ms, {result['modules']} modules, heavy : {result['heavy'] or '-'}")
+        for package, ms in result['packages'].items():
+            print(f"    {package:<24}{ms:>9.1f} ms")
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"saved {BASELINE_PATH}")
+    if args.check:
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            failures = check(results, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"FAIL {failure}")
+        sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
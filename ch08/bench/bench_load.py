@@ -0,0 +1,98 @@
+# -*- coding:utf-8 -*-
+# CSV 로딩과 Parquet 스냅샷 로딩의 시간 / 메모리 비교
+# 실행 : ch08 폴더에서  python -m bench.bench_load --scale 10
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from config import CSV_PATH
+
+
+def load_csv(csv_path, snapshot_dir):
+    # 기존 방식 : read_csv 후 페이지마다 DEAL_YMD 변환
+    data = pd.read_csv(csv_path)
+    data['DEAL_YMD'] = pd.to_datetime(data['DEAL_YMD'], format="%Y-%m-%d")
+    return data
+
+
+def load_snapshot(csv_path, snapshot_dir):
+    from utils import read_snapshot, source_signature
+    return read_snapshot(source_signature(csv_path, None), csv_path, snapshot_dir, None)
+
+
+METHODS = {'csv': load_csv, 'snapshot': load_snapshot}
+
+
+def worker(method, csv_path, snapshot_dir):
+    # 새 프로세스에서 한 번만 읽어서 RSS 증가량을 잰다.
+    import utils  # noqa: F401  import 비용은 측정에서 제외
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    data = METHODS[method](csv_path, snapshot_dir)
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        'seconds': elapsed,
+        'rss_mb': (after - before) / 1024,
+        'frame_mb': data.memory_usage(deep=True).sum() / 1e6,
+        'rows': len(data),
+    }))
+
+
+def run(method, csv_path, snapshot_dir):
+    out = subprocess.run([sys.executable, '-m', 'bench.bench_load', '--worker', method,
+                          '--csv', csv_path, '--snapshot', snapshot_dir],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def make_csv(scale, tmp_dir):
+    if scale == 1:
+        return str(CSV_PATH)
+    data = pd.read_csv(CSV_PATH)
+    path = os.path.join(tmp_dir, f"seoul_real_estate_x{scale}.csv")
+    pd.concat([data] * scale, ignore_index=True).to_csv(path, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=1, help="원본 데이터를 몇 배로 늘릴지")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--worker', choices=list(METHODS))
+    parser.add_argument('--csv')
+    parser.add_argument('--snapshot')
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.csv, args.snapshot)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = make_csv(args.scale, tmp_dir)
+        snapshot_dir = os.path.join(tmp_dir, "snapshot")
+        build = run('snapshot', csv_path, snapshot_dir)  # 최초 1회 스냅샷 생성
+
+        print(f"rows={build['rows']:,}  snapshot build={build['seconds']:.3f}s  "
+              f"csv={os.path.getsize(csv_path) / 1e6:.1f}MB  parquet={dir_size(snapshot_dir) / 1e6:.1f}MB")
+        print(f"{'method':<10}{'median(s)':>12}{'rss(MB)':>10}{'frame(MB)':>12}")
+        for method in METHODS:
+            results = [run(method, csv_path, snapshot_dir) for _ in range(args.repeat)]
+            seconds = sorted(r['seconds'] for r in results)[len(results) // 2]
+            rss = sorted(r['rss_mb'] for r in results)[len(results) // 2]
+            print(f"{method:<10}{seconds:>12.3f}{rss:>10.1f}{results[0]['frame_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
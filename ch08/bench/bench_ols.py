@@ -0,0 +1,47 @@
+# -*- coding:utf-8 -*-
+# (자치구, 월, 주거형태) 별 건물면적 -> 물건금액 회귀 : 그룹마다 pingouin.linear_regression vs 충분통계량 (ols.py)
+# 새 거래 1% 가 들어왔을 때 update() 와 처음부터 다시 만드는 경우도 비교한다.
+# 실행 : ch08 폴더에서  python -m bench.bench_ols --rows 11000 1000000
+import argparse
+
+import numpy as np
+import pingouin as pg
+
+import period
+from bench.bench_predict import timeit
+from bench.synthetic import make_deals
+from ols import GroupedOLS, KEYS
+
+
+def pingouin_all(data):
+    return {key: pg.linear_regression(group['BLDG_AREA'], group['OBJ_AMT'])
+            for key, group in data.groupby(KEYS, observed=True) if len(group) > 2}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[11000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}{'groups':>8}{'pingouin(ms)':>14}{'build+fit(ms)':>15}{'update 1%(ms)':>15}{'max rel diff':>14}")
+    for rows in args.rows:
+        data = make_deals(rows, start="2023-02-24", days=70)
+        data['month'] = period.month_key(data['DEAL_YMD']).astype('int32')
+        old, new = data.iloc[:rows - rows // 100], data.iloc[rows - rows // 100:]
+
+        loop = timeit(lambda: pingouin_all(data), 1)
+        build = timeit(lambda: GroupedOLS.build(data).fit(), args.repeat)
+        update = timeit(lambda: GroupedOLS.build(old).update(new).fit(), args.repeat) - \
+            timeit(lambda: GroupedOLS.build(old).fit(), args.repeat)
+
+        model = GroupedOLS.build(old).update(new)
+        diff = max(np.nanmax(np.abs(ref['coef'].to_numpy() - model.summary(key)['coef'].to_numpy()) /
+                             np.abs(ref['coef'].to_numpy()))
+                   for key, ref in pingouin_all(data).items())
+        print(f"{rows:>10,}{len(model.sums):>8}{loop * 1000:>14.0f}{build * 1000:>15.1f}{max(update, 0) * 1000:>15.1f}"
+              f"{diff:>14.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# -*- coding:utf-8 -*-
+# 메뉴 경로별 응답 시간 / 최대 메모리 (Streamlit AppTest, 화면 없이 실행)
+# 경로마다 새 프로세스에서 app.py 를 처음 실행(cold)하고, 같은 상태로 다시 실행(warm)한 뒤
+# 사이드바 / 본문의 selectbox, radio, 예측 기간(number_input)을 하나씩 바꿔 가며 잰다.
+# 실행 : ch08 폴더에서  python -m bench.bench_pages --scale 1 10 100 --output pages.json
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from config import BASE_DIR, CSV_PATH
+
+APP_PATH = str(BASE_DIR / "app.py")
+PATHS = [
+    ('홈', None),
+    ('탐색적 자료분석', 'Home'), ('탐색적 자료분석', 'Visualization'),
+    ('탐색적 자료분석', 'Statistics'), ('탐색적 자료분석', 'Map'),
+    ('부동산 예측', 'Home'), ('부동산 예측', '주거형태별'), ('부동산 예측', '자치구역별'), ('부동산 예측', '보고서'),
+]
+SUB_MENU_KEYS = {'탐색적 자료분석': 'eda_menu', '부동산 예측': 'ml_menu'}
+# 페이지 안에서 화면 구성을 바꾸는 메뉴. 옵션마다 나머지 위젯을 다시 훑는다.
+PAGE_MENUS = {"분석 메뉴", "차트 메뉴", "라이브러리 종류"}
+HORIZONS = [1, 7, 14, 30]
+
+
+def median(values):
+    return sorted(values)[len(values) // 2] if values else None
+
+
+def timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    return (time.perf_counter() - start) * 1000
+
+
+def choice_widgets(at):
+    return list(at.sidebar.selectbox) + list(at.sidebar.radio) + list(at.main.selectbox) + list(at.main.radio)
+
+
+def steps_for(at, max_options):
+    # (위젯 종류, 라벨, 값) 목록. 선택지는 처음 것(기본값)을 빼고 max_options 개까지
+    steps = []
+    for widget in choice_widgets(at):
+        if widget.label in PAGE_MENUS:
+            continue
+        options = list(widget.options)[1:]
+        steps += [('choice', widget.label, value) for value in (options[:max_options] if max_options else options)]
+    steps += [('number', widget.label, value) for widget in at.number_input for value in HORIZONS]
+    return steps
+
+
+def apply(at, kind, label, value):
+    widgets = choice_widgets(at) if kind == 'choice' else list(at.number_input)
+    matches = [widget for widget in widgets if widget.label == label]
+    if not matches:
+        return False
+    matches[0].set_value(value)
+    return True
+
+
+def worker(main_menu, sub_menu, max_options, warm_runs):
+    from streamlit.testing.v1 import AppTest
+    from menu import OVERRIDE_PREFIX
+
+    at = AppTest.from_file(APP_PATH, default_timeout=1200)
+    at.session_state[OVERRIDE_PREFIX + 'main_menu'] = main_menu
+    if sub_menu is not None:
+        at.session_state[OVERRIDE_PREFIX + SUB_MENU_KEYS[main_menu]] = sub_menu
+
+    cold = timed_run(at)
+    warm = median([timed_run(at) for _ in range(warm_runs)])
+    errors = [e.message for e in at.exception]
+
+    menus = [widget for widget in choice_widgets(at) if widget.label in PAGE_MENUS]
+    page_options = [(menus[0].label, option) for option in menus[0].options] if menus else [(None, None)]
+    steps = []
+    for menu_label, option in page_options:
+        if menu_label is not None:
+            apply(at, 'choice', menu_label, option)
+            steps.append({'widget': menu_label, 'value': str(option), 'ms': timed_run(at)})
+        for kind, label, value in steps_for(at, max_options):
+            widgets = choice_widgets(at) if kind == 'choice' else list(at.number_input)
+            matches = [widget for widget in widgets if widget.label == label]
+            if not matches:
+                continue
+            default = matches[0].value
+            matches[0].set_value(value)
+            steps.append({'menu': option, 'widget': label, 'value': str(value), 'ms': timed_run(at)})
+            errors += [e.message for e in at.exception]
+            # 다음 위젯은 방금 바꾼 위젯을 원래 값으로 되돌린 상태에서 잰다.
+            apply(at, kind, label, default)
+            at.run()
+        errors += [e.message for e in at.exception]
+
+    print(json.dumps({
+        'path': main_menu if sub_menu is None else f"{main_menu}/{sub_menu}",
+        'cold_ms': cold,
+        'warm_ms': warm,
+        'steps': steps,
+        'step_median_ms': median([step['ms'] for step in steps]),
+        'step_max_ms': max([step['ms'] for step in steps], default=None),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'errors': errors,
+    }, ensure_ascii=False))
+
+
+def make_data_dir(scale, root):
+    # 경로마다 스냅샷 / 그림 캐시가 비어 있는 상태에서 시작하도록 임시 데이터 폴더를 쓴다.
+    data_dir = os.path.join(root, f"x{scale}")
+    os.makedirs(data_dir)
+    csv_path = os.path.join(data_dir, CSV_PATH.name)
+    if scale == 1:
+        shutil.copy(CSV_PATH, csv_path)
+    else:
+        import pandas as pd
+        from bench.synthetic import write_csv
+        rows = len(pd.read_csv(CSV_PATH, usecols=['DEAL_YMD']))
+        # 페이지가 3월 / 4월을 보므로 원본과 같은 기간(2023-02-24 ~ 2023-05-04) 안에서 만든다.
+        write_csv(csv_path, rows * scale, start="2023-02-24", days=70)
+    return data_dir
+
+
+def run_path(data_dir, main_menu, sub_menu, max_options, warm_runs):
+    env = dict(os.environ, SEOUL_DATA_DIR=data_dir)
+    args = [sys.executable, '-m', 'bench.bench_pages', '--worker', main_menu, sub_menu or '',
+            '--max-options', str(max_options), '--warm-runs', str(warm_runs)]
+    out = subprocess.run(args, cwd=BASE_DIR, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        return {'path': f"{main_menu}/{sub_menu}", 'errors': [out.stderr.strip().splitlines()[-1]]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, nargs='+', default=[1])
+    parser.add_argument('--paths', nargs='*', help="일부 경로만 (예: 홈 Map 보고서)")
+    parser.add_argument('--max-options', type=int, default=3, help="위젯마다 바꿔 볼 선택지 수 (0 이면 전부)")
+    parser.add_argument('--warm-runs', type=int, default=3)
+    parser.add_argument('--output', help="결과 JSON 파일")
+    parser.add_argument('--worker', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker[0], args.worker[1] or None, args.max_options, args.warm_runs)
+        return
+
+    paths = [(main_menu, sub_menu) for main_menu, sub_menu in PATHS
+             if not args.paths or any(p in f"{main_menu}/{sub_menu}" for p in args.paths)]
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        for scale in args.scale:
+            data_dir = make_data_dir(scale, root)
+            print(f"scale x{scale}")
+            print(f"  {'path':<28}{'cold(ms)':>10}{'warm(ms)':>10}{'steps':>7}{'step p50':>10}{'step max':>10}{'peak(MB)':>10}")
+            for main_menu, sub_menu in paths:
+                result = dict(run_path(data_dir, main_menu, sub_menu, args.max_options, args.warm_runs), scale=scale)
+                results.append(result)
+                if 'cold_ms' not in result:
+                    print(f"  {result['path']:<28} failed : {result['errors']}")
+                    continue
+                print(f"  {result['path']:<28}{result['cold_ms']:>10.0f}{result['warm_ms']:>10.0f}{len(result['steps']):>7}"
+                      f"{result['step_median_ms'] or 0:>10.0f}{result['step_max_ms'] or 0:>10.0f}{result['peak_rss_mb']:>10.0f}"
+                      + (f"  errors : {result['errors'][:1]}" if result['errors'] else ""), flush=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# -*- coding:utf-8 -*-
+# 조회 기간 길이별 스냅샷 읽기 시간 / DataFrame 크기 : 겹치는 월 파티션만 읽으므로 전체 기간이 아니라 고른 기간에 비례해야 한다.
+# 실행 : ch08 폴더에서  python -m bench.bench_period --rows 2000000 --years 5
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from bench.synthetic import write_csv
+
+WINDOWS = [1, 3, 12, None]  # 마지막 거래일까지 최근 N 개월, None 은 전체
+
+
+def worker(csv_path, snapshot_dir, months):
+    import utils  # noqa: F401  import 비용은 측정에서 제외
+    from utils import read_meta, read_snapshot, source_signature
+
+    meta = read_meta(snapshot_dir)
+    end = pd.Timestamp(meta['last_day'])
+    start = None if months is None else (end.to_period('M') - (months - 1)).to_timestamp()
+    began = time.perf_counter()
+    data = read_snapshot(source_signature(csv_path, None), csv_path, snapshot_dir, None, start, end)
+    elapsed = time.perf_counter() - began
+    print(json.dumps({'seconds': elapsed, 'frame_mb': data.memory_usage(deep=True).sum() / 1e6, 'rows': len(data)}))
+
+
+def run(csv_path, snapshot_dir, months):
+    out = subprocess.run([sys.executable, '-m', 'bench.bench_period', '--worker', '--csv', csv_path,
+                          '--snapshot', snapshot_dir, '--months', str(months or 0)],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--worker', action='store_true')
+    parser.add_argument('--csv')
+    parser.add_argument('--snapshot')
+    parser.add_argument('--months', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.csv, args.snapshot, args.months or None)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = write_csv(os.path.join(tmp_dir, "deals.csv"), args.rows,
+                             start=f"{2024 - args.years}-01-01", days=365 * args.years)
+        snapshot_dir = os.path.join(tmp_dir, "snapshot")
+        from utils import build_snapshot
+        began = time.perf_counter()
+        meta = build_snapshot(csv_path, snapshot_dir, None)
+        print(f"rows={args.rows:,}  {len(meta['months'])} partitions  build={time.perf_counter() - began:.1f}s")
+        print(f"{'window':>10}{'rows':>12}{'median(s)':>12}{'frame(MB)':>12}")
+        for months in WINDOWS:
+            results = [run(csv_path, snapshot_dir, months) for _ in range(args.repeat)]
+            seconds = sorted(r['seconds'] for r in results)[len(results) // 2]
+            label = f"{months}m" if months else "all"
+            print(f"{label:>10}{results[0]['rows']:>12,}{seconds:>12.3f}{results[0]['frame_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# -*- coding:utf-8 -*-
+# 25개 자치구 예측 : 순서대로 predict 하는 반복문 vs 프로세스 풀
+# 실행 : ch08 폴더에서  python -m bench.bench_predict --workers 2 4 8
+import argparse
+import os
+import time
+
+from ml import forecast as fc
+
+
+def district_names():
+    return sorted(name[:-len("_model.json")] for name in os.listdir(fc.MODEL_DIR) if name.endswith("_model.json"))
+
+
+def serial(sgg_nms, periods):
+    # 이전 sgg_nm.predictDistrict 와 같이 모델을 모두 읽은 뒤 하나씩 예측한다.
+    models = [fc.load_model(sgg_nm) for sgg_nm in sgg_nms]
+    return [fc.predict(model, periods) for model in models]
+
+
+def timeit(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--periods', type=int, default=fc.MAX_PERIODS)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    sgg_nms = district_names()
+    print(f"{len(sgg_nms)} districts, {os.cpu_count()} cpus")
+    print(f"{'mode':<12}{'startup(s)':>12}{'first(s)':>10}{'warm(s)':>10}")
+
+    first = timeit(lambda: serial(sgg_nms, args.periods), 1)
+    warm = timeit(lambda: serial(sgg_nms, args.periods), args.repeat)
+    print(f"{'serial':<12}{'-':>12}{first:>10.2f}{warm:>10.2f}")
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        pool = fc.make_pool(workers)
+        pool.submit(int).result()  # 작업 프로세스가 하나 이상 뜰 때까지 기다린다.
+        startup = time.perf_counter() - start
+        with pool:
+            start = time.perf_counter()
+            results = fc.predict_all(sgg_nms, args.periods, pool)
+            first = time.perf_counter() - start
+            warm = timeit(lambda: fc.predict_all(sgg_nms, args.periods, pool), args.repeat)
+        failed = sum(error is not None for _, error in results)
+        print(f"{f'pool x{workers}':<12}{startup:>12.2f}{first:>10.2f}{warm:>10.2f}"
+              + (f"  ({failed} failed)" if failed else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# -*- coding:utf-8 -*-
+# 예측 모드별 지연 시간과 불확실성 구간 정확도 (ml/models 의 자치구 모델 25개)
+# 기준 구간은 불확실성 표본 5000개로 만든 예측이다.
+# 실행 : ch08 폴더에서  python -m bench.bench_predict_mode --samples 50 100 200
+import argparse
+import time
+
+import numpy as np
+
+from bench.bench_predict import district_names
+from ml import forecast as fc
+
+REFERENCE_SAMPLES = 5000
+
+
+def run(models, mode, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        forecasts = [fc.predict(model, fc.MAX_PERIODS, mode) for model in models]
+        times.append(time.perf_counter() - start)
+    return forecasts, sorted(times)[len(times) // 2]
+
+
+def interval_error(forecasts, references):
+    # 기준 구간 폭 대비 하한 / 상한 차이의 평균(%)
+    errors = []
+    for forecast, reference in zip(forecasts, references):
+        width = (reference['yhat_upper'] - reference['yhat_lower']).mean()
+        diff = (forecast['yhat_lower'] - reference['yhat_lower']).abs() + \
+            (forecast['yhat_upper'] - reference['yhat_upper']).abs()
+        errors.append(diff.mean() / 2 / width * 100)
+    return np.mean(errors)
+
+
+def coverage(models, forecasts):
+    # 학습 기간 실제값이 구간 안에 들어간 비율 (interval_width 0.8 이 목표)
+    inside = []
+    for model, forecast in zip(models, forecasts):
+        n = len(model.history)
+        y = model.history['y'].to_numpy()
+        inside.append((y >= forecast['yhat_lower'].to_numpy()[:n]) & (y <= forecast['yhat_upper'].to_numpy()[:n]))
+    return np.concatenate(inside).mean() * 100
+
+
+def load(sgg_nms, mode, samples=None):
+    models = [fc.load_model(sgg_nm, mode=mode) for sgg_nm in sgg_nms]
+    if samples is not None:
+        for model in models:
+            model.uncertainty_samples = samples
+    return models
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--samples', type=int, nargs='+', default=[50, 100, 200])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    sgg_nms = district_names()
+    models = load(sgg_nms, 'full', REFERENCE_SAMPLES)
+    references, _ = run(models, 'reduced', 1)
+
+    cases = [('full', 'full', None)] + [(f'reduced {n}', 'reduced', n) for n in args.samples] + [('point', 'point', None)]
+    print(f"{len(sgg_nms)} models x {fc.MAX_PERIODS} days, reference : {REFERENCE_SAMPLES} samples")
+    print(f"{'mode':<14}{'latency(s)':>12}{'speedup':>9}{'interval err(%)':>17}{'coverage(%)':>13}{'repeatable':>12}")
+    base = None
+    for label, mode, samples in cases:
+        models = load(sgg_nms, mode, samples)
+        forecasts, latency = run(models, mode, args.repeat)
+        base = base or latency
+        if mode == 'point':
+            err, cov, same = '-', '-', 'yes'
+        else:
+            err, cov = f"{interval_error(forecasts, references):.1f}", f"{coverage(models, forecasts):.1f}"
+            again, _ = run(models, mode, 1)
+            same = 'yes' if all(a['yhat_lower'].equals(b['yhat_lower']) for a, b in zip(forecasts, again)) else 'no'
+        print(f"{label:<14}{latency:>12.3f}{base / latency:>8.1f}x{err:>17}{cov:>13}{same:>12}")
+
+if __name__ == "__main__":
+    main()
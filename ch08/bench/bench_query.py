@@ -0,0 +1,60 @@
+# -*- coding:utf-8 -*-
+# 불리언 마스크 필터와 DealQuery 구간 조회 비교
+# 실행 : ch08 폴더에서  python -m bench.bench_query --rows 1000000 10000000
+import argparse
+import time
+
+from bench.synthetic import make_deals
+from query import DealQuery
+
+COLUMNS = ['SGG_CD', 'SGG_NM', 'HOUSE_TYPE', 'DEAL_YMD', 'OBJ_AMT', 'BLDG_AREA']
+
+
+def timeit(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2] * 1000
+
+
+def cases(data, deals):
+    month = data['DEAL_YMD'].dt.month
+    return {
+        # viz.meanChart : 자치구 + 기간
+        'district+range': (
+            lambda: data[data['SGG_NM'] == '강남구'].pipe(lambda df: df[df['DEAL_YMD'].between("2023-03-01", "2023-04-30")]),
+            lambda: deals.select('강남구', start="2023-03-01", end="2023-04-30")),
+        # home : 자치구 + 아파트 + 월
+        'district+type+month': (
+            lambda: data[(data['HOUSE_TYPE'] == '아파트') & (month == 3) & (data['SGG_NM'] == '강남구')],
+            lambda: deals.select('강남구', '아파트', months=[202303])),
+        # stat.twoMeans : 아파트 + 3/4월 (전체 자치구)
+        'type+months': (
+            lambda: data[(data['HOUSE_TYPE'] == '아파트') & (month.isin([3, 4]))],
+            lambda: deals.select(house_type='아파트', months=[202303, 202304])),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12}  {'case':<22}{'mask(ms)':>10}{'query(ms)':>11}{'speedup':>9}")
+    for n_rows in args.rows:
+        data = DealQuery.sort(make_deals(n_rows, columns=COLUMNS))
+        start = time.perf_counter()
+        deals = DealQuery(data)
+        build = (time.perf_counter() - start) * 1000
+        for name, (mask_fn, query_fn) in cases(data, deals).items():
+            assert len(mask_fn()) == len(query_fn())
+            mask_ms, query_ms = timeit(mask_fn, args.repeat), timeit(query_fn, args.repeat)
+            print(f"{n_rows:>12,}  {name:<22}{mask_ms:>10.2f}{query_ms:>11.2f}{mask_ms / query_ms:>8.1f}x")
+        print(f"{n_rows:>12,}  {'(index build)':<22}{'':>10}{build:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# -*- coding:utf-8 -*-
+# 산점도 그리기 + PNG 변환 시간 : seaborn 점 그대로 vs 2차원 격자(eda/scatter.py)
+# 실행 : ch08 폴더에서  python -m bench.bench_scatter --points 5000 50000 500000
+import argparse
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+from bench.synthetic import make_deals
+from eda.scatter import adaptive_scatter
+from figure_cache import to_png
+
+
+def render(data, binned):
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    if binned:
+        adaptive_scatter(ax, data, 'BLDG_AREA', 'OBJ_AMT', max_points=0)
+    else:
+        sns.scatterplot(x='BLDG_AREA', y='OBJ_AMT', data=data, ax=ax)
+    png = to_png(fig)
+    return time.perf_counter() - start, len(png)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--points', type=int, nargs='+', default=[5000, 50000, 500000])
+    args = parser.parse_args()
+
+    print(f"{'points':>10}{'scatter(s)':>12}{'png(KB)':>10}{'binned(s)':>12}{'png(KB)':>10}")
+    for points in args.points:
+        data = make_deals(points, columns=['BLDG_AREA', 'OBJ_AMT', 'DEAL_YMD'])
+        render(data.head(100), False), render(data.head(100), True)  # 첫 호출 준비 비용 제외
+        exact, exact_bytes = render(data, False)
+        binned, binned_bytes = render(data, True)
+        print(f"{points:>10,}{exact:>12.2f}{exact_bytes / 1024:>10.0f}{binned:>12.2f}{binned_bytes / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
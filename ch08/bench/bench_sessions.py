@@ -0,0 +1,77 @@
+# -*- coding:utf-8 -*-
+# 동시 세션 수에 따른 메모리 비교 : st.cache_data 사본 vs st.cache_resource 공유 데이터
+# 실행 : ch08 폴더에서  python -m bench.bench_sessions --sessions 50 --scale 10
+import argparse
+import json
+import pickle
+import resource
+import subprocess
+import sys
+
+import pandas as pd
+
+import utils
+
+
+def csv_copy_session(blob):
+    # 이전 방식 : cache_data 가 돌려주는 사본 + 페이지마다 DEAL_YMD 변환 / month 추가
+    data = pickle.loads(blob)
+    data['DEAL_YMD'] = pd.to_datetime(data['DEAL_YMD'], format="%Y-%m-%d")
+    data['month'] = data['DEAL_YMD'].dt.month
+    return data
+
+
+def copy_session(blob):
+    # 타입이 지정된 스냅샷이지만 여전히 cache_data 로 세션마다 사본을 만드는 경우
+    data = pickle.loads(blob)
+    data['month'] = data['DEAL_YMD'].dt.month
+    return data
+
+
+def shared_session(shared):
+    # 현재 방식 : 공유 데이터의 얕은 사본, 파생 컬럼은 미리 계산되어 있다.
+    return shared.copy(deep=False)
+
+
+def worker(mode, sessions, scale):
+    if mode == 'csv-copy':
+        data = pd.read_csv(utils.CSV_PATH)
+    else:
+        data = utils.read_csv()
+    data = pd.concat([data] * scale, ignore_index=True)
+    if mode == 'shared':
+        data['month'] = data['DEAL_YMD'].dt.month.astype('int8')
+        cached, session = utils.freeze(data), shared_session
+    else:
+        cached, session = pickle.dumps(data), csv_copy_session if mode == 'csv-copy' else copy_session
+    del data
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    alive = [session(cached) for _ in range(sessions)]  # 동시에 살아있는 세션들
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'rows': len(alive[0]), 'total_mb': (after - before) / 1024,
+                      'per_session_mb': (after - before) / 1024 / sessions}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--scale', type=int, default=10, help="원본 데이터를 몇 배로 늘릴지")
+    parser.add_argument('--worker', choices=['csv-copy', 'copy', 'shared'])
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.sessions, args.scale)
+        return
+
+    print(f"{'mode':<10}{'rows':>10}{'total(MB)':>12}{'per session(MB)':>18}")
+    for mode in ['csv-copy', 'copy', 'shared']:
+        out = subprocess.run([sys.executable, '-m', 'bench.bench_sessions', '--worker', mode,
+                              '--sessions', str(args.sessions), '--scale', str(args.scale)],
+                             capture_output=True, text=True, check=True)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{mode:<10}{r['rows']:>10,}{r['total_mb']:>12.1f}{r['per_session_mb']:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
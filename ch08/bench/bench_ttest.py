@@ -0,0 +1,54 @@
+# -*- coding:utf-8 -*-
+# 3월 vs 4월 아파트 가격 t-검정 : 자치구마다 pingouin.ttest vs 집계값으로 한 번에 계산 (welch.py)
+# 실행 : ch08 폴더에서  python -m bench.bench_ttest --rows 11000 1000000
+import argparse
+
+import numpy as np
+import pingouin as pg
+
+import period
+import welch
+from bench.bench_predict import timeit
+from bench.synthetic import make_deals
+from cube import Cube
+from query import DealQuery
+
+
+def pingouin_all(deals):
+    # 이전 방식 : 서울시 전체 + 자치구 25곳을 하나씩 잘라서 검정
+    results = {}
+    for sgg_nm in [None, *deals.sgg_names]:
+        data = deals.select(sgg_nm, '아파트', months=[202303, 202304])
+        results[sgg_nm] = pg.ttest(data.loc[data['month'] == 202303, 'OBJ_AMT'], data.loc[data['month'] == 202304, 'OBJ_AMT'],
+                                   paired=False)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[11000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}{'pingouin 1(ms)':>16}{'pingouin 26(ms)':>17}{'welch 26(ms)':>14}{'max rel diff':>14}")
+    for rows in args.rows:
+        data = make_deals(rows, start="2023-02-24", days=70)
+        data['month'] = period.month_key(data['DEAL_YMD']).astype('int32')
+        deals, cube = DealQuery(DealQuery.sort(data)), Cube.build(data)
+
+        seoul = deals.select(house_type='아파트', months=[202303, 202304])
+        one = timeit(lambda: pg.ttest(seoul.loc[seoul['month'] == 202303, 'OBJ_AMT'],
+                                      seoul.loc[seoul['month'] == 202304, 'OBJ_AMT'], paired=False), args.repeat)
+        loop = timeit(lambda: pingouin_all(deals), args.repeat)
+        vector = timeit(lambda: welch.month_tests(cube), args.repeat)
+
+        reference = pingouin_all(deals)
+        districts, overall = welch.month_tests(cube)
+        diff = max(abs(reference[None]['T'].values[0] - overall['T'].values[0]) / abs(overall['T'].values[0]),
+                   np.nanmax([abs(reference[nm]['T'].values[0] - districts.loc[nm, 'T']) / abs(districts.loc[nm, 'T'])
+                              for nm in districts.index]))
+        print(f"{rows:>10,}{one * 1000:>16.1f}{loop * 1000:>17.1f}{vector * 1000:>14.1f}{diff:>14.1e}")
+
+
+if __name__ == "__main__":
+    main()
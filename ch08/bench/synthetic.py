@@ -0,0 +1,26 @@
+# -*- coding:utf-8 -*-
+# 벤치마크용 합성 데이터 : 실제 거래 행을 무작위로 뽑고 계약일만 기간 안에서 다시 배정한다.
+import numpy as np
+import pandas as pd
+
+import utils
+
+
+def make_deals(n_rows, start="2023-01-01", days=365, columns=None, seed=0):
+    rng = np.random.default_rng(seed)
+    base = utils.read_csv()
+    if columns is not None:
+        base = base[columns]
+    data = base.take(rng.integers(0, len(base), n_rows)).reset_index(drop=True)
+    data['DEAL_YMD'] = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, n_rows), unit='D')
+    return data
+
+
+def write_csv(path, n_rows, chunk_rows=None, seed=0, **kwargs):
+    # load_data 가 읽는 CSV 와 같은 형식으로 저장한다. chunk_rows 를 주면 메모리에 다 올리지 않고 나눠서 덧붙인다.
+    chunk_rows = chunk_rows or n_rows
+    for i, first in enumerate(range(0, n_rows, chunk_rows)):
+        data = make_deals(min(chunk_rows, n_rows - first), seed=seed + i, **kwargs)
+        data['DEAL_YMD'] = data['DEAL_YMD'].dt.strftime("%Y-%m-%d")
+        data.to_csv(path, index=False, mode='w' if i == 0 else 'a', header=i == 0)
+    return path
@@ -0,0 +1,60 @@
+# -*- coding:utf-8 -*-
+import os
+from pathlib import Path
+
+# 작업 디렉터리와 상관없이 ch08 폴더 기준으로 경로를 찾는다.
+BASE_DIR = Path(__file__).resolve().parent
+
+DATA_DIR = Path(os.environ.get("SEOUL_DATA_DIR", BASE_DIR / "data"))
+CSV_PATH = DATA_DIR / "seoul_real_estate.csv"
+SNAPSHOT_DIR = DATA_DIR / "snapshot"  # 계약 연/월(year=YYYY/month=M) 파티션으로 나눈 Parquet 스냅샷
+STORE_DIR = DATA_DIR / "store"
+
+# 지도 경계 원본(EPSG:5178)과 geo.py 로 미리 만들어 두는 지도 캐시
+GEO_SRC_PATH = BASE_DIR / "eda" / "data" / "seoul_sig.geojson"
+GEO_CACHE_DIR = BASE_DIR / "eda" / "data" / "geo_cache"
+
+# 자치구별 Prophet 모델
+MODEL_DIR = BASE_DIR / "ml" / "models"
+
+# 자치구 예측을 나눠 돌릴 프로세스 수 (1 이면 프로세스 풀 없이 순서대로 예측)
+PREDICT_WORKERS = int(os.environ.get("SEOUL_PREDICT_WORKERS", min(8, os.cpu_count() or 1)))
+
+# 함께 배포하는 한글 폰트
+FONT_DIR = BASE_DIR / "Nanum_Gothic"
+
+# 그려 둔 그래프(PNG) 캐시 : 메모리 최대 크기(MB)와 넘치는 것을 저장할 폴더
+FIGURE_CACHE_MB = int(os.environ.get("SEOUL_FIGURE_CACHE_MB", 64))
+FIGURE_CACHE_DIR = DATA_DIR / "figures"
+
+# Prophet 예측 모드 : full (불확실성 표본 전체) / reduced (표본 PREDICT_SAMPLES 개, seed 고정) / point (구간 없이 점 예측만)
+PREDICT_MODE = os.environ.get("SEOUL_PREDICT_MODE", "full")
+PREDICT_SAMPLES = int(os.environ.get("SEOUL_PREDICT_SAMPLES", 200))
+PREDICT_SEED = int(os.environ.get("SEOUL_PREDICT_SEED", 42))
+
+# 구간별 실행 시간 측정 (tracing.py) : 켜면 사이드바에 rerun 별 시간을 보여주고 JSONL 로그에 남긴다.
+TRACE = os.environ.get("SEOUL_TRACE", "0").lower() in ("1", "true", "yes")
+TRACE_LOG = Path(os.environ.get("SEOUL_TRACE_LOG", DATA_DIR / "trace.jsonl"))
+
+# 산점도 : 점이 이보다 많으면 하나씩 그리지 않고 2차원 격자(SCATTER_BINS x SCATTER_BINS)로 묶어 밀도로 그린다.
+SCATTER_MAX_POINTS = int(os.environ.get("SEOUL_SCATTER_MAX_POINTS", 20000))
+SCATTER_BINS = int(os.environ.get("SEOUL_SCATTER_BINS", 200))
+
+# 추세 그래프(eda/viz.py) JSON 캐시 : (자치구, 기간, 지표) 조합 수
+TREND_FIGURE_CACHE_SIZE = int(os.environ.get("SEOUL_TREND_FIGURE_CACHE_SIZE", 200))
+
+# 조회 기간 : 처음에는 마지막 거래일까지 최근 PERIOD_MONTHS 개월을 보여주고,
+# 기간별 데이터 / 큐브 / 회귀 합계는 최근에 쓴 PERIOD_CACHE_SIZE 개 기간만 메모리에 둔다.
+PERIOD_MONTHS = int(os.environ.get("SEOUL_PERIOD_MONTHS", 3))
+PERIOD_CACHE_SIZE = int(os.environ.get("SEOUL_PERIOD_CACHE_SIZE", 4))
+
+# 데이터 백엔드 : pandas (조회 기간 데이터를 메모리에 올려 공유) / duckdb (Parquet 파일에 SQL 로 조회, duck.py)
+BACKEND = os.environ.get("SEOUL_BACKEND", "pandas")
+DUCKDB_MEMORY = os.environ.get("SEOUL_DUCKDB_MEMORY", "1GB")    # DuckDB 가 넘으면 디스크로 내려 쓰는 메모리 한도
+DUCKDB_THREADS = int(os.environ.get("SEOUL_DUCKDB_THREADS", 0))  # 0 이면 DuckDB 기본값 (CPU 수)
+
+# 예측 결과 내보내기(ml/export.py) : (자치구, 기간, 모델 버전, 컬럼, 형식) 별 파일을 EXPORT_DIR 에 최대 EXPORT_CACHE_MB 까지 남기고,
+# 파일을 만들 때는 EXPORT_CHUNK_ROWS 행씩 나눠서 쓴다.
+EXPORT_DIR = DATA_DIR / "exports"
+EXPORT_CACHE_MB = int(os.environ.get("SEOUL_EXPORT_CACHE_MB", 256))
+EXPORT_CHUNK_ROWS = int(os.environ.get("SEOUL_EXPORT_CHUNK_ROWS", 10000))
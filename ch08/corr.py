@@ -0,0 +1,144 @@
+# -*- coding:utf-8 -*-
+# 그룹별 상관계수를 한 번에 계산하는 모듈
+# (자치구, 월) 같은 그룹마다 pingouin.corr 를 부르는 대신, 그룹 번호로 bincount 해서 모든 그룹의
+# 피어슨 / 스피어만 상관계수, p-value, 신뢰구간, 검정력을 배열 연산으로 구한다. 컬럼 이름은 pingouin.corr 와 같다.
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+METHODS = {'pearson': '피어슨', 'spearman': '스피어만'}
+BOOTSTRAP_SAMPLES = 1000
+BOOTSTRAP_SEED = 42
+BOOTSTRAP_CHUNK = 4_000_000  # 한 번에 만드는 재표본 인덱스 수 (메모리 한도)
+
+
+def group_ids(data, by):
+    # by 컬럼 조합마다 0 부터 번호를 붙이고, 번호 순서대로의 그룹 이름(Index / MultiIndex)을 함께 돌려준다.
+    grouped = data.groupby(by, observed=True, sort=True)
+    return grouped.ngroup().to_numpy(), grouped.size().index
+
+
+def grouped_rank(values, groups):
+    # 그룹 안에서의 순위 (동점은 평균 순위, scipy.stats.rankdata 와 같다)
+    return pd.Series(values).groupby(groups).rank(method='average').to_numpy()
+
+
+def pearson(x, y, groups, n_groups):
+    # 그룹별 피어슨 상관계수. 평균을 먼저 구한 뒤 편차곱을 더해서 큰 값에서도 정밀도를 지킨다.
+    n = np.bincount(groups, minlength=n_groups).astype('float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dx = x - (np.bincount(groups, weights=x, minlength=n_groups) / n)[groups]
+        dy = y - (np.bincount(groups, weights=y, minlength=n_groups) / n)[groups]
+        sxy = np.bincount(groups, weights=dx * dy, minlength=n_groups)
+        sxx = np.bincount(groups, weights=dx * dx, minlength=n_groups)
+        syy = np.bincount(groups, weights=dy * dy, minlength=n_groups)
+        r = np.clip(sxy / np.sqrt(sxx * syy), -1, 1)
+    return r, n
+
+
+def corr_stats(r, n, confidence=0.95, alpha=0.05):
+    # r, n 배열로 p-value(t 분포), Fisher z 신뢰구간, 검정력(pingouin.power_corr 와 같은 근사)을 구한다.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dof = n - 2
+        t = r * np.sqrt(dof / (1 - r ** 2))
+        pval = np.where(np.abs(r) == 1, 0.0, 2 * stats.t.sf(np.abs(t), dof))
+        z, se = np.arctanh(r), 1 / np.sqrt(n - 3)
+        crit = stats.norm.ppf(0.5 + confidence / 2)
+        ci = np.stack([np.tanh(z - crit * se), np.tanh(z + crit * se)], axis=-1)
+
+        ttt = stats.t.ppf(1 - alpha / 2, dof)
+        zrc = np.arctanh(np.sqrt(ttt ** 2 / (ttt ** 2 + dof)))
+        zr = np.arctanh(np.abs(r)) + np.abs(r) / (2 * (n - 1))
+        power = stats.norm.cdf((zr - zrc) * np.sqrt(n - 3)) + stats.norm.cdf((-zr - zrc) * np.sqrt(n - 3))
+    pval = np.where(n > 2, pval, np.nan)
+    power = np.where(n > 4, power, np.nan)
+    return pval, ci, power
+
+
+def _tie_blocks(values, groups):
+    # 그룹 안에서 값 순서로 정렬했을 때의 위치와 동점 묶음(block) 정보
+    order = np.lexsort((values, groups))
+    sv, sg = values[order], groups[order]
+    new_group = np.r_[True, sg[1:] != sg[:-1]]
+    new_block = new_group | np.r_[True, sv[1:] != sv[:-1]]
+    starts = np.flatnonzero(new_block)
+    group_first = np.maximum.accumulate(np.where(new_group[starts], np.arange(len(starts)), 0))
+    return order, starts, np.cumsum(new_block) - 1, group_first
+
+
+def _resample_ranks(counts, blocks):
+    # counts[b, i] : b 번째 재표본에 i 번째 행이 뽑힌 횟수. 재표본을 정렬하지 않고 누적합으로 평균 순위를 구한다.
+    order, starts, block_of, group_first = blocks
+    totals = np.add.reduceat(counts[:, order], starts, axis=1)
+    below = np.cumsum(totals, axis=1) - totals
+    below -= below[:, group_first]  # 그룹이 바뀌면 0 부터 다시 센다.
+    ranks = np.empty_like(counts)
+    ranks[:, order] = (below + (totals + 1) / 2)[:, block_of]
+    return ranks
+
+
+def _weighted_pearson(w, x, y, group_starts, groups):
+    # 가중치(뽑힌 횟수) w 로 재표본마다 / 그룹마다 피어슨 상관계수를 구한다.
+    sw = np.add.reduceat(w, group_starts, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dx = x - (np.add.reduceat(w * x, group_starts, axis=1) / sw)[:, groups]
+        dy = y - (np.add.reduceat(w * y, group_starts, axis=1) / sw)[:, groups]
+        sxy = np.add.reduceat(w * dx * dy, group_starts, axis=1)
+        sxx = np.add.reduceat(w * dx * dx, group_starts, axis=1)
+        syy = np.add.reduceat(w * dy * dy, group_starts, axis=1)
+        return np.clip(sxy / np.sqrt(sxx * syy), -1, 1)
+
+
+def bootstrap_ci(x, y, groups, n_groups, method='pearson', samples=BOOTSTRAP_SAMPLES, seed=BOOTSTRAP_SEED,
+                 confidence=0.95):
+    # 그룹마다 같은 크기로 복원추출한 재표본 samples 개의 상관계수로 백분위 신뢰구간을 만든다.
+    # 재표본은 행마다 뽑힌 횟수(samples x 행 수 행렬)로 나타내고, 행이 많으면 재표본을 나눠서 계산한다.
+    rng = np.random.default_rng(seed)
+    order = np.argsort(groups, kind='stable')
+    x, y, groups = x[order], y[order], groups[order]
+    n = np.bincount(groups, minlength=n_groups)
+    group_starts = np.concatenate([[0], np.cumsum(n)[:-1]])
+    if method == 'spearman':
+        blocks_x, blocks_y = _tie_blocks(x, groups), _tie_blocks(y, groups)
+    per_chunk = max(1, BOOTSTRAP_CHUNK // max(len(x), 1))
+    boot = []
+    for first in range(0, samples, per_chunk):
+        k = min(per_chunk, samples - first)
+        draws = group_starts[groups] + (rng.random((k, len(x))) * n[groups]).astype('int64')
+        draws += np.arange(k)[:, None] * len(x)
+        counts = np.bincount(draws.ravel(), minlength=k * len(x)).reshape(k, len(x)).astype('float64')
+        if method == 'spearman':
+            bx, by = _resample_ranks(counts, blocks_x), _resample_ranks(counts, blocks_y)
+        else:
+            bx, by = x, y
+        boot.append(_weighted_pearson(counts, bx, by, group_starts, groups))
+    boot = np.concatenate(boot)
+    tail = (1 - confidence) / 2 * 100
+    # 표본이 너무 적은 그룹(n <= 2)은 재표본 상관계수가 모두 NaN 이므로 백분위를 구하지 않고 NaN 으로 둔다.
+    valid = ~np.isnan(boot).all(axis=0)
+    ci = np.full((n_groups, 2), np.nan)
+    ci[valid] = np.stack([np.nanpercentile(boot[:, valid], tail, axis=0),
+                          np.nanpercentile(boot[:, valid], 100 - tail, axis=0)], axis=-1)
+    return ci
+
+
+def corr_table(data, x, y, by, method='pearson', bootstrap=False, samples=BOOTSTRAP_SAMPLES):
+    # by 그룹마다 pingouin.corr(data[x], data[y], method=method) 와 같은 값을 한 줄씩 돌려준다. (BF10 제외)
+    # by 가 빈 리스트면 전체를 그룹 하나로 본다.
+    data = data[[x, y, *by]].dropna(subset=[x, y])
+    if by:
+        groups, names = group_ids(data, by)
+    else:
+        groups, names = np.zeros(len(data), dtype='int64'), pd.Index(['전체'])
+    n_groups = len(names)
+    xs, ys = data[x].to_numpy('float64'), data[y].to_numpy('float64')
+    if method == 'spearman':
+        rx, ry = grouped_rank(xs, groups), grouped_rank(ys, groups)
+    else:
+        rx, ry = xs, ys
+    r, n = pearson(rx, ry, groups, n_groups)
+    pval, ci, power = corr_stats(r, n)
+    if bootstrap:
+        ci = bootstrap_ci(xs, ys, groups, n_groups, method, samples)
+    return pd.DataFrame({'n': n.astype('int64'), 'r': r, 'CI95%': list(np.round(ci, 2)), 'p-val': pval,
+                         'power': power}, index=names)
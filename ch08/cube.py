@@ -0,0 +1,100 @@
+# -*- coding:utf-8 -*-
+# 자치구(SGG_CD) x 주거형태(HOUSE_TYPE) x 계약일(DEAL_YMD) 단위로 미리 계산해 두는 집계 큐브
+# 각 칸에는 건수 / 합계 / 제곱합 / 최솟값 / 최댓값만 저장하고, 평균과 표준편차는 조회할 때 계산한다.
+import numpy as np
+import pandas as pd
+
+import period
+from tracing import span
+
+KEYS = ['SGG_CD', 'HOUSE_TYPE', 'DEAL_YMD']
+ROLLUP = {'count': 'sum', 'sum': 'sum', 'sumsq': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def _select(value):
+    # 값 하나도 리스트로 감싸야 MultiIndex 레벨이 없어지지 않는다.
+    if value is None:
+        return slice(None)
+    if np.ndim(value) == 0:
+        return [value]
+    return list(value)
+
+
+def finish(result, by, names):
+    # 건수 / 합계 / 제곱합으로 평균과 표본 표준편차(pandas std 와 같은 ddof=1)를 계산하고,
+    # SGG_CD 로 묶었으면 바로 뒤에 자치구 이름을 붙인다. (duck.py 의 SQL 집계 결과도 같은 모양으로 만든다)
+    result['mean'] = result['sum'] / result['count']
+    var = (result['sumsq'] - result['sum'] ** 2 / result['count']) / (result['count'] - 1)
+    result['std'] = np.sqrt(var.clip(lower=0).where(result['count'] > 1))
+    if 'SGG_CD' in by:
+        result.insert(by.index('SGG_CD') + 1, 'SGG_NM', result['SGG_CD'].map(names))
+    return result
+
+
+class Cube:
+    def __init__(self, cells, names):
+        self.cells = cells  # MultiIndex(SGG_CD, HOUSE_TYPE, DEAL_YMD) 로 정렬된 집계값
+        self.names = names  # SGG_CD -> SGG_NM
+
+    @classmethod
+    def build(cls, data, value='OBJ_AMT'):
+        v = data[value].astype('float64')
+        grouped = data[KEYS].assign(v=v, v2=v * v).groupby(KEYS, observed=True)
+        cells = pd.DataFrame({
+            'count': grouped['v'].count(),
+            'sum': grouped['v'].sum(),
+            'sumsq': grouped['v2'].sum(),
+            'min': grouped['v'].min(),
+            'max': grouped['v'].max(),
+        }).sort_index()
+        names = data[['SGG_CD', 'SGG_NM']].drop_duplicates().set_index('SGG_CD')['SGG_NM'].astype(str)
+        return cls(cells, names)
+
+    def code(self, sgg_nm):
+        # 조회 기간에 거래가 없는 자치구는 어떤 칸과도 맞지 않는 -1 (조회 결과가 빈 표가 된다)
+        codes = self.names.index[self.names == sgg_nm]
+        return codes[0] if len(codes) else -1
+
+    def query(self, by, sgg_cd=None, house_type=None, start=None, end=None, months=None, freq='D'):
+        # by : 묶을 차원 (SGG_CD / HOUSE_TYPE / DEAL_YMD), freq='M' 이면 DEAL_YMD 를 월 단위로 묶는다.
+        # months : 연월 정수(202303) 목록
+        with span('cube.query') as s:
+            start = pd.Timestamp(start) if start is not None else None
+            end = pd.Timestamp(end) if end is not None else None
+            try:
+                cells = self.cells.loc[(_select(sgg_cd), _select(house_type), slice(start, end)), :]
+            except KeyError:
+                cells = self.cells.iloc[:0]
+            cells = cells.reset_index()
+            if months is not None:
+                cells = cells[period.month_key(cells['DEAL_YMD']).isin(months)]
+            if freq == 'M':
+                cells['DEAL_YMD'] = cells['DEAL_YMD'].dt.to_period('M').dt.to_timestamp()
+
+            s.rows = len(cells)  # 묶기 전 칸 수
+            result = cells.groupby(by, observed=True).agg(ROLLUP).reset_index()
+            return finish(result, by, self.names)
+
+    def month_totals(self, house_type, months):
+        # 자치구 x 월(연월 정수) 별 건수 / 합계 / 제곱합. 두 집단 검정처럼 칸이 몇 개 안 되는 조회에 쓴다.
+        # query() 의 groupby 대신 MultiIndex 코드로 bincount 하므로 훨씬 가볍다.
+        with span('cube.month_totals') as s:
+            index = self.cells.index
+            sgg_codes, type_codes, day_codes = index.codes
+            if house_type not in index.levels[1]:
+                type_mask = np.zeros(len(index), dtype=bool)
+            else:
+                type_mask = type_codes == index.levels[1].get_loc(house_type)
+            cell_months = np.asarray(period.month_key(index.levels[2]))[day_codes]
+            n_sgg = len(index.levels[0])
+            columns = {}
+            for stat in ['count', 'sum', 'sumsq']:
+                values = self.cells[stat].to_numpy('float64')
+                for month in months:
+                    mask = type_mask & (cell_months == month)
+                    columns[(stat, month)] = np.bincount(sgg_codes[mask], weights=values[mask], minlength=n_sgg)
+            s.rows = int(type_mask.sum())
+            totals = pd.DataFrame(columns, index=index.levels[0])
+            totals.index = pd.Index(totals.index.map(self.names), name='SGG_NM')
+            return totals
+
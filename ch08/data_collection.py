@@ -1,21 +1,139 @@
 # -*- coding:utf-8 -*-
+import argparse
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 import pandas as pd
+
+import store
+from config import CSV_PATH
+
 SERVICE_KEY = '서비스키'
+BASE_URL = 'http://openapi.seoul.go.kr:8088'
+SERVICE = 'tbLnOpendataRtmsV'
+PAGE_SIZE = 1000      # OpenAPI 한 번 호출에 받을 수 있는 최대 건수
+MAX_WORKERS = 8
+MAX_RETRIES = 5
+BACKOFF = 0.5         # 재시도 대기 시간(초) : 0.5, 1, 2, 4 ...
 
-def main():
-    data = None
-    for j in range(1,12):
-        url = f'http://openapi.seoul.go.kr:8088/{SERVICE_KEY}/json/tbLnOpendataRtmsV/{1+((j-1)*1000)}/{j*1000}'
-        print(url)
-        req = requests.get(url)
-        content = req.json()
-        con = content['tbLnOpendataRtmsV']['row']
-        result = pd.DataFrame(con)
-        data = pd.concat([data, result])
-    data = data.reset_index(drop=True)
+NO_DATA = 'INFO-200'  # 해당하는 데이터가 없습니다.
+RETRY_CODES = {'ERROR-500', 'ERROR-600', 'ERROR-601'}  # 서버 / DB 오류는 다시 시도한다.
+
+_local = threading.local()
+
+
+class OpenApiError(Exception):
+    pass
+
+
+def get_session():
+    # requests.Session 은 스레드마다 따로 만든다.
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def page_url(start, end, base_url=BASE_URL, service_key=SERVICE_KEY, filters=()):
+    return '/'.join([base_url, service_key, 'json', SERVICE, str(start), str(end), *map(str, filters)])
+
+
+def fetch_page(url, retries=MAX_RETRIES, backoff=BACKOFF):
+    for attempt in range(retries):
+        try:
+            req = get_session().get(url, timeout=30)
+            req.raise_for_status()
+            content = req.json()
+            if SERVICE in content:
+                return content[SERVICE]
+            result = content.get('RESULT', {})
+            if result.get('CODE') == NO_DATA:
+                return {'list_total_count': 0, 'row': []}
+            if result.get('CODE') not in RETRY_CODES:
+                raise OpenApiError(f"{result.get('CODE')} {result.get('MESSAGE')} : {url}")
+            raise requests.HTTPError(f"{result.get('CODE')} {result.get('MESSAGE')}")
+        except (requests.RequestException, ValueError) as e:
+            if attempt == retries - 1:
+                raise OpenApiError(f"{url} : {e}") from e
+            time.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+
+
+def collect(base_url=BASE_URL, service_key=SERVICE_KEY, filters=(), max_pages=None, max_workers=MAX_WORKERS):
+    # 첫 페이지의 list_total_count 로 전체 페이지 수를 구한 뒤, 나머지 페이지는 병렬로 받는다.
+    first = fetch_page(page_url(1, PAGE_SIZE, base_url, service_key, filters))
+    n_pages = math.ceil(int(first['list_total_count']) / PAGE_SIZE)
+    if max_pages is not None:
+        n_pages = min(n_pages, max_pages)
+    print(f"total {first['list_total_count']} rows, {n_pages} pages")
+
+    urls = [page_url(1 + (j - 1) * PAGE_SIZE, j * PAGE_SIZE, base_url, service_key, filters)
+            for j in range(2, n_pages + 1)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pages = list(pool.map(fetch_page, urls))  # map 은 페이지 순서를 그대로 유지한다.
+    return to_frame([first, *pages])
+
+
+def to_frame(pages):
+    # 페이지마다 concat 하지 않고 마지막에 한 번만 DataFrame 을 만든다.
+    # 받은 행이 없으면(list_total_count 0) 컬럼도 없으므로, 저장소와 같은 컬럼의 빈 표를 만든다.
+    rows = [row for page in pages for row in page['row']]
+    data = pd.DataFrame.from_records(rows, columns=None if rows else store.COLUMNS)
     data['DEAL_YMD'] = pd.to_datetime(data['DEAL_YMD'], format=("%Y%m%d"))
-    data.to_csv('./data/seoul_real_estate.csv', index=False)
+    return data
+
+
+def collect_since(watermark, base_url=BASE_URL, service_key=SERVICE_KEY, filters=(), max_workers=MAX_WORKERS):
+    # OpenAPI 는 최근 계약일 순서로 내려주므로, 워터마크(- 신고기한)보다 오래된 페이지가 나오면 멈춘다.
+    cutoff = pd.Timestamp(watermark['DEAL_YMD']) - pd.Timedelta(days=store.LOOKBACK_DAYS)
+    first = fetch_page(page_url(1, PAGE_SIZE, base_url, service_key, filters))
+    n_pages = math.ceil(int(first['list_total_count']) / PAGE_SIZE)
+
+    pages = [first]
+    j = 2
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while j <= n_pages and pages[-1]['row'] and \
+                min(row['DEAL_YMD'] for row in pages[-1]['row']) >= cutoff.strftime("%Y%m%d"):
+            batch = range(j, min(j + max_workers, n_pages + 1))
+            urls = [page_url(1 + (k - 1) * PAGE_SIZE, k * PAGE_SIZE, base_url, service_key, filters) for k in batch]
+            pages += pool.map(fetch_page, urls)
+            j += len(batch)
+    print(f"total {first['list_total_count']} rows, fetched {len(pages)} pages since {cutoff.date()}")
+
+    data = to_frame(pages)
+    # 신고기한 안의 거래 + 해제사유발생일(CNTL_YMD)이 워터마크 이후인 거래만 남긴다.
+    cntl = pd.to_numeric(data['CNTL_YMD'], errors='coerce')
+    return data[(data['DEAL_YMD'] >= cutoff) | (cntl > (watermark['CNTL_YMD'] or 0))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="서울시 부동산 실거래가 정보 수집")
+    parser.add_argument('--year', help="접수연도(ACC_YEAR) 필터. 예) 2023")
+    parser.add_argument('--max-pages', type=int, default=None, help="최대 페이지 수 (기본값 : 전체)")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    parser.add_argument('--base-url', default=BASE_URL, help="테스트용 stub 서버 주소 등")
+    parser.add_argument('--output', default=str(CSV_PATH))
+    parser.add_argument('--incremental', action='store_true',
+                        help="워터마크 이후 거래만 받아서 data/store 파티션에 추가")
+    args = parser.parse_args()
+
+    filters = [args.year] if args.year else []
+    start = time.perf_counter()
+    if args.incremental:
+        watermark = store.load_watermark()
+        if watermark is None:
+            data = collect(args.base_url, SERVICE_KEY, filters, args.max_pages, args.workers)
+        else:
+            data = collect_since(watermark, args.base_url, SERVICE_KEY, filters, args.workers)
+        added, updated = store.append(data)
+        print(f"{len(data)} rows fetched, {added} added, {updated} updated, {time.perf_counter() - start:.1f}s")
+        return
+
+    data = collect(args.base_url, SERVICE_KEY, filters, args.max_pages, args.workers)
+    print(f"{len(data)} rows, {time.perf_counter() - start:.1f}s")
+    data.to_csv(args.output, index=False)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,218 @@
+# -*- coding:utf-8 -*-
+# DuckDB 로 Parquet 스냅샷 파일을 바로 조회하는 백엔드 (config.BACKEND = 'duckdb')
+# 조회 기간의 데이터를 메모리에 올리지 않고, 페이지의 필터 / 집계를 SQL 로 내려 보내 작은 결과 표만 돌려받는다.
+# DealQuery / Cube / GroupedOLS 와 같은 메서드를 제공하므로 페이지 코드는 어느 백엔드인지 몰라도 된다.
+import os
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from config import DUCKDB_MEMORY, DUCKDB_THREADS
+from cube import finish
+from ols import GroupedOLS, KEYS as OLS_KEYS
+from tracing import span
+
+SORT_KEYS = ['SGG_NM', 'HOUSE_TYPE', 'DEAL_YMD']  # DealQuery.select 와 같은 순서로 돌려준다.
+
+
+def connect():
+    # 프로세스에 하나만 만들고, 쿼리마다 cursor() 로 세션(스레드)별 연결을 쓴다.
+    con = duckdb.connect()
+    con.execute(f"SET memory_limit = '{DUCKDB_MEMORY}'")
+    if DUCKDB_THREADS:
+        con.execute(f"SET threads = {DUCKDB_THREADS}")
+    return con
+
+
+def _quote(path):
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+NA_VALUES = ['', 'null', 'NULL', 'NaN', 'nan', 'NA', 'N/A']  # pandas.read_csv 가 결측으로 읽는 값 (자주 쓰는 것만)
+INT_TYPES = [('TINYINT', 2 ** 7), ('SMALLINT', 2 ** 15), ('INTEGER', 2 ** 31), ('BIGINT', 2 ** 63)]
+
+
+def _int_type(low, high):
+    # pd.to_numeric(downcast='integer') 와 같이 값 범위가 들어가는 가장 작은 정수 타입
+    return next(name for name, limit in INT_TYPES if -limit <= low and high < limit)
+
+
+def _column_types(cur, category_cols, parse_strings):
+    # utils.read_csv / read_store + downcast 와 같은 dtype 이 되도록 컬럼마다 SQL 식을 고른다.
+    # 결측이 있는 정수와 숫자로 읽히는 문자열은 float, 그 뒤 정수는 범위에 맞게, float 는 값이 그대로일 때만 FLOAT 로 줄인다.
+    columns = [(name, kind) for name, kind, *_ in cur.execute("DESCRIBE source").fetchall()]
+    checks = []
+    for name, kind in columns:
+        col = f'"{name}"'
+        if kind == 'VARCHAR' and parse_strings and name not in category_cols:
+            checks += [f"bool_and(TRY_CAST({col} AS DOUBLE) IS NOT NULL) FILTER (WHERE {col} IS NOT NULL)"]
+        checks += [f"count(*) - count({col})"]
+    stats = iter(cur.execute(f"SELECT {', '.join(checks)} FROM source").fetchone())
+    exprs = {}
+    for name, kind in columns:
+        col = f'"{name}"'
+        numeric = next(stats) if kind == 'VARCHAR' and parse_strings and name not in category_cols else None
+        nulls = next(stats)
+        if kind in ('DATE', 'TIMESTAMP', 'TIMESTAMP_NS'):
+            exprs[name] = f"CAST({col} AS TIMESTAMP_NS)"  # pandas 와 같은 datetime64[ns]
+        elif (kind.endswith('INT') and nulls) or kind in ('DOUBLE', 'FLOAT') or numeric:
+            exprs[name] = f"CAST({col} AS DOUBLE)"
+        elif kind.endswith('INT'):
+            exprs[name] = f"CAST({col} AS BIGINT)"
+        else:
+            exprs[name] = col
+
+    checks = []
+    for name, expr in exprs.items():
+        if 'AS DOUBLE' in expr:
+            checks += [f"coalesce(bool_and(CAST(CAST({expr} AS FLOAT) AS DOUBLE) = {expr}), true)"]
+        elif 'AS BIGINT' in expr:
+            checks += [f"min({expr})", f"max({expr})"]
+    stats = iter(cur.execute(f"SELECT {', '.join(checks)} FROM source").fetchone())
+    for name, expr in exprs.items():
+        if 'AS DOUBLE' in expr and next(stats):
+            exprs[name] = f"CAST({expr} AS FLOAT)"
+        elif 'AS BIGINT' in expr:
+            exprs[name] = f"CAST({expr} AS {_int_type(next(stats), next(stats))})"
+    return [f'{expr} AS "{name}"' for name, expr in exprs.items()]
+
+
+def build_snapshot(con, source, out_dir, category_cols):
+    # source : CSV 경로 또는 증분 저장소 폴더. 읽은 행을 메모리에 모으지 않고 계약 연/월 파티션 파일로 바로 쓴다.
+    # 컬럼 타입은 pandas 로 만든 스냅샷과 같게 맞추므로 어느 백엔드로 만든 스냅샷이든 두 백엔드가 같이 읽을 수 있다.
+    parse_strings = str(source).endswith('.csv')
+    if parse_strings:
+        nullstr = ", ".join(_quote(value) for value in NA_VALUES)
+        scan = f"SELECT * FROM read_csv({_quote(source)}, nullstr = [{nullstr}])"
+    else:
+        scan = f"SELECT * FROM read_parquet({_quote(f'{source}/*/*/part-*.parquet')}, hive_partitioning = false)"
+    cur = con.cursor()
+    try:
+        cur.execute(f"CREATE TEMP VIEW source AS {scan}")
+        cur.execute(f"CREATE TEMP VIEW typed AS SELECT {', '.join(_column_types(cur, category_cols, parse_strings))} "
+                    f"FROM source")
+        cur.execute(f"COPY (SELECT *, year(DEAL_YMD) AS year, month(DEAL_YMD) AS month FROM typed) "
+                    f"TO {_quote(out_dir)} (FORMAT parquet, PARTITION_BY (year, month), FILENAME_PATTERN 'part-{{i}}')")
+        # 메타 정보는 원본을 다시 읽지 않고 방금 쓴 파티션 파일에서 구한다.
+        cur.execute(f"CREATE TEMP VIEW written AS SELECT * FROM read_parquet("
+                    f"{_quote(os.path.join(out_dir, '*', '*', 'part-*.parquet'))}, hive_partitioning = false)")
+        months = cur.execute("SELECT DISTINCT year(DEAL_YMD), month(DEAL_YMD) FROM written ORDER BY ALL").fetchall()
+        first_day, last_day = cur.execute("SELECT min(DEAL_YMD), max(DEAL_YMD) FROM written").fetchone()
+        # pandas 범주와 같은 순서(문자열 정렬)의 값 목록
+        categories = {col: [value for (value,) in cur.execute(
+            f"SELECT DISTINCT {col} FROM written WHERE {col} IS NOT NULL ORDER BY {col}").fetchall()]
+            for col in category_cols}
+    finally:
+        cur.close()
+    return {
+        'months': [[int(year), int(month)] for year, month in months],
+        'first_day': pd.Timestamp(first_day).strftime("%Y-%m-%d"),
+        'last_day': pd.Timestamp(last_day).strftime("%Y-%m-%d"),
+        'categories': {col: [str(value) for value in values] for col, values in categories.items()},
+    }
+
+
+class DuckSource:
+    # 조회 기간과 겹치는 월 파티션 파일 위의 deals 테이블. 양 끝 달은 계약일로 한 번 더 거른다.
+    def __init__(self, con, files, start, end, categories):
+        self.con = con
+        self.table = (f"(SELECT *, CAST(year(DEAL_YMD) * 100 + month(DEAL_YMD) AS INTEGER) AS month "
+                      f"FROM read_parquet([{', '.join(_quote(f) for f in files)}], hive_partitioning = false) "
+                      f"WHERE DEAL_YMD BETWEEN $window_start AND $window_end)")
+        self.window = {'window_start': pd.Timestamp(start), 'window_end': pd.Timestamp(end)}
+        self.categories = categories
+
+    def where(self, sgg_nm=None, house_type=None, start=None, end=None, months=None, sgg_cd=None):
+        # DealQuery.select / Cube.query 의 조건을 WHERE 절과 이름 있는 파라미터로 바꾼다.
+        conditions, params = [], dict(self.window)
+        for col, value in [('SGG_NM', sgg_nm), ('SGG_CD', sgg_cd), ('HOUSE_TYPE', house_type), ('month', months)]:
+            if value is not None:
+                conditions.append(f"list_contains(${col}, {col})")
+                params[col] = [v.item() if isinstance(v, np.generic) else v for v in np.atleast_1d(value)]
+        if start is not None:
+            conditions.append("DEAL_YMD >= $start")
+            params['start'] = pd.Timestamp(start)
+        if end is not None:
+            conditions.append("DEAL_YMD <= $end")
+            params['end'] = pd.Timestamp(end)
+        return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+    def df(self, sql, params, name='duck.query'):
+        with span(name) as s:
+            cur = self.con.cursor()
+            try:
+                result = cur.execute(sql, params).df()
+            finally:
+                cur.close()
+            s.rows = len(result)
+        # 범주 컬럼은 pandas 백엔드와 같은 범주(코드)로 맞춘다.
+        for col, values in self.categories.items():
+            if col in result.columns:
+                result[col] = result[col].astype(pd.CategoricalDtype(values))
+        return result
+
+
+class DuckQuery:
+    # DealQuery 와 같은 조회. 조건에 맞는 행만 DataFrame 으로 가져온다.
+    def __init__(self, source):
+        self.source = source
+        self.sgg_names = pd.Index(source.categories['SGG_NM'])
+        self.house_types = pd.Index(source.categories['HOUSE_TYPE'])
+
+    def months(self):
+        result = self.source.df(f"SELECT DISTINCT month FROM {self.source.table} ORDER BY month", self.source.window)
+        return result['month'].tolist()
+
+    def select(self, sgg_nm=None, house_type=None, start=None, end=None, months=None, columns=None):
+        where, params = self.source.where(sgg_nm, house_type, start, end, months)
+        select = "*" if columns is None else ", ".join(columns)
+        return self.source.df(f"SELECT {select} FROM {self.source.table}{where} ORDER BY {', '.join(SORT_KEYS)}",
+                              params, 'query.select')
+
+
+class DuckCube:
+    # Cube 와 같은 집계를 SQL GROUP BY 로 계산한다.
+    def __init__(self, source):
+        self.source = source
+        names = source.df(f"SELECT DISTINCT SGG_CD, SGG_NM FROM {source.table} ORDER BY SGG_CD", source.window)
+        self.names = pd.Series(names['SGG_NM'].astype(str).to_numpy(), index=names['SGG_CD'], name='SGG_NM')
+
+    def code(self, sgg_nm):
+        # 조회 기간에 거래가 없는 자치구는 어떤 칸과도 맞지 않는 -1 (조회 결과가 빈 표가 된다)
+        codes = self.names.index[self.names == sgg_nm]
+        return codes[0] if len(codes) else -1
+
+    def query(self, by, sgg_cd=None, house_type=None, start=None, end=None, months=None, freq='D'):
+        where, params = self.source.where(house_type=house_type, start=start, end=end, months=months, sgg_cd=sgg_cd)
+        keys = ["CAST(date_trunc('month', DEAL_YMD) AS TIMESTAMP_NS) AS DEAL_YMD" if key == 'DEAL_YMD' and freq == 'M'
+                else key for key in by]
+        result = self.source.df(
+            f"SELECT {', '.join(keys)}, count(OBJ_AMT) AS count, sum(v) AS sum, sum(v * v) AS sumsq, "
+            f"min(v) AS min, max(v) AS max "
+            f"FROM (SELECT *, CAST(OBJ_AMT AS DOUBLE) AS v FROM {self.source.table}{where}) "
+            f"GROUP BY ALL ORDER BY ALL", params, 'cube.query')
+        return finish(result, by, self.names)
+
+    def month_totals(self, house_type, months):
+        # Cube.month_totals 와 같은 모양 : 자치구(기간 안의 모든 자치구) x (건수 / 합계 / 제곱합, 월)
+        where, params = self.source.where(house_type=house_type, months=months)
+        result = self.source.df(
+            f"SELECT SGG_CD, month, count(OBJ_AMT) AS count, sum(v) AS sum, sum(v * v) AS sumsq "
+            f"FROM (SELECT *, CAST(OBJ_AMT AS DOUBLE) AS v FROM {self.source.table}{where}) GROUP BY ALL",
+            params, 'cube.month_totals')
+        table = result.pivot(index='SGG_CD', columns='month', values=['count', 'sum', 'sumsq'])
+        columns = pd.MultiIndex.from_tuples([(stat, month) for stat in ['count', 'sum', 'sumsq'] for month in months])
+        totals = table.reindex(index=self.names.index, columns=columns).fillna(0).astype('float64')
+        totals.index = pd.Index(totals.index.map(self.names), name='SGG_NM')
+        return totals
+
+
+def regression(source, x='BLDG_AREA', y='OBJ_AMT', keys=OLS_KEYS):
+    # GroupedOLS 의 그룹별 충분통계량을 SQL 로 한 번에 구한다.
+    sums = source.df(
+        f"SELECT {', '.join(keys)}, CAST(count(*) AS DOUBLE) AS n, sum(x) AS sx, sum(y) AS sy, sum(x * y) AS sxy, "
+        f"sum(x * x) AS sxx, sum(y * y) AS syy "
+        f"FROM (SELECT *, CAST({x} AS DOUBLE) AS x, CAST({y} AS DOUBLE) AS y FROM {source.table} "
+        f"WHERE {x} IS NOT NULL AND {y} IS NOT NULL) GROUP BY ALL ORDER BY ALL", source.window, 'ols.build')
+    return GroupedOLS(sums.set_index(list(keys)), x, y, keys)
@@ -1,10 +1,7 @@
 # -*- coding:utf-8 -*-
 import streamlit as st
 import pandas as pd
-from streamlit_option_menu import option_menu
-from eda.viz import showViz
-from eda.stat import showStat
-from eda.map import showMap
+from menu import option_menu
 
 def home():
     st.markdown("### Visualization 개요 \n"
@@ -17,7 +14,6 @@ def home():
     st.markdown("### Map 개요 \n")
 
 def run_eda(total_df):
-    total_df['DEAL_YMD'] = pd.to_datetime(total_df['DEAL_YMD'], format="%Y-%m-%d")
     st.markdown("## 탐색적 자료 분석 개요 \n"
                 "탐색적 자료분석 페이지입니다."
                 "여기에 독자가 넣고 싶은 추가 내용을 더 넣을 수 있습니다. 👇👇👇"
@@ -32,16 +28,21 @@ def run_eda(total_df):
                                     "nav-link": {"font-size": "18px", "text-align": "left", "margin": "0px",
                                                  "--hover-color": "#eee"},
                                     "nav-link-selected": {"background-color": "green"},
-                                }
+                                },
+                                key='eda_menu'
                             )
 
     if selected == 'Home':
         home()
+    # 하위 페이지 모듈(plotly / pingouin, seaborn / geopandas)은 선택했을 때만 import 한다.
     elif selected == 'Visualization':
+        from eda.viz import showViz
         showViz(total_df)
     elif selected == 'Statistics':
+        from eda.stat import showStat
         showStat(total_df)
     elif selected == 'Map':
+        from eda.map import showMap
         showMap(total_df)
     else:
         st.warning("Wrong")
\ No newline at end of file
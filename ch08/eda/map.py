@@ -2,87 +2,91 @@
 
 import pandas as pd
 import streamlit as st
-import geopandas as gpd
 import io
-import json
 
 import matplotlib.pyplot as plt
 import plotly.express as px
+import tracing
+from tracing import span
+from period import month_key, month_label
+from utils import load_cube
+import geo
 
-import os
-from matplotlib import font_manager as fm
-fpath = os.path.join(os.getcwd(), "Nanum_Gothic/NanumGothic-Bold.ttf")
-prop = fm.FontProperties(fname=fpath)
+from fonts import font_prop
+prop = font_prop("NanumGothic-Bold.ttf")
 
-def mapMatplotlib(merge_df):
-    fig, ax = plt.subplots(ncols=2, sharey=True, figsize=(15, 10))
-    merge_df[merge_df['month'] == 3].plot(ax=ax[0], column="mean", cmap="Pastel1", legend=False, alpha=0.9,
-                                          edgecolor='gray')
-    merge_df[merge_df['month'] == 4].plot(ax=ax[1], column="mean", cmap="Pastel1", legend=False, alpha=0.9,
-                                          edgecolor='gray')
-
-    patch_col = ax[0].collections[0]
-    cb = fig.colorbar(patch_col, ax=ax, shrink=0.5)
-    for i, row in merge_df[merge_df['month'] == 3].iterrows():
-        ax[0].annotate(row['SIG_KOR_NM'], xy=(row['lon'], row['lat']), xytext=(-7, 2),
-                       textcoords="offset points", fontsize=8, color='black', fontproperties=prop)
-
-    for i, row in merge_df[merge_df['month'] == 4].iterrows():
-        ax[1].annotate(row['SIG_KOR_NM'], xy=(row['lon'], row['lat']), xytext=(-7, 2),
-                       textcoords="offset points", fontsize=8, color='black', fontproperties=prop)
 
-    ax[0].set_title('2023-3월 아파트 평균(만원)', fontproperties=prop)
-    ax[1].set_title('2023-4월 아파트 평균(만원)', fontproperties=prop)
-    ax[0].set_axis_off()
-    ax[1].set_axis_off()
+@st.cache_resource
+def _load_geo(signature, level):
+    # 미리 만들어 둔 지도 캐시(geo.py)를 읽는다. 원본 경계 파일이 바뀌면 signature 가 달라져 다시 만든다.
+    geo.ensure()
+    return geo.read_frame(level), geo.read_geojson(level)
 
-    st.pyplot(fig)
 
+def load_geo(level=geo.DEFAULT_LEVEL):
+    return _load_geo(geo.source_signature(), level)
 
-def mapPlotly(merge_df):
-    with open('eda/data/seoul.geojson', encoding='UTF-8') as f:
-        data = json.load(f)
-
-    month = st.sidebar.radio("월", [3, 4])
+def mapMatplotlib(merge_df):
+    # 조회 기간의 첫 달과 마지막 달을 나란히 비교한다.
+    months = sorted(merge_df['month'].unique())
+    months = [months[0], months[-1]] if len(months) > 1 else months
+    with span('map.mapMatplotlib.figure', rows=len(merge_df)):
+        fig, ax = plt.subplots(ncols=len(months), sharey=True, figsize=(15, 10), squeeze=False)
+        ax = ax[0]
+        for axis, month in zip(ax, months):
+            month_df = merge_df[merge_df['month'] == month]
+            month_df.plot(ax=axis, column="mean", cmap="Pastel1", legend=False, alpha=0.9, edgecolor='gray')
+            for i, row in month_df.iterrows():
+                axis.annotate(row['SIG_KOR_NM'], xy=(row['lon'], row['lat']), xytext=(-7, 2),
+                              textcoords="offset points", fontsize=8, color='black', fontproperties=prop)
+            axis.set_title(f'{month_label(month)} 아파트 평균(만원)', fontproperties=prop)
+            axis.set_axis_off()
+
+        patch_col = ax[0].collections[0]
+        cb = fig.colorbar(patch_col, ax=ax, shrink=0.5)
+
+    tracing.pyplot(fig)
+
+
+def mapPlotly(merge_df, data):
+    month = st.sidebar.radio("월", sorted(merge_df['month'].unique()), format_func=month_label)
     result = merge_df[merge_df['month'] == month]
     mapbox_style = st.sidebar.selectbox('지도스타일', ["white-bg", "open-street-map", "carto-positron", "carto-darkmatter",
                                                   "stamen-terrain", "stamen-toner", "stamen-watercolor"])
     st.sidebar.caption("Site : https://plotly.com/python/mapbox-layers/#mapbox-basemap-style-references")
-    fig = px.choropleth_mapbox(result,
-                               geojson=data,
-                               locations='SIG_KOR_NM', color='mean',
-                               color_continuous_scale="Viridis",
-                               featureidkey='properties.SIG_KOR_NM',
-                               mapbox_style=mapbox_style,
-                               zoom=9.5,
-                               center={"lat": 37.563383, "lon": 126.996039},
-                               opacity=0.5
-                               )
-    fig.update_layout(margin={"r": 0, "t": 0, "l": 0, "b": 0})
-    fig.update_traces(hovertemplate='<b>%{location}</b><br>아파트 평균 가격: %{z:,.0f}(만원)')
-    fig.update_coloraxes(colorbar_tickformat='000')
-    st.plotly_chart(fig)
+    with span('map.mapPlotly.figure', rows=len(result)):
+        fig = px.choropleth_mapbox(result,
+                                   geojson=data,
+                                   locations='SIG_KOR_NM', color='mean',
+                                   color_continuous_scale="Viridis",
+                                   featureidkey='properties.SIG_KOR_NM',
+                                   mapbox_style=mapbox_style,
+                                   zoom=9.5,
+                                   center={"lat": 37.563383, "lon": 126.996039},
+                                   opacity=0.5
+                                   )
+        fig.update_layout(margin={"r": 0, "t": 0, "l": 0, "b": 0})
+        fig.update_traces(hovertemplate='<b>%{location}</b><br>아파트 평균 가격: %{z:,.0f}(만원)')
+        fig.update_coloraxes(colorbar_tickformat='000')
+    tracing.plotly_chart(fig)
 
 
 def showMap(total_df):
     st.markdown("### 병합 데이터 확인 \n"
                 "- 컬럼명 확인")
-    seoul_gpd = gpd.read_file("eda/data/seoul_sig.geojson")
-    seoul_gpd = seoul_gpd.set_crs(epsg='5178', allow_override=True)
-    seoul_gpd['center_point'] = seoul_gpd['geometry'].geometry.centroid
-    seoul_gpd['geometry'] = seoul_gpd['geometry'].to_crs(epsg=4326)
-    seoul_gpd['center_point'] = seoul_gpd['center_point'].to_crs(epsg=4326)
-    seoul_gpd['lon'] = seoul_gpd['center_point'].map(lambda x: x.xy[0][0])
-    seoul_gpd['lat'] = seoul_gpd['center_point'].map(lambda x: x.xy[1][0])
-    seoul_gpd = seoul_gpd.rename(columns={"SIG_CD": "SGG_CD"})
-
-    total_df['month'] = total_df['DEAL_YMD'].dt.month
-    total_df = total_df[(total_df['HOUSE_TYPE'] == '아파트') & (total_df['month'].isin([3, 4]))]
-    total_df = total_df[['DEAL_YMD', 'month', 'SGG_CD', 'SGG_NM', 'OBJ_AMT', 'HOUSE_TYPE']].reset_index(drop=True)
-
-    summary_df = total_df.groupby(['SGG_CD', 'month'])['OBJ_AMT'].agg(['mean', 'std', 'size']).reset_index()
-    summary_df['SGG_CD'] = summary_df['SGG_CD'].astype(str)
-    merge_df = seoul_gpd.merge(summary_df, on='SGG_CD')
+    level = st.sidebar.selectbox("지도 해상도", list(geo.LEVELS), index=list(geo.LEVELS).index(geo.DEFAULT_LEVEL),
+                                 format_func=lambda x: geo.LEVEL_NAMES[x])
+    seoul_gpd, seoul_geojson = load_geo(level)
+
+    summary_df = load_cube().query(['SGG_CD', 'DEAL_YMD'], house_type='아파트', freq='M')
+    if summary_df.empty:
+        st.warning("조회 기간에 아파트 거래가 없습니다.")
+        return
+    with span('map.merge', rows=len(summary_df)):
+        summary_df['month'] = month_key(summary_df['DEAL_YMD'])
+        summary_df = summary_df[['SGG_CD', 'month', 'mean', 'std', 'count']].rename(columns={'count': 'size'})
+        summary_df['SGG_CD'] = summary_df['SGG_CD'].astype(str)
+        merge_df = seoul_gpd.merge(summary_df, on='SGG_CD')
 
     buffer = io.StringIO()
     merge_df.info(buf=buffer)
@@ -97,6 +101,6 @@ def showMap(total_df):
         mapMatplotlib(merge_df)
     elif selected_lib == "Plotly":
         st.markdown("### Plotly Style")
-        mapPlotly(merge_df)
+        mapPlotly(merge_df, seoul_geojson)
     else:
         pass
@@ -0,0 +1,37 @@
+# -*- coding:utf-8 -*-
+# 점 개수에 따라 그리는 방법을 바꾸는 산점도
+# max_points 이하면 seaborn 으로 점을 그대로 그리고, 넘으면 NumPy 로 2차원 히스토그램을 만들어 밀도 격자 한 장으로 그린다.
+# 격자는 축 범위 / 배율이 점과 같으므로 회귀선, 상관계수 같은 덧그림은 그대로 쓸 수 있다.
+import numpy as np
+import seaborn as sns
+from matplotlib.colors import LogNorm
+
+from config import SCATTER_MAX_POINTS, SCATTER_BINS
+from tracing import span
+
+
+def binned(x, y, bins=SCATTER_BINS):
+    # 유효한 점만 bins x bins 격자로 센다. 빈 칸은 NaN 으로 두어 배경이 보이게 한다.
+    keep = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[keep], y[keep], bins=bins)
+    counts[counts == 0] = np.nan
+    return counts, x_edges, y_edges
+
+
+def adaptive_scatter(ax, data, x, y, max_points=SCATTER_MAX_POINTS, bins=SCATTER_BINS, fontproperties=None):
+    # 묶어서 그렸으면 묶인 점 개수를, 점을 그대로 그렸으면 0 을 돌려준다.
+    if len(data) <= max_points:
+        sns.scatterplot(x=x, y=y, data=data, ax=ax)
+        return 0
+    with span('scatter.binned', rows=len(data)):
+        counts, x_edges, y_edges = binned(data[x].to_numpy('float64'), data[y].to_numpy('float64'), bins)
+        mesh = ax.pcolormesh(x_edges, y_edges, counts.T, cmap='viridis', norm=LogNorm(), rasterized=True)
+    colorbar = ax.figure.colorbar(mesh, ax=ax)
+    colorbar.set_label("거래건수", fontproperties=fontproperties)
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    return int(np.nansum(counts))
+
+
+def binned_caption(n_points, bins=SCATTER_BINS):
+    return f"- 점 {n_points:,}개를 {bins} x {bins} 격자로 묶어 밀도(로그 색상)로 표시했다. (점이 {SCATTER_MAX_POINTS:,}개보다 많을 때)"
@@ -3,7 +3,6 @@ import pandas as pd
 import numpy as np
 
 import pingouin as pg
-from pingouin import ttest
 
 
 import seaborn as sns
@@ -11,126 +10,214 @@ import matplotlib.pyplot as plt
 import plotly.express as px
 
 import streamlit as st
+import tracing
+from tracing import span
+import corr
+from eda.scatter import adaptive_scatter, binned_caption
+import welch
+from period import month_key, month_label
+from utils import current_period, load_cube, load_query, load_regression, source_signature
 
 # 폰트 적용
-import os
-from matplotlib import font_manager as fm
-fpath = os.path.join(os.getcwd(), "Nanum_Gothic/SCDream9.otf")
-prop = fm.FontProperties(fname=fpath)
+from fonts import font_prop
+prop = font_prop("SCDream9.otf")
 
 
+def monthSummary(months, sgg_nm=None):
+    # 비교하는 두 달의 아파트 가격 요약은 집계 큐브에서 바로 꺼낸다.
+    cube = load_cube()
+    sgg_cd = cube.code(sgg_nm) if sgg_nm is not None else None
+    result = cube.query(['DEAL_YMD'], sgg_cd=sgg_cd, house_type='아파트', months=months, freq='M')
+    result['month'] = month_key(result['DEAL_YMD'])
+    result = result.set_index('month')[['mean', 'std', 'count']].rename(columns={'count': 'size'})
+    return round(result, 1)
+
+CORR_COLS = ['DEAL_YMD', 'OBJ_AMT', 'BLDG_AREA', 'SGG_NM', 'month']
+TTEST_COLS = ['T', 'dof', 'alternative', 'p-val', 'CI95%', 'cohen-d', 'power']  # pingouin.ttest 와 같은 컬럼 (BF10 제외)
+
+@st.cache_data
+def monthTests(signature, dates, months, method):
+    # 25개 자치구 + 서울시 전체 두 달 Welch t-검정을 집계값으로 한 번에 계산해 둔다. (데이터 버전, 기간, 두 달, 보정 방법)마다 한 번
+    return welch.month_tests(load_cube(dates), '아파트', months, method)
+
+@st.cache_data
+def corrTables(signature, dates, method, bootstrap):
+    # 전체 / (자치구, 월) 별 건물면적 ~ 가격, (자치구, 월) 별 일별 거래건수 ~ 평균가격 상관계수를 한 번에 계산해 둔다.
+    corr_df = load_query(dates).select(house_type='아파트', columns=CORR_COLS)
+    overall = corr.corr_table(corr_df, 'BLDG_AREA', 'OBJ_AMT', [], method, bootstrap)
+    by_group = corr.corr_table(corr_df, 'BLDG_AREA', 'OBJ_AMT', ['SGG_NM', 'month'], method, bootstrap)
+    # 일별 평균가격 / 거래건수는 집계 큐브에서 가져온다. (sgg_df.groupby('DEAL_YMD') 와 같은 값)
+    daily = load_cube(dates).query(['SGG_CD', 'DEAL_YMD'], house_type='아파트')
+    daily['month'] = month_key(daily['DEAL_YMD'])
+    daily = daily[['SGG_NM', 'month', 'DEAL_YMD', 'mean', 'count']].rename(columns={'count': 'size'})
+    daily_corr = corr.corr_table(daily, 'size', 'mean', ['SGG_NM', 'month'], method, bootstrap)
+    return overall, by_group, daily, daily_corr
+
+def testConclusion(row, first, second, alpha=0.05):
+    # 한 행의 검정 결과로 결론을 적는다. 어느 한 달이라도 거래가 2건 미만이면 p-value 가 NaN 이라 결론을 내지 않는다.
+    a, b = month_label(first), month_label(second)
+    p = row['p-val'].values[0]
+    n1, n2 = (int(row[f'n{month}'].fillna(0).values[0]) for month in (first, second))  # 거래가 없는 자치구는 행이 NaN
+    if np.isnan(p) or min(n1, n2) < 2:
+        st.warning(f"표본이 부족해 검정할 수 없습니다. ({a} {n1}건, {b} {n2}건)")
+    elif p > alpha:
+        st.markdown(f"- 확인결과 p-value 값이 {p} 이므로 $H_{0}$을 채택하여, {a}과 {b}의 아파트 평균 차이는 없다.")
+    else:
+        st.markdown(f"- 확인결과 p-value 값이 {p} 이므로 $H_{1}$을 채택하여, {a}과 {b}의 아파트 평균 차이는 있다.")
+
 def twoMeans(total_df):
-    total_df['month'] = total_df['DEAL_YMD'].dt.month
-    apt_df = total_df[(total_df['HOUSE_TYPE'] == '아파트') & (total_df['month'].isin([3, 4]))]
+    deals = load_query()
+    # 조회 기간 안에서 비교할 두 달을 고른다. (기본은 기간의 처음 두 달)
+    months = deals.months()
+    if len(months) < 2:
+        st.warning("두 달 이상을 포함하도록 조회 기간을 선택하세요.")
+        return
+    first = st.sidebar.selectbox("비교할 월 1", months, index=0, format_func=month_label)
+    second = st.sidebar.selectbox("비교할 월 2", months, index=1, format_func=month_label)
+    if first == second:
+        st.warning("서로 다른 두 달을 선택하세요.")
+        return
+    a, b = month_label(first), month_label(second)
     st.markdown("### 집계 \n"
-                "- 3월과 4월의 아파트 가격을 비교한다.")
-    ttest_df = round(apt_df.groupby('month')['OBJ_AMT'].agg(["mean", "std", "size"]), 1)
-    st.dataframe(ttest_df, use_container_width=True)
+                f"- {a}과 {b}의 아파트 가격을 비교한다.")
+    ttest_df = monthSummary([first, second])
+    st.dataframe(ttest_df, width='stretch')
 
-    st.markdown("###  서울시 통합 3월 vs 4월 차이 검정\n"
-                "- 3월과 4월의 아파트 평균 가격의 차이를 검정한다. \n"
+    st.markdown(f"###  서울시 통합 {a} vs {b} 차이 검정\n"
+                f"- {a}과 {b}의 아파트 평균 가격의 차이를 검정한다. \n"
                 "- 가설설정 \n"
-                "   + 귀무가설 : $H_{0}$: 3월과 4월의 아파트 평균 차이는 없다. \n"
-                "   + 대립가설 : $H_{1}$: 3월과 4월의 아파트 평균 차이는 있다. \n")
-
-    march_df = apt_df[apt_df['month'] == 3]
-    april_df = apt_df[apt_df['month'] == 4]
-    result = ttest(march_df['OBJ_AMT'], april_df['OBJ_AMT'], paired=False)
-    st.dataframe(result, use_container_width=True)
-    st.markdown(f"- 확인결과 p-value 값이 {result['p-val'].values[0]} 이므로 $H_{0}$을 채택하여, 3월과 4월의 아파트 평균 차이는 없다.")
-
-    selected_sgg_nm = st.sidebar.selectbox("자치구명", sorted(total_df['SGG_NM'].unique()))
-    st.markdown(f"### 서울시 {selected_sgg_nm} 3월 vs 4월 차이 검정\n"
-                "- 자치구를 선택하여 3월과 4월의 아파트 평균 차이가 있는지 확인하도록 한다.")
-
-    sgg_df = apt_df[apt_df['SGG_NM'] == selected_sgg_nm]
-    sgg_march_df = sgg_df[sgg_df['month'] == 3]
-    sgg_april_df = sgg_df[sgg_df['month'] == 4]
-    sgg_result = ttest(sgg_march_df['OBJ_AMT'], sgg_april_df['OBJ_AMT'], paired=False)
-    st.dataframe(sgg_result, use_container_width=True)
-    if sgg_result['p-val'].values[0] > 0.05:
-        st.markdown(f"- 확인결과 p-value 값이 {sgg_result['p-val'].values[0]} 이므로 $H_{0}$을 채택하여, 3월과 4월의 아파트 평균 차이는 없다.")
-    else:
-        st.markdown(f"- 확인결과 p-value 값이 {sgg_result['p-val'].values[0]} 이므로 $H_{1}$을 채택하여, 3월과 4월의 아파트 평균 차이는 있다.")
+                f"   + 귀무가설 : $H_0$: {a}과 {b}의 아파트 평균 차이는 없다. \n"
+                f"   + 대립가설 : $H_1$: {a}과 {b}의 아파트 평균 차이는 있다. \n")
+
+    method = st.sidebar.selectbox("다중비교 보정", list(welch.CORRECTIONS), format_func=lambda x: welch.CORRECTIONS[x])
+    district_df, seoul_df = monthTests(source_signature(), current_period(), (first, second), method)
+    result = seoul_df[TTEST_COLS]
+    st.dataframe(result, width='stretch')
+    testConclusion(seoul_df, first, second)
 
-    st.markdown(f"### 서울시 :blue[{selected_sgg_nm}] 3월 vs 4월 시각화", unsafe_allow_html=True)
-    fig, ax = plt.subplots(figsize=(10, 3))
-    sns.pointplot(x='month', y='OBJ_AMT', data=sgg_df)
-    sns.despine()
-    st.pyplot(fig)
-    st.dataframe(round(sgg_df.groupby('month')['OBJ_AMT'].agg(["mean", "std", "size"]), 1), use_container_width=True)
+    selected_sgg_nm = st.sidebar.selectbox("자치구명", list(deals.sgg_names))
+    st.markdown(f"### 서울시 {selected_sgg_nm} {a} vs {b} 차이 검정\n"
+                f"- 자치구를 선택하여 {a}과 {b}의 아파트 평균 차이가 있는지 확인하도록 한다.")
+
+    # 자치구를 바꾸면 미리 계산된 표에서 해당 행만 꺼낸다.
+    sgg_result = district_df.reindex([selected_sgg_nm])
+    st.dataframe(sgg_result[TTEST_COLS], width='stretch')
+    testConclusion(sgg_result, first, second)
+
+    st.markdown(f"### 서울시 :blue[{selected_sgg_nm}] {a} vs {b} 시각화", unsafe_allow_html=True)
+    sgg_df = deals.select(selected_sgg_nm, '아파트', months=[first, second])
+    with span('stat.twoMeans.figure', rows=len(sgg_df)):
+        fig, ax = plt.subplots(figsize=(10, 3))
+        sns.pointplot(x='month', y='OBJ_AMT', data=sgg_df)
+        sns.despine()
+    tracing.pyplot(fig)
+    st.dataframe(monthSummary([first, second], selected_sgg_nm), width='stretch')
+
+    st.markdown(f"### 자치구별 {a} vs {b} 차이 검정 ({welch.CORRECTIONS[method]})\n"
+                "- 25개 자치구를 한꺼번에 검정하므로 우연히 유의하게 나오는 자치구가 생기지 않도록 p-value 를 보정한다. \n"
+                "- 컬럼 이름을 누르면 정렬할 수 있다.")
+    untested = district_df.index[district_df['p-val'].isna()]
+    if len(untested):
+        st.warning(f"표본이 부족해 검정할 수 없는 자치구 : {', '.join(untested)} (표 아래쪽, p-value 빈칸)")
+    st.dataframe(district_df.sort_values('p-val', na_position='last'), width='stretch',
+                 column_config={'p-val': st.column_config.NumberColumn(format="%.4f"),
+                                'p-corr': st.column_config.NumberColumn(format="%.4f"),
+                                'reject': st.column_config.CheckboxColumn("유의(보정 후)")})
 
 def corrRelation(total_df):
-    total_df['month'] = total_df['DEAL_YMD'].dt.month
-    apt_df = total_df[(total_df['HOUSE_TYPE'] == '아파트') & (total_df['month'].isin([3, 4]))]
+    deals = load_query()
     st.markdown("### 상관관계 분석을 위한 데이터 확인 \n"
                 "- 건물면적과 물건금액의 상관관계를 확인해보도록 한다. \n"
                 "- 먼저 추출된 데이터를 확인한다.")
-    corr_df = apt_df[['DEAL_YMD', 'OBJ_AMT', 'BLDG_AREA', 'SGG_NM', 'month']].reset_index(drop=True)
+    corr_df = deals.select(house_type='아파트', columns=CORR_COLS).reset_index(drop=True)
+    if corr_df.empty:
+        st.warning("조회 기간에 아파트 거래가 없습니다.")
+        return
     st.dataframe(corr_df.head())
 
     st.markdown("### 상관관계 분석 시각화 \n"
                 "- 상관관계 데이터 시각화를 진행한다.  \n")
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.scatterplot(x='BLDG_AREA', y='OBJ_AMT', data=corr_df, ax=ax)
-    st.pyplot(fig)
+    with span('stat.corrRelation.figure', rows=len(corr_df)):
+        fig, ax = plt.subplots(figsize=(10, 6))
+        n_binned = adaptive_scatter(ax, corr_df, 'BLDG_AREA', 'OBJ_AMT', fontproperties=prop)
+    tracing.pyplot(fig)
+    if n_binned:
+        st.markdown(binned_caption(n_binned))
 
     st.markdown("### 상관관계 계수 및 검정 \n"
                 "- 계수를 확인한다. \n")
-    st.dataframe(pg.corr(corr_df['BLDG_AREA'], corr_df['OBJ_AMT']).round(3), use_container_width=True)
+    method = st.sidebar.selectbox("상관계수", list(corr.METHODS), format_func=lambda x: corr.METHODS[x])
+    bootstrap = st.sidebar.checkbox(f"부트스트랩 신뢰구간 ({corr.BOOTSTRAP_SAMPLES}회)")
+    overall, by_group, daily, daily_corr = corrTables(source_signature(), current_period(), method, bootstrap)
+    st.dataframe(overall.round(3), width='stretch')
     st.markdown("- 상관계수는 0.651 이며 건물면적이 증가할 때 마다, 물건금액도 같이 증가하는 경향성을 나타나는 것을 확인하라 수 있다. \n"
                 "그렇다면, 각 자치구별로 상관관계 시각화 및 상관계수는 어떻게 다른지 확인해본다. \n")
     selected_sgg_nm = st.sidebar.selectbox("자치구명", sorted(corr_df['SGG_NM'].unique()))
-    selected_month = st.sidebar.selectbox("월", sorted(corr_df['month'].unique()))
-    st.markdown(f"### 서울시 {selected_sgg_nm} {selected_month}월 아파트 가격 ~ 건물면적 상관관계 분석\n"
+    selected_month = st.sidebar.selectbox("월", sorted(corr_df['month'].unique()), format_func=month_label)
+    st.markdown(f"### 서울시 {selected_sgg_nm} {month_label(selected_month)} 아파트 가격 ~ 건물면적 상관관계 분석\n"
                 "- 각 자치구 및 월별 시각화 및 상관계수를 표시할 수 있다.")
-    sgg_df = corr_df[(corr_df['SGG_NM'] == selected_sgg_nm) & (corr_df['month'] == selected_month)]
-    corr_coef = pg.corr(sgg_df['BLDG_AREA'], sgg_df['OBJ_AMT'])
-    st.dataframe(corr_coef, use_container_width=True)
+    sgg_df = deals.select(selected_sgg_nm, '아파트', months=[selected_month], columns=CORR_COLS)
+    # 자치구 / 월을 바꾸면 미리 계산된 표에서 해당 행만 꺼낸다.
+    corr_coef = by_group.reindex([(selected_sgg_nm, selected_month)])
+    st.dataframe(corr_coef, width='stretch')
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.scatterplot(x='BLDG_AREA', y='OBJ_AMT', data=sgg_df)
-    ax.text(0.95, 0.05, f'Pearson Correlation: {corr_coef["r"].values[0]:.2f}',
-               transform=ax.transAxes, ha='right', fontsize=12)
-    ax.set_title(f'{selected_sgg_nm} 피어슨 상관계수', fontproperties=prop)
-    st.pyplot(fig)
+    with span('stat.corrRelation.figure', rows=len(sgg_df)):
+        fig, ax = plt.subplots(figsize=(10, 6))
+        n_binned = adaptive_scatter(ax, sgg_df, 'BLDG_AREA', 'OBJ_AMT', fontproperties=prop)
+        ax.text(0.95, 0.05, f'{method.capitalize()} Correlation: {corr_coef["r"].values[0]:.2f}',
+                   transform=ax.transAxes, ha='right', fontsize=12)
+        ax.set_title(f'{selected_sgg_nm} {corr.METHODS[method]} 상관계수', fontproperties=prop)
+    tracing.pyplot(fig)
+    if n_binned:
+        st.markdown(binned_caption(n_binned))
 
     st.markdown("### 거래건수 및 아파트 가격 상관관계")
-    mean_size = sgg_df.groupby('DEAL_YMD')['OBJ_AMT'].agg(["mean", "size"])
-    corr_coef_df = pg.corr(mean_size['size'], mean_size['mean'])
-    st.dataframe(corr_coef_df, use_container_width=True)
-
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.scatterplot(x='size', y='mean', data=mean_size)
-    ax.text(0.95, 0.05, f'Pearson Correlation: {corr_coef_df["r"].values[0]:.2f}',
-            transform=ax.transAxes, ha='right', fontsize=12, fontproperties=prop)
-    ax.set_title(f'{selected_sgg_nm} 상관관계',  fontproperties=prop)
-    ax.set_xlabel("거래건수",  fontproperties=prop)
-    ax.set_ylabel("아파트 평균 가격",  fontproperties=prop)
-    st.pyplot(fig)
+    mean_size = daily[(daily['SGG_NM'] == selected_sgg_nm) & (daily['month'] == selected_month)]
+    corr_coef_df = daily_corr.reindex([(selected_sgg_nm, selected_month)])
+    st.dataframe(corr_coef_df, width='stretch')
+
+    with span('stat.corrRelation.figure', rows=len(mean_size)):
+        fig, ax = plt.subplots(figsize=(10, 6))
+        sns.scatterplot(x='size', y='mean', data=mean_size)
+        ax.text(0.95, 0.05, f'{method.capitalize()} Correlation: {corr_coef_df["r"].values[0]:.2f}',
+                transform=ax.transAxes, ha='right', fontsize=12, fontproperties=prop)
+        ax.set_title(f'{selected_sgg_nm} 상관관계',  fontproperties=prop)
+        ax.set_xlabel("거래건수",  fontproperties=prop)
+        ax.set_ylabel("아파트 평균 가격",  fontproperties=prop)
+    tracing.pyplot(fig)
+
+    st.markdown(f"### 자치구 / 월별 {corr.METHODS[method]} 상관계수 전체\n"
+                "- 건물면적 ~ 아파트 가격 상관계수를 모든 자치구와 월에 대해 비교한다. 컬럼 이름을 누르면 정렬할 수 있다.")
+    st.dataframe(by_group, width='stretch')
 
 def regRession(total_df):
-    total_df['month'] = total_df['DEAL_YMD'].dt.month
-    apt_df = total_df[(total_df['HOUSE_TYPE'] == '아파트') & (total_df['month'].isin([3, 4]))]
-    corr_df = apt_df[['DEAL_YMD', 'OBJ_AMT', 'BLDG_AREA', 'SGG_NM', 'month']].reset_index(drop=True)
-    selected_sgg_nm = st.sidebar.selectbox("자치구명", sorted(corr_df['SGG_NM'].unique()))
-    selected_month = st.sidebar.selectbox("월", sorted(corr_df['month'].unique()))
-    reg_df = corr_df[(corr_df['SGG_NM'] == selected_sgg_nm) & (corr_df['month'] == selected_month)]
+    deals = load_query()
+    selected_sgg_nm = st.sidebar.selectbox("자치구명", list(deals.sgg_names))
+    selected_month = st.sidebar.selectbox("월", deals.months(), format_func=month_label)
+    house_types = list(deals.house_types)
+    selected_house = st.sidebar.selectbox("가구 유형", house_types, index=house_types.index('아파트'))
+    reg_df = deals.select(selected_sgg_nm, selected_house, months=[selected_month], columns=CORR_COLS).reset_index(drop=True)
     st.markdown("### 데이터 확인")
-    st.dataframe(reg_df, use_container_width=True)
+    st.dataframe(reg_df, width='stretch')
 
     # 회귀식
     st.markdown("###  건물면적과 아파트가격 회귀분석 \n"
                 "- 통계의 가정들이 맞는지 확인해보도록 한다. \n"
                 "#### 정규성 검정\n"
                 "- 먼저 시각적으로 확인한다. 잔차의 정규성을 검정한다.")
-    mod1 = pg.linear_regression(reg_df['BLDG_AREA'], reg_df['OBJ_AMT'])
-    res = mod1.residuals_
-    res = pd.DataFrame(res, columns=['Residuals'])
-    fig = px.histogram(res, x = 'Residuals')
-    st.plotly_chart(fig)
+    # 계수는 모든 그룹을 미리 풀어 둔 충분통계량에서 꺼내고, 잔차는 화면에 보이는 그룹의 행으로만 계산한다.
+    model = load_regression()
+    key = (selected_sgg_nm, selected_month, selected_house)
+    if key not in model.sums.index or model.sums.loc[key, 'n'] < 3:
+        st.warning(f"{selected_sgg_nm} {month_label(selected_month)} {selected_house} 거래가 3건 미만이라 회귀분석을 할 수 없습니다.")
+        return
+    mod1 = model.summary(key)
+    res = pd.DataFrame(model.residuals(key, reg_df), columns=['Residuals'])
+    with span('stat.regRession.figure', rows=len(res)):
+        fig = px.histogram(res, x = 'Residuals')
+    tracing.plotly_chart(fig)
     sw = pg.normality(res, method="shapiro")
-    st.dataframe(sw, use_container_width=True)
+    st.dataframe(sw, width='stretch')
     st.markdown("- 자치구명을 변경하면 통계적으로 유의하게 나온 것도 있고, 그렇지 않은 곳도 있다. \n"
                 "- 만약, p-value가 0.05보다 매우 작으면, 잔차의 정규성은 위반되었기 때문에, 여기에서는 통상적인 회귀의 결괏값을 해석할 필요가 없다. \n"
                 "- 이런 경우, 극단적인 이상치를 제거해야 하는 과정이 필요하다. (이 부분에 대한 자세한 설명은 생략한다)")
@@ -138,31 +225,33 @@ def regRession(total_df):
     st.markdown("#### 회귀모형 확인 \n"
                 "- 결정계수 $R^2$와 p-value를 확인한다.")
 
-    st.dataframe(mod1.round(2), use_container_width=True)
+    st.dataframe(mod1.round(2), width='stretch')
     intercept, slope = mod1['coef'].values[0], mod1['coef'].values[1]
     st.write("상수: ", intercept, "기울기 :", slope)
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    x = np.linspace(0, reg_df['BLDG_AREA'].max())
+    with span('stat.regRession.figure', rows=len(reg_df)):
+        fig, ax = plt.subplots(figsize=(10, 6))
+        x = np.linspace(0, reg_df['BLDG_AREA'].max())
 
-    sns.scatterplot(data=reg_df, x='BLDG_AREA', y='OBJ_AMT', ax=ax)
-    ax.set_title("The best-fitting regression line", fontproperties=prop)
-    ax.set_xlabel("건물면적", fontproperties=prop)
-    ax.set_ylabel("아파트거래가격(만원)", fontproperties=prop)
-    ax.plot(x, slope * x + intercept)
+        n_binned = adaptive_scatter(ax, reg_df, 'BLDG_AREA', 'OBJ_AMT', fontproperties=prop)
+        ax.set_title("The best-fitting regression line", fontproperties=prop)
+        ax.set_xlabel("건물면적", fontproperties=prop)
+        ax.set_ylabel("아파트거래가격(만원)", fontproperties=prop)
+        ax.plot(x, slope * x + intercept, color='tab:red' if n_binned else None)  # 밀도 격자 위에서도 보이도록
 
-    if intercept < 0:
-        equation_line = f'$Y={slope:.1f}X{intercept:.1f}, R^2={np.round(mod1["adj_r2"].values[0], 3)}$'
-    else:
-        equation_line = f'$Y={slope:.1f}X+{intercept:.1f}, R^2={np.round(mod1["adj_r2"].values[0], 3)}$'
+        if intercept < 0:
+            equation_line = f'$Y={slope:.1f}X{intercept:.1f}, R^2={np.round(mod1["adj_r2"].values[0], 3)}$'
+        else:
+            equation_line = f'$Y={slope:.1f}X+{intercept:.1f}, R^2={np.round(mod1["adj_r2"].values[0], 3)}$'
 
-    ax.text(0.95, 0.05, equation_line,
-               transform=ax.transAxes, ha='right', fontsize=12, fontproperties=prop)
-    st.pyplot(fig)
+        ax.text(0.95, 0.05, equation_line,
+                   transform=ax.transAxes, ha='right', fontsize=12, fontproperties=prop)
+    tracing.pyplot(fig)
+    if n_binned:
+        st.markdown(binned_caption(n_binned))
 
 
 def showStat(total_df):
-    total_df['DEAL_YMD'] = pd.to_datetime(total_df['DEAL_YMD'], format="%Y-%m-%d")
     selected = st.sidebar.selectbox("분석 메뉴", ['두 집단간 차이 검정', '상관분석', '회귀분석'])
     if selected == '두 집단간 차이 검정':
         st.markdown("### 두 집단간 차이 검정 이론 설명 \n"
@@ -1,145 +1,108 @@
 # -*- coding:utf-8 -*-
 import streamlit as st
+import numpy as np
 import pandas as pd
 from plotly.subplots import make_subplots
 import plotly.express as px
+import plotly.graph_objects as go
+import tracing
+from config import TREND_FIGURE_CACHE_SIZE
+from tracing import span
+from period import month_label
+from utils import current_period, load_cube, load_query, source_signature
+
+HOUSE_TYPES = ['아파트', '단독다가구', '오피스텔', '연립다세대']  # 2 x 2 subplot 순서
+TREND_METRICS = {
+    # metric : (큐브 컬럼, y 축 이름, 그래프 제목, y 축 0 부터)
+    'mean': ('mean', "물건가격(만원)", '가구별 평균값 추세 그래프', False),
+    'count': ('count', "건수", '가구별 거래건수 추세 그래프', True),
+}
+
+@st.cache_data(max_entries=TREND_FIGURE_CACHE_SIZE)
+def trendFigure(signature, sgg_nm, start, end, metric):
+    # (자치구, 기간, 지표)마다 한 번만 그래프를 만들고 직렬화한 JSON 을 캐시한다.
+    # 큐브 결과를 일자 x 주거형태로 한 번 pivot 하고, 주거형태마다 go.Scatter 를 NumPy 배열로 바로 만든다.
+    column, y_title, title, from_zero = TREND_METRICS[metric]
+    cube = load_cube((start, end))
+    result = cube.query(['DEAL_YMD', 'HOUSE_TYPE'], sgg_cd=cube.code(sgg_nm), start=start, end=end)
+    with span(f'viz.trendFigure.{metric}', rows=len(result)):
+        table = result.pivot(index='DEAL_YMD', columns='HOUSE_TYPE', values=column)
+        table = table.reindex(columns=HOUSE_TYPES)
+        dates = table.index.to_numpy()
+        values = table.to_numpy('float64')
+
+        fig = make_subplots(rows=2,
+                            cols=2,
+                            shared_xaxes=True,
+                            subplot_titles=HOUSE_TYPES,
+                            horizontal_spacing=0.15)
+        for i, house_type in enumerate(HOUSE_TYPES):
+            y = values[:, i]
+            has_deal = ~np.isnan(y)  # 거래가 없던 날은 빼고 잇는다.
+            fig.add_trace(go.Scatter(x=dates[has_deal], y=y[has_deal], mode='lines+markers', name=house_type,
+                                     showlegend=False),
+                          row=i // 2 + 1, col=i % 2 + 1)
+        fig.update_yaxes(tickformat=".0f",
+                         title_text=y_title,
+                         range=[0 if from_zero else np.nanmin(values), np.nanmax(values)] if values.size else None)
+        fig.update_layout(
+            title=title,
+            width=800,
+            height=600,
+            showlegend=True,
+            template='plotly_white'
+        )
+        return fig.to_json()
 
 def meanChart(total_df, sgg_nm):
     st.markdown("## 가구별 평균 가격 추세 \n")
-    filtered_df = total_df[total_df['SGG_NM'] == sgg_nm]
-    filtered_df = filtered_df[filtered_df['DEAL_YMD'].between("2023-03-01", "2023-04-30")]
-    result = filtered_df.groupby(['DEAL_YMD', 'HOUSE_TYPE'])['OBJ_AMT'].agg('mean').reset_index()
-
-    df1 = result[result['HOUSE_TYPE'] == '아파트']  # 아파트
-    df2 = result[result['HOUSE_TYPE'] == '단독다가구']  # 단독다가구
-    df3 = result[result['HOUSE_TYPE'] == '오피스텔']  # 오피스텔
-    df4 = result[result['HOUSE_TYPE'] == '연립다세대']  # 연립다세대
-
-    # Create subplots with 2 rows and 2 columns
-    fig = make_subplots(rows=2,
-                        cols=2,
-                        shared_xaxes=True,
-                        subplot_titles=('아파트', '단독다가구', '오피스텔', '연립다세대'),
-                        horizontal_spacing=0.15)
-
-    # Add line graphs to the subplots
-    fig.add_trace(px.line(df1,
-                          x='DEAL_YMD',
-                          y='OBJ_AMT',
-                          title="아파트 실거래가", markers=True).data[0], row=1, col=1)
-    fig.add_trace(px.line(df2,
-                          x='DEAL_YMD',
-                          y='OBJ_AMT',
-                          title="단독다가구 실거래가", markers=True).data[0], row=1, col=2)
-    fig.add_trace(px.line(df3,
-                          x='DEAL_YMD',
-                          y='OBJ_AMT',
-                          title="오피스텔 실거래가", markers=True).data[0], row=2, col=1)
-    fig.add_trace(px.line(df4,
-                          x='DEAL_YMD',
-                          y='OBJ_AMT',
-                          title="연립다세대 실거래가", markers=True).data[0], row=2, col=2)
-    fig.update_yaxes(tickformat=".0f",
-                     title_text="물건가격(만원)",
-                     range=[result['OBJ_AMT'].min(), result['OBJ_AMT'].max()])
-    fig.update_layout(
-        title='가구별 평균값 추세 그래프',
-
-        width=800,
-        height=600,
-        showlegend=True,
-        template='plotly_white'
-    )
-
-    # Display the figure
-    st.plotly_chart(fig)
+    start, end = current_period()
+    tracing.plotly_json(trendFigure(source_signature(), sgg_nm, start, end, 'mean'))
 
 def cntChart(total_df, sgg_nm):
     st.markdown("## 가구별 거래 건수 추세 \n")
-    filtered_df = total_df[total_df['SGG_NM'] == sgg_nm]
-    filtered_df = filtered_df[filtered_df['DEAL_YMD'].between("2023-03-01", "2023-04-30")]
-    result = filtered_df.groupby(['DEAL_YMD', 'HOUSE_TYPE'])['OBJ_AMT'].count().reset_index().rename(columns = {'OBJ_AMT' : '거래건수'})
-
-    df1 = result[result['HOUSE_TYPE'] == '아파트']  # 아파트
-    df2 = result[result['HOUSE_TYPE'] == '단독다가구']  # 단독다가구
-    df3 = result[result['HOUSE_TYPE'] == '오피스텔']  # 오피스텔
-    df4 = result[result['HOUSE_TYPE'] == '연립다세대']  # 연립다세대
-
-    # Create subplots with 2 rows and 2 columns
-    fig = make_subplots(rows=2,
-                        cols=2,
-                        shared_xaxes=True,
-                        subplot_titles=('아파트', '단독다가구', '오피스텔', '연립다세대'),
-                        horizontal_spacing=0.15)
-
-    # Add line graphs to the subplots
-    fig.add_trace(px.line(df1,
-                          x='DEAL_YMD',
-                          y='거래건수',
-                          title="아파트 거래건수", markers=True).data[0], row=1, col=1)
-    fig.add_trace(px.line(df2,
-                          x='DEAL_YMD',
-                          y='거래건수',
-                          title="단독다가구 거래건수", markers=True).data[0], row=1, col=2)
-    fig.add_trace(px.line(df3,
-                          x='DEAL_YMD',
-                          y='거래건수',
-                          title="오피스텔 거래건수", markers=True).data[0], row=2, col=1)
-    fig.add_trace(px.line(df4,
-                          x='DEAL_YMD',
-                          y='거래건수',
-                          title="연립다세대 거래건수", markers=True).data[0], row=2, col=2)
-    fig.update_yaxes(tickformat=".0f",
-                     title_text="건수",
-                     range=[0, result['거래건수'].max()])
-    fig.update_layout(
-        title='가구별 거래건수 추세 그래프',
-        width=800,
-        height=600,
-        showlegend=True,
-        template='plotly_white'
-    )
-
-    # Display the figure
-    st.plotly_chart(fig)
+    start, end = current_period()
+    tracing.plotly_json(trendFigure(source_signature(), sgg_nm, start, end, 'count'))
 
 
 def barChart(total_df):
     st.markdown("### 지역별 평균 가격 막대 그래프")
-    month_selected = st.selectbox("월을 선택하세요.", [3, 4])
-    house_selected = st.selectbox("가구 유형을 선택하세요", total_df['HOUSE_TYPE'].unique())
-    total_df['month'] = total_df['DEAL_YMD'].dt.month
-    result = total_df[(total_df['month'] == month_selected) & (total_df['HOUSE_TYPE'] == house_selected)]
-    bar_df = result.groupby('SGG_NM')['OBJ_AMT'].agg('mean').reset_index()
+    deals = load_query()
+    month_selected = st.selectbox("월을 선택하세요.", deals.months(), format_func=month_label)
+    house_selected = st.selectbox("가구 유형을 선택하세요", list(deals.house_types))
+    cube = load_cube()
+    result = cube.query(['SGG_CD', 'HOUSE_TYPE'], house_type=house_selected, months=[month_selected])
+    bar_df = result[['SGG_NM', 'mean']].rename(columns={'mean': 'OBJ_AMT'})
 
     df_sorted = bar_df.sort_values('OBJ_AMT', ascending=False)
 
-    # Create the bar chart using Plotly Express
-    fig = px.bar(df_sorted, x='SGG_NM', y='OBJ_AMT')
+    with span('viz.barChart.figure'):
+        # Create the bar chart using Plotly Express
+        fig = px.bar(df_sorted, x='SGG_NM', y='OBJ_AMT')
 
-    # Update layout
-    fig.update_yaxes(tickformat=".0f",
-                     title_text="물건가격(만원)",
-                     range=[0, df_sorted['OBJ_AMT'].max()])
-    fig.update_layout(title='Bar Chart - Ascending Order',
-                      xaxis_title='지역구명',
-                      yaxis_title='평균가격(만원)')
-    st.plotly_chart(fig)
+        # Update layout
+        fig.update_yaxes(tickformat=".0f",
+                         title_text="물건가격(만원)",
+                         range=[0, df_sorted['OBJ_AMT'].max()])
+        fig.update_layout(title='Bar Chart - Ascending Order',
+                          xaxis_title='지역구명',
+                          yaxis_title='평균가격(만원)')
+    tracing.plotly_chart(fig)
 
     st.markdown("<hr>", unsafe_allow_html=True)
     st.markdown("### 지역별 거래건수 막대 그래프")
-    cnt_df = result.groupby(['SGG_NM', 'HOUSE_TYPE'])['OBJ_AMT'].count().reset_index().rename(columns = {'OBJ_AMT' : '거래건수'})
+    cnt_df = result[['SGG_NM', 'HOUSE_TYPE', 'count']].rename(columns={'count': '거래건수'})
     cnt_df = cnt_df.sort_values('거래건수', ascending=False)
-    fig = px.bar(cnt_df, x='SGG_NM', y='거래건수')
-    fig.update_layout(title='Bar Chart - Ascending Order',
-                      xaxis_title='지역구명',
-                      yaxis_title='거래건수')
-    st.plotly_chart(fig)
+    with span('viz.barChart.figure'):
+        fig = px.bar(cnt_df, x='SGG_NM', y='거래건수')
+        fig.update_layout(title='Bar Chart - Ascending Order',
+                          xaxis_title='지역구명',
+                          yaxis_title='거래건수')
+    tracing.plotly_chart(fig)
 
 
 def showViz(total_df):
-    total_df['DEAL_YMD'] = pd.to_datetime(total_df['DEAL_YMD'], format="%Y-%m-%d")
-    sgg_nm = st.sidebar.selectbox("자치구명", sorted(total_df['SGG_NM'].unique()))
+    sgg_nm = st.sidebar.selectbox("자치구명", list(load_query().sgg_names))
     selected = st.sidebar.radio("차트 메뉴", ['가구당 평균 가격 추세', '가구당 거래 건수', '지역별 평균 가격 막대 그래프'])
     if selected == "가구당 평균 가격 추세":
         meanChart(total_df, sgg_nm)
@@ -0,0 +1,109 @@
+# -*- coding:utf-8 -*-
+# 그려 둔 matplotlib 그래프의 PNG 바이트 캐시
+# 메모리에는 최근에 쓴 것부터 max_bytes 까지만 두고, 모든 항목은 디스크(cache_dir)에도 써 두어
+# 메모리에서 밀려나거나 프로세스를 다시 띄워도 matplotlib 없이 다시 보낼 수 있다.
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+
+from config import FIGURE_CACHE_MB, FIGURE_CACHE_DIR
+
+SAVEFIG = {'format': 'png', 'dpi': 200, 'bbox_inches': 'tight'}  # st.pyplot 과 같은 저장 옵션
+
+
+def figure_key(*parts):
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def to_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, **SAVEFIG)
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+class FigureCache:
+    def __init__(self, max_bytes=FIGURE_CACHE_MB * 1024 * 1024, cache_dir=FIGURE_CACHE_DIR, max_disk_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes if max_disk_bytes is not None else max_bytes * 8
+        self.cache_dir = cache_dir
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = {'memory': 0, 'disk': 0, 'render': 0}
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def _remember(self, key, data):
+        # 메모리 한도를 넘으면 가장 오래 쓰지 않은 항목부터 뺀다. (디스크에는 남아 있다)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return
+            self._items[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                _, old = self._items.popitem(last=False)
+                self._bytes -= len(old)
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+                self.hits['memory'] += 1
+                return data
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+            os.utime(self._path(key))  # 디스크 정리할 때 최근에 쓴 파일은 남긴다.
+        except OSError:
+            # 읽는 사이에 다른 프로세스가 지웠으면 없는 것으로 본다.
+            return None
+        self.hits['disk'] += 1
+        self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        self._remember(key, data)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        self._prune_disk()
+
+    def _prune_disk(self):
+        # 여러 프로세스가 같은 폴더를 쓰므로, 파일마다 stat 을 한 번만 하고 그 사이에 지워진 파일은 건너뛴다.
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.png'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = 0
+        for _, size, path in sorted(files, reverse=True):
+            total += size
+            if total > self.max_disk_bytes:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def get_or_render(self, key, render):
+        # render() 는 matplotlib Figure 를 돌려주는 함수로, 캐시에 없을 때만 호출한다.
+        data = self.get(key)
+        if data is None:
+            data = to_png(render())
+            self.hits['render'] += 1
+            self.put(key, data)
+        return data
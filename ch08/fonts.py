@@ -0,0 +1,56 @@
+# -*- coding:utf-8 -*-
+# Nanum_Gothic 폴더의 한글 폰트를 프로세스마다 한 번만 matplotlib 에 등록한다.
+# 등록한 결과는 matplotlib 폰트 캐시(fontlist-*.json)에 저장하므로 다음 실행부터는 캐시에서 바로 읽힌다.
+# 실행 : python fonts.py   (배포 전에 폰트 캐시 미리 만들기)
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+import matplotlib as mpl
+from matplotlib import font_manager as fm
+
+from config import FONT_DIR
+
+_lock = threading.Lock()
+_registered = False
+
+
+def font_files(font_dir=FONT_DIR):
+    return sorted(path for path in Path(font_dir).iterdir() if path.suffix.lower() in ('.ttf', '.otf'))
+
+
+def cache_path():
+    return Path(mpl.get_cachedir(), f"fontlist-v{fm.FontManager.__version__}.json")
+
+
+def register(font_dir=FONT_DIR):
+    # 캐시에서 읽은 fontManager 에 이미 들어 있는 폰트는 다시 추가하지 않는다.
+    global _registered
+    with _lock:
+        if _registered:
+            return
+        known = {Path(font.fname).resolve() for font in fm.fontManager.ttflist}
+        missing = [path for path in font_files(font_dir) if path.resolve() not in known]
+        for path in missing:
+            fm.fontManager.addfont(str(path))
+        if missing:
+            fm.json_dump(fm.fontManager, cache_path())
+        _registered = True
+
+
+@lru_cache()
+def font_names():
+    # 폰트 선택 selectbox 용 이름 목록 (정렬, 중복 제거)
+    register()
+    return sorted({font.name for font in fm.fontManager.ttflist})
+
+
+@lru_cache()
+def font_prop(file_name, font_dir=FONT_DIR):
+    # 작업 디렉터리와 상관없이 ch08/Nanum_Gothic 기준으로 폰트 파일을 찾는다.
+    return fm.FontProperties(fname=str(Path(font_dir) / file_name))
+
+
+if __name__ == "__main__":
+    register()
+    print(f"{len(font_names())} fonts, cache : {cache_path()}")
@@ -0,0 +1,114 @@
+# -*- coding:utf-8 -*-
+# 자치구 경계를 미리 가공해 두는 지도 캐시
+# EPSG:5178 원본을 한 번만 읽어 라벨 좌표(중심점)를 구하고, 해상도별로 단순화한 뒤 EPSG:4326 으로 바꿔
+# GeoParquet(geopandas 용) + GeoJSON(plotly 용) 파일로 저장한다.
+# 실행 : python geo.py   (캐시 다시 만들기)
+import argparse
+import json
+import os
+
+import geopandas as gpd
+import shapely
+
+from config import GEO_SRC_PATH, GEO_CACHE_DIR
+
+SRC_CRS = 5178
+# 해상도별 단순화 허용 오차(m). 0 은 원본 그대로
+LEVELS = {'full': 0, 'high': 10, 'medium': 30, 'low': 100}
+LEVEL_NAMES = {'full': '원본', 'high': '상세', 'medium': '보통', 'low': '간략'}
+DEFAULT_LEVEL = 'medium'
+PRECISION = 1e-6  # GeoJSON 좌표는 소수점 6자리(약 0.1m)까지만 남긴다.
+MANIFEST_FILE = '_manifest.json'
+
+
+def source_signature(src_path=GEO_SRC_PATH):
+    stat = os.stat(src_path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def simplify(geometry, tolerance):
+    # 이웃한 자치구가 공유하는 경계선을 같이 줄여서 틈이나 겹침이 생기지 않게 한다.
+    if tolerance == 0:
+        return geometry
+    if hasattr(shapely, 'coverage_simplify'):  # shapely 2.1 이상
+        return shapely.coverage_simplify(geometry, tolerance)
+    return shapely.simplify(geometry, tolerance, preserve_topology=True)
+
+
+def level_paths(level, cache_dir=GEO_CACHE_DIR):
+    return os.path.join(cache_dir, f"seoul_sig_{level}.parquet"), os.path.join(cache_dir, f"seoul_sig_{level}.json")
+
+
+def build(src_path=GEO_SRC_PATH, cache_dir=GEO_CACHE_DIR):
+    seoul = gpd.read_file(src_path).set_crs(epsg=SRC_CRS, allow_override=True)
+    seoul = seoul.rename(columns={"SIG_CD": "SGG_CD"})
+    # 라벨 위치는 해상도와 상관없이 원본 경계의 중심점을 쓴다.
+    center = seoul.geometry.centroid.to_crs(epsg=4326)
+    seoul['lon'], seoul['lat'] = center.x, center.y
+
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = {'source': source_signature(src_path), 'levels': {}}
+    for level, tolerance in LEVELS.items():
+        geometry = gpd.GeoSeries(simplify(seoul.geometry.values, tolerance), crs=SRC_CRS).to_crs(epsg=4326)
+        data = seoul.set_geometry(geometry)
+        parquet_path, json_path = level_paths(level, cache_dir)
+        data.to_parquet(f"{parquet_path}.tmp", index=False)
+        os.replace(f"{parquet_path}.tmp", parquet_path)
+
+        features = data[['SGG_CD', 'SIG_KOR_NM']].set_geometry(shapely.set_precision(geometry.values, PRECISION))
+        payload = features.to_json(drop_id=True, separators=(',', ':'))
+        with open(f"{json_path}.tmp", 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(f"{json_path}.tmp", json_path)
+
+        manifest['levels'][level] = {'tolerance_m': tolerance,
+                                     'vertices': int(shapely.get_num_coordinates(geometry.values).sum()),
+                                     'geojson_bytes': os.path.getsize(json_path)}
+
+    with open(os.path.join(cache_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def load_manifest(cache_dir=GEO_CACHE_DIR):
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def is_fresh(src_path=GEO_SRC_PATH, cache_dir=GEO_CACHE_DIR):
+    manifest = load_manifest(cache_dir)
+    return manifest is not None and manifest['source'] == source_signature(src_path) and \
+        all(os.path.exists(path) for level in LEVELS for path in level_paths(level, cache_dir))
+
+
+def ensure(src_path=GEO_SRC_PATH, cache_dir=GEO_CACHE_DIR):
+    # 캐시가 없거나 원본이 바뀌었으면 다시 만든다.
+    if not is_fresh(src_path, cache_dir):
+        build(src_path, cache_dir)
+
+
+def read_frame(level=DEFAULT_LEVEL, cache_dir=GEO_CACHE_DIR):
+    return gpd.read_parquet(level_paths(level, cache_dir)[0])
+
+
+def read_geojson(level=DEFAULT_LEVEL, cache_dir=GEO_CACHE_DIR):
+    with open(level_paths(level, cache_dir)[1], encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="자치구 경계 지도 캐시 만들기")
+    parser.add_argument('--src', default=str(GEO_SRC_PATH))
+    parser.add_argument('--cache-dir', default=str(GEO_CACHE_DIR))
+    args = parser.parse_args()
+
+    manifest = build(args.src, args.cache_dir)
+    print(f"{'level':<8}{'tolerance(m)':>14}{'vertices':>10}{'geojson(KB)':>13}")
+    for level, info in manifest['levels'].items():
+        print(f"{level:<8}{info['tolerance_m']:>14}{info['vertices']:>10,}{info['geojson_bytes'] / 1024:>13.0f}")
+
+if __name__ == "__main__":
+    main()
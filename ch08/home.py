@@ -1,6 +1,7 @@
 # -*- coding:utf-8 -*-
 import pandas as pd
-from utils import load_data
+from period import month_label
+from utils import load_cube, load_query
 import streamlit as st
 from millify import prettify
 
@@ -10,22 +11,28 @@ def run_home(total_df):
                 "여기에 독자가 넣고 싶은 추가 내용을 더 넣을 수 있습니다. 👇👇👇"
                 )
 
-    total_df['DEAL_YMD'] = pd.to_datetime(total_df['DEAL_YMD'], format="%Y-%m-%d")
-    total_df['month'] = total_df['DEAL_YMD'].dt.month
-    total_df = total_df.loc[total_df['HOUSE_TYPE'] == '아파트', :]
-    sgg_nm = st.sidebar.selectbox("자치구", sorted(total_df['SGG_NM'].unique()))
+    deals = load_query()
+    cube = load_cube()
+    sgg_nm = st.sidebar.selectbox("자치구", list(deals.sgg_names))
 
-    selected_month = st.sidebar.radio("확인하고 싶은 월을 선택하세요 👇", ['3월', '4월'])
-    month_dict = {'3월' : 3, '4월' : 4}
+    months = deals.months()
+    if not months:
+        st.warning("조회 기간에 거래가 없습니다.")
+        return
+    selected_month = st.sidebar.radio("확인하고 싶은 월을 선택하세요 👇", months, format_func=month_label)
     st.markdown("<hr>", unsafe_allow_html=True)
-    st.subheader(f'{sgg_nm} {selected_month} 아파트 가격 개요')
+    st.subheader(f'{sgg_nm} {month_label(selected_month)} 아파트 가격 개요')
     st.markdown("자치구와 월을 클릭하면 자동으로 각 지역구의 거래된 **최소가격**, **최대가격**을 확인할 수 있습니다.")
 
     col1, col2 = st.columns(2)
-    filtered_month = total_df[total_df['month'] == month_dict[selected_month]]
-    filtered_month = filtered_month[filtered_month['SGG_NM'] == sgg_nm]
-    min_price = filtered_month['OBJ_AMT'].min()
-    max_price = filtered_month['OBJ_AMT'].max()
+    filtered_month = deals.select(sgg_nm, '아파트', months=[selected_month])
+    # 최소 / 최대가격은 미리 계산된 집계 큐브에서 가져온다.
+    summary = cube.query(['SGG_CD'], sgg_cd=cube.code(sgg_nm), house_type='아파트', months=[selected_month])
+    if summary.empty:
+        st.warning(f"{sgg_nm} {month_label(selected_month)} 아파트 거래가 없습니다.")
+        return
+    min_price = int(summary['min'].values[0])
+    max_price = int(summary['max'].values[0])
 
     with col1:
         st.metric(label = f"{sgg_nm} 최소가격(만원)", value = prettify(min_price))
@@ -0,0 +1,17 @@
+# -*- coding:utf-8 -*-
+# streamlit_option_menu 는 컴포넌트라서 AppTest 에서 클릭할 수 없다.
+# 테스트 / 벤치마크에서는 st.session_state['_menu_<key>'] 에 메뉴 이름을 넣어 고른다. (bench/bench_pages.py)
+import streamlit as st
+from streamlit_option_menu import option_menu as _option_menu
+
+import tracing
+
+OVERRIDE_PREFIX = '_menu_'
+
+
+def option_menu(menu_title, options, key, **kwargs):
+    selected = st.session_state.get(OVERRIDE_PREFIX + key)
+    if selected not in options:
+        selected = _option_menu(menu_title, options, key=key, **kwargs)
+    tracing.page(selected)
+    return selected
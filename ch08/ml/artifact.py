@@ -0,0 +1,239 @@
+# -*- coding:utf-8 -*-
+# Prophet 모델을 JSON 대신 배열 파일 하나(.bin)로 저장한다.
+# ml/models/강남구_model.json -> ml/models/강남구_model.bin
+# 파일 구조 : MAGIC(8) + manifest 길이(8) + manifest JSON + 배열들(64바이트 경계에 맞춰 이어 붙임)
+# manifest 에 배열마다 (dtype, shape, 데이터 영역 안의 offset) 를 적고, 읽을 때는 np.memmap 한 번으로 필요한 부분만 본다.
+# 읽을 때는 파일 크기와 원본 JSON 의 크기 / 수정시각만 비교하고, 데이터 전체의 sha256 비교는 --check 로 따로 한다.
+# .bin 은 저장소에 넣지 않는다. ml/train.py 가 학습할 때 만들고, 없거나 원본과 다르면 처음 읽을 때 JSON 에서 만든다.
+# 실행 : ch08 폴더에서  python -m ml.artifact           (ml/models 아래 JSON 모델을 모두 변환, 배포할 때 미리 만들어 둘 때)
+#                        python -m ml.artifact --check   (변환된 모델의 sha256 확인)
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+from prophet.serialize import SIMPLE_ATTRIBUTES, model_from_json, about
+
+from config import MODEL_DIR
+
+FORMAT_VERSION = 2
+MAGIC = b'PROPHETA'
+ALIGN = 64  # 배열 시작 위치를 맞춰서 memmap 에서 바로 dtype 으로 볼 수 있게 한다.
+
+
+class StaleArtifact(Exception):
+    pass
+
+
+def sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def artifact_path(json_path):
+    return f"{str(json_path)[:-len('.json')]}.bin"
+
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def to_arrays(model):
+    # (배열 이름, 값) 목록. 날짜는 datetime64[ns] 그대로 저장한다.
+    arrays = [(f"params.{key}", np.asarray(value)) for key, value in model.params.items()]
+    arrays += [(f"history.{col}", model.history[col].to_numpy()) for col in model.history.columns]
+    arrays += [('history_dates', model.history_dates.to_numpy()),
+               ('history_dates.index', model.history_dates.index.to_numpy()),
+               ('changepoints_t', np.asarray(model.changepoints_t)),
+               ('train_component_cols', model.train_component_cols.to_numpy())]
+    if model.changepoints is not None:
+        arrays += [('changepoints', model.changepoints.to_numpy()),
+                   ('changepoints.index', model.changepoints.index.to_numpy())]
+    return arrays
+
+
+def to_manifest(model):
+    # 배열이 아닌 작은 값들. 휴일 표는 prophet.serialize 와 같은 JSON 문자열로 둔다.
+    def frame_json(value, **kwargs):
+        return None if value is None else value.to_json(**kwargs)
+
+    return {
+        'format': FORMAT_VERSION,
+        'prophet_version': about['__version__'],
+        'attributes': {attribute: getattr(model, attribute) for attribute in SIMPLE_ATTRIBUTES},
+        'history_columns': list(model.history.columns),
+        'params': list(model.params),
+        'start': model.start.value,
+        't_scale': model.t_scale.value,
+        'train_holiday_names': frame_json(model.train_holiday_names, orient='split'),
+        'holidays': frame_json(model.holidays, orient='table', index=False),
+        'train_component_cols': {'index': list(model.train_component_cols.index),
+                                 'columns': list(model.train_component_cols.columns)},
+        'seasonalities': [list(model.seasonalities), model.seasonalities],
+        'extra_regressors': [list(model.extra_regressors), model.extra_regressors],
+        'fit_kwargs': {},  # 예측에는 쓰이지 않는다.
+    }
+
+
+def save(model, path, source=None):
+    # 임시 파일에 모두 쓴 뒤 이름을 바꿔서, 읽는 쪽이 반쯤 쓰인 파일을 보지 않게 한다.
+    manifest = to_manifest(model)
+    manifest['arrays'] = {}
+    chunks, offset, digest = [], 0, hashlib.sha256()
+    for name, value in to_arrays(model):
+        data = np.ascontiguousarray(value).tobytes()
+        padded = data + b'\0' * (_aligned(len(data)) - len(data))
+        manifest['arrays'][name] = {'dtype': value.dtype.str, 'shape': list(value.shape), 'offset': offset}
+        chunks.append(padded)
+        digest.update(padded)
+        offset += len(padded)
+    manifest['data_size'] = offset
+    manifest['sha256'] = digest.hexdigest()
+    if source is not None:
+        stat = os.stat(source)
+        manifest['source'] = {'file': os.path.basename(source), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                              'sha256': sha256(source)}
+    header = json.dumps(manifest, ensure_ascii=False).encode('utf-8')
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + len(header).to_bytes(8, 'little') + header)
+            f.write(b'\0' * (_aligned(f.tell()) - f.tell()))
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return manifest
+
+
+def convert(json_path):
+    with open(json_path, 'r') as fin:
+        model = model_from_json(json.load(fin))
+    shutil.rmtree(str(json_path)[:-len('.json')], ignore_errors=True)  # 예전 형식(배열마다 .npy 파일인 폴더)
+    return save(model, artifact_path(json_path), json_path)
+
+
+def read_manifest(path):
+    # (manifest, 데이터 영역 시작 위치)
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise StaleArtifact(f"{path} : 배열 파일이 아닙니다.")
+        size = int.from_bytes(f.read(8), 'little')
+        manifest = json.loads(f.read(size).decode('utf-8'))
+    return manifest, _aligned(len(MAGIC) + 8 + size)
+
+
+def source_changed(manifest, source, verify=False):
+    # 크기가 다르면 바뀐 것, 크기 / 수정시각이 같으면 그대로인 것으로 본다.
+    # 수정시각만 다르면(git checkout, 복사) 원본 JSON(작은 파일)만 해시해서 확인한다.
+    info = manifest.get('source', {})
+    stat = os.stat(source)
+    if 'size' in info and info['size'] != stat.st_size:
+        return True
+    if not verify and info.get('size') == stat.st_size and info.get('mtime_ns') == stat.st_mtime_ns:
+        return False
+    return info.get('sha256') != sha256(source)
+
+
+def load(path, source=None, verify=False):
+    # verify=True 면 원본과 데이터 영역 전체의 sha256 을 비교한다. (check() / --check 용, 페이지에서는 쓰지 않는다)
+    manifest, data_start = read_manifest(path)
+    if manifest.get('format') != FORMAT_VERSION:
+        raise StaleArtifact(f"{path} : format {manifest.get('format')}")
+    if source is not None and os.path.exists(source) and source_changed(manifest, source, verify):
+        raise StaleArtifact(f"{path} : 원본 {source} 이 변환 이후 바뀌었습니다.")
+    if os.path.getsize(path) != data_start + manifest['data_size']:
+        raise StaleArtifact(f"{path} : 크기 불일치")
+    data = np.memmap(path, dtype=np.uint8, mode='r', offset=data_start, shape=(manifest['data_size'],))
+    if verify and hashlib.sha256(data).hexdigest() != manifest['sha256']:
+        raise StaleArtifact(f"{path} : checksum 불일치")
+
+    def array(name):
+        info = manifest['arrays'][name]
+        dtype = np.dtype(info['dtype'])
+        count = int(np.prod(info['shape']))
+        return data[info['offset']:info['offset'] + count * dtype.itemsize].view(dtype).reshape(info['shape'])
+
+    # prophet.serialize.model_from_dict 와 같은 순서로 속성을 채운다.
+    model = Prophet()
+    for attribute in SIMPLE_ATTRIBUTES:
+        setattr(model, attribute, manifest['attributes'][attribute])
+    model.changepoints = pd.Series(array('changepoints'), index=array('changepoints.index'), name='ds') \
+        if 'changepoints' in manifest['arrays'] else None
+    model.history_dates = pd.Series(array('history_dates'), index=array('history_dates.index'), name='ds')
+    model.train_holiday_names = None if manifest['train_holiday_names'] is None else \
+        pd.read_json(StringIO(manifest['train_holiday_names']), typ='series', orient='split')
+    model.start = pd.Timestamp(manifest['start'])
+    model.t_scale = pd.Timedelta(manifest['t_scale'])
+    model.holidays = None if manifest['holidays'] is None else \
+        pd.read_json(StringIO(manifest['holidays']), typ='frame', orient='table', convert_dates=['ds'])
+    model.history = pd.DataFrame({col: array(f"history.{col}") for col in manifest['history_columns']})
+    model.train_component_cols = pd.DataFrame(
+        np.array(array('train_component_cols')),
+        index=pd.Index(manifest['train_component_cols']['index'], name='col'),
+        columns=pd.Index(manifest['train_component_cols']['columns'], name='component'))
+    model.changepoints_t = array('changepoints_t')
+    for attribute in ['seasonalities', 'extra_regressors']:
+        keys, values = manifest[attribute]
+        setattr(model, attribute, OrderedDict((key, values[key]) for key in keys))
+    model.fit_kwargs = manifest['fit_kwargs']
+    model.params = {key: array(f"params.{key}") for key in manifest['params']}
+    model.stan_backend = None
+    model.stan_fit = None
+    return model
+
+
+def load_model(json_path):
+    # 변환된 파일이 있고 원본과 맞으면 배열에서 읽는다. 없거나 원본이 바뀌었으면 JSON 에서 읽고 변환해 둔다.
+    path = artifact_path(json_path)
+    if os.path.exists(path):
+        try:
+            return load(path, json_path)
+        except (StaleArtifact, OSError, KeyError, ValueError):
+            pass
+    with open(json_path, 'r') as fin:
+        model = model_from_json(json.load(fin))
+    try:
+        save(model, path, json_path)
+    except OSError:
+        pass  # 모델 폴더에 쓸 수 없으면 다음에도 JSON 에서 읽는다.
+    return model
+
+
+def check(json_path):
+    # 변환된 모델을 sha256 까지 확인해서 읽어 본다. 문제가 있으면 이유를, 없으면 None 을 돌려준다.
+    try:
+        load(artifact_path(json_path), json_path, verify=True)
+    except (StaleArtifact, OSError, KeyError, ValueError) as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 모델을 배열 형식으로 변환")
+    parser.add_argument('paths', nargs='*', help="변환할 *_model.json (기본값 : ml/models 아래 전체)")
+    parser.add_argument('--check', action='store_true', help="변환하지 않고 sha256 만 확인")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(MODEL_DIR, '**', '*_model.json'), recursive=True))
+    if args.check:
+        failed = [(json_path, error) for json_path in paths for error in [check(json_path)] if error is not None]
+        for json_path, error in failed:
+            print(f"FAIL {json_path} : {error}")
+        print(f"{len(paths) - len(failed)} / {len(paths)} models ok")
+        raise SystemExit(1 if failed else 0)
+    for json_path in paths:
+        convert(json_path)
+    print(f"{len(paths)} models converted")
+
+if __name__ == "__main__":
+    main()
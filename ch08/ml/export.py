@@ -0,0 +1,183 @@
+# -*- coding:utf-8 -*-
+# 예측 결과 내보내기 : 고른 컬럼만 CSV / Parquet / Excel 파일로, 또는 전체 자치구를 ZIP 하나로 묶는다.
+# 파일은 (자치구, 기간, 모델 버전, 예측 모드, 컬럼, 형식) 키로 디스크(config.EXPORT_DIR)에 한 번만 만들고,
+# 만들 때도 EXPORT_CHUNK_ROWS 행씩 바로 파일에 써서 인코딩된 결과 전체를 메모리에 따로 두지 않는다.
+# (Excel 은 openpyxl 의 write_only 통합문서로 행을 임시 파일에 흘려 쓴다)
+# ZIP 은 자치구 파일을 같은 캐시에서 꺼내 하나씩 옮겨 담는다. 캐시 폴더는 여러 프로세스가 같이 쓸 수 있으므로
+# 다른 프로세스가 지운 파일은 없는 것으로 보고 넘어간다.
+import importlib.util
+import io
+import os
+import threading
+import zipfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import EXPORT_CACHE_MB, EXPORT_CHUNK_ROWS, EXPORT_DIR
+from figure_cache import figure_key
+from tracing import span
+
+# 형식 이름 -> (확장자, MIME). Excel 은 openpyxl 이 있을 때만 고를 수 있다.
+FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+DEFAULT_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+EXCEL_SHEET = 'forecast'
+
+
+def available_formats():
+    return [name for name in FORMATS if name != 'Excel' or importlib.util.find_spec('openpyxl') is not None]
+
+
+def export_key(*parts):
+    return figure_key('export', *parts)
+
+
+def _chunks(frame, columns):
+    for first in range(0, len(frame), EXPORT_CHUNK_ROWS):
+        yield frame.iloc[first:first + EXPORT_CHUNK_ROWS][columns]
+
+
+def write_frame(frame, columns, fmt, f):
+    # f : 바이너리 파일 객체. 행을 나눠서 차례로 쓴다.
+    if fmt == 'CSV':
+        text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+        for i, chunk in enumerate(_chunks(frame, columns)):
+            chunk.to_csv(text, index=False, header=i == 0)
+        text.flush()
+        text.detach()
+    elif fmt == 'Parquet':
+        schema = pa.Schema.from_pandas(frame.iloc[:0][columns], preserve_index=False)
+        with pq.ParquetWriter(f, schema) as writer:
+            for chunk in _chunks(frame, columns):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    elif fmt == 'Excel':
+        # to_excel 은 통합문서 전체를 메모리에 만든 뒤 저장하므로, write_only 시트에 행을 바로 덧붙인다.
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(EXCEL_SHEET)
+        sheet.append(list(columns))
+        for chunk in _chunks(frame, columns):
+            for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+                sheet.append(row)
+        workbook.save(f)
+    else:
+        raise ValueError(f"unknown export format : {fmt}")
+
+
+class ExportCache:
+    # 만든 파일은 최근에 쓴 것부터 max_bytes 까지만 디스크에 남긴다.
+    def __init__(self, cache_dir=EXPORT_DIR, max_bytes=EXPORT_CACHE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path(self, key, ext):
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def get(self, key, ext):
+        path = self.path(key, ext)
+        try:
+            os.utime(path)  # 정리할 때 최근에 쓴 파일은 남긴다.
+        except FileNotFoundError:
+            return None
+        return path
+
+    def get_or_write(self, key, ext, write):
+        # write(f) 는 바이너리 파일 객체에 내용을 쓰는 함수로, 캐시에 없을 때만 호출한다.
+        path = self.get(key, ext)
+        if path is not None:
+            return path
+        path = self.path(key, ext)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._prune(keep=path)
+        return path
+
+    def _prune(self, keep):
+        # 파일마다 stat 을 한 번만 하고, 그 사이에 다른 프로세스가 지운 파일은 건너뛴다.
+        with self._lock:
+            files = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+            total = 0
+            for _, size, path in sorted(files, reverse=True):
+                total += size
+                if total > self.max_bytes and path != keep:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+
+def district_key(sgg_nm, periods, signature, mode, columns, fmt):
+    return export_key(sgg_nm, periods, signature, mode, tuple(columns), fmt)
+
+
+def district_file(cache, sgg_nm, periods, signature, mode, columns, fmt, forecast):
+    # forecast() 는 그 자치구의 periods 일 예측 DataFrame 을 돌려주는 함수로, 파일이 없을 때만 부른다.
+    key = district_key(sgg_nm, periods, signature, mode, columns, fmt)
+
+    def write(f):
+        frame = forecast()
+        with span('export.write', rows=len(frame)):
+            write_frame(frame, list(columns), fmt, f)
+    return cache.get_or_write(key, FORMATS[fmt][0], write)
+
+
+def archive_key(sgg_nms, periods, signatures, mode, columns, fmt):
+    return export_key('all', tuple(sgg_nms), periods, tuple(signatures), mode, tuple(columns), fmt)
+
+
+def archive_file(cache, sgg_nms, periods, signatures, mode, columns, fmt, forecast, file_name):
+    # 전체 자치구 ZIP. 자치구 파일을 캐시에서 꺼내고, 없으면 forecast(sgg_nm, signature) -> (예측 DataFrame, 오류) 로
+    # 만들어서 ZIP 에 하나씩 옮겨 담는다. 예측에 실패한 자치구(None)는 errors.txt 에 적는다.
+    # 이미 압축된 형식(Parquet / Excel)은 다시 압축하지 않는다.
+    key = archive_key(sgg_nms, periods, signatures, mode, columns, fmt)
+    ext = FORMATS[fmt][0]
+    compression = zipfile.ZIP_DEFLATED if fmt == 'CSV' else zipfile.ZIP_STORED
+
+    def add(zf, sgg_nm, signature):
+        # 캐시에서 꺼낸 파일이 ZIP 에 담기 전에 지워졌으면 한 번 더 만든다.
+        for _ in range(2):
+            path = cache.get(district_key(sgg_nm, periods, signature, mode, columns, fmt), ext)
+            if path is None:
+                frame, error = forecast(sgg_nm, signature)
+                if frame is None:
+                    return error
+                path = district_file(cache, sgg_nm, periods, signature, mode, columns, fmt, lambda: frame)
+            try:
+                zf.write(path, file_name(sgg_nm))
+                return None
+            except FileNotFoundError:
+                continue
+        return f"{path} : 캐시 파일이 계속 지워집니다."
+
+    def write(f):
+        errors = []
+        with span('export.archive', rows=len(sgg_nms)), zipfile.ZipFile(f, 'w', compression) as zf:
+            for sgg_nm, signature in zip(sgg_nms, signatures):
+                error = add(zf, sgg_nm, signature)
+                if error is not None:
+                    errors.append(f"{sgg_nm} : {error}")
+            if errors:
+                zf.writestr('errors.txt', "\n".join(errors))
+    return cache.get_or_write(key, 'zip', write)
@@ -0,0 +1,99 @@
+# -*- coding:utf-8 -*-
+# 모델마다 최대 예측 기간(30일)으로 한 번만 predict 하고, 더 짧은 기간은 결과를 잘라서 쓴다.
+# kind : 'district'(자치구별) / 'type'(주거형태별), 모델 파일 위치는 ml/registry.py 가 정한다.
+# mode : 'full' / 'reduced' / 'point', 불확실성 구간을 만들 표본 수를 정한다. (config.PREDICT_MODE)
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from config import MODEL_DIR, PREDICT_WORKERS, PREDICT_MODE, PREDICT_SEED
+from ml import artifact, registry
+from ml.modes import mode_samples
+from tracing import span
+
+MAX_PERIODS = 30
+
+_seed_lock = threading.Lock()
+
+
+def model_path(name, model_dir=MODEL_DIR, kind='district'):
+    return registry.model_path(kind, name, model_dir)
+
+
+def model_signature(name, model_dir=MODEL_DIR, kind='district'):
+    # 모델 파일이 바뀌면(재학습, 새 버전) 캐시된 예측을 다시 만든다.
+    path = model_path(name, model_dir, kind)
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return f"{path}-{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def load_model(name, model_dir=MODEL_DIR, kind='district', mode=PREDICT_MODE):
+    # 배열 파일로 변환된 모델(ml/artifact.py)이 있으면 그것을, 없으면 JSON 을 읽고 변환해 둔다.
+    model = artifact.load_model(model_path(name, model_dir, kind))
+    samples = mode_samples(mode)
+    if samples is not None:
+        model.uncertainty_samples = samples  # plot 도 이 값이 0 이면 구간을 그리지 않는다.
+    return model
+
+
+def predict(model, periods=MAX_PERIODS, mode=None, seed=PREDICT_SEED):
+    future = model.make_future_dataframe(periods=periods)
+    with span('prophet.predict', rows=len(future)):
+        if mode != 'reduced':
+            return model.predict(future)
+        # Prophet 은 전역 np.random 으로 표본을 뽑으므로, seed 를 고정하는 동안 다른 스레드와 겹치지 않게 하고 상태를 되돌린다.
+        with _seed_lock:
+            state = np.random.get_state()
+            np.random.seed(seed)
+            try:
+                return model.predict(future)
+            finally:
+                np.random.set_state(state)
+
+
+def horizon(model, forecast, periods):
+    # make_future_dataframe 는 학습 날짜 뒤에 하루씩 붙이므로 앞에서부터 자르면 periods 일 예측과 같다.
+    return forecast.iloc[:len(model.history_dates) + periods]
+
+
+def predict_district(sgg_nm, periods=MAX_PERIODS, model_dir=MODEL_DIR, kind='district', mode=PREDICT_MODE):
+    # 작업 프로세스에서 실행된다. 모델 객체 대신 자치구 이름만 넘겨받아 직접 읽는다.
+    try:
+        return predict(load_model(sgg_nm, model_dir, kind, mode), periods, mode), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def make_pool(max_workers=PREDICT_WORKERS):
+    # Streamlit 은 여러 스레드로 동작하므로 fork 대신 spawn 으로 작업 프로세스를 만든다.
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def predict_all(sgg_nms, periods=MAX_PERIODS, pool=None, model_dir=MODEL_DIR, kind='district', mode=PREDICT_MODE):
+    # 자치구 순서대로 (예측 결과, 오류 메시지) 목록을 돌려준다. 실패한 자치구는 예측 결과가 None 이다.
+    # 작업 프로세스 안의 구간은 기록되지 않으므로 전체를 구간 하나로 잰다.
+    with span('prophet.predict_all', rows=len(sgg_nms)):
+        return _predict_all(sgg_nms, periods, pool, model_dir, kind, mode)
+
+
+def _predict_all(sgg_nms, periods, pool, model_dir, kind, mode):
+    if pool is None:
+        return [predict_district(sgg_nm, periods, model_dir, kind, mode) for sgg_nm in sgg_nms]
+    try:
+        futures = [pool.submit(predict_district, sgg_nm, periods, model_dir, kind, mode) for sgg_nm in sgg_nms]
+    except BrokenProcessPool:
+        return predict_all(sgg_nms, periods, None, model_dir, kind, mode)
+    results = []
+    for sgg_nm, future in zip(sgg_nms, futures):
+        try:
+            results.append(future.result())
+        except BrokenProcessPool:
+            # 작업 프로세스가 죽었으면 그 자치구만 현재 프로세스에서 다시 예측한다.
+            results.append(predict_district(sgg_nm, periods, model_dir, kind, mode))
+    return results
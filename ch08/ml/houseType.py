@@ -2,63 +2,65 @@
 import matplotlib.pyplot as plt
 import streamlit as st
 import pandas as pd
-from prophet import Prophet
 
-# 폰트 적용
-import numpy as np
-import os
-import matplotlib.font_manager as fm  # 폰트 관련 용도 as fm
-
-def unique(lst):
-    x = np.array(lst)
-    return np.unique(x)
+from ml import forecast as fc
+from config import PREDICT_MODE
+import tracing
+from tracing import span
+from utils import load_query
 
-def predict_plot(total_df, types, periods):
+# 폰트 적용
+from fonts import font_names
+
+@st.cache_resource
+def load_models(types, signatures, mode):
+    models = []
+    for house_type in types:
+        try:
+            models.append(fc.load_model(house_type, kind='type', mode=mode))
+        except Exception:
+            models.append(None)
+    return models
+
+@st.cache_resource
+def load_forecasts(types, signatures, mode):
+    # 주거형태별 모델은 python -m ml.train 으로 미리 학습해 둔 것을 읽어서 최대 기간(30일)으로 한 번만 예측한다.
+    return fc.predict_all(types, fc.MAX_PERIODS, kind='type', mode=mode)
+
+def predict_plot(types, periods):
+    signatures = tuple(fc.model_signature(house_type, kind='type') for house_type in types)
+    models = load_models(types, signatures, PREDICT_MODE)
+    results = load_forecasts(types, signatures, PREDICT_MODE)
     fig, ax = plt.subplots(figsize=(10, 6), sharex=True, ncols=2, nrows=2)
     for i in range(0, len(types)):
-        model = Prophet()
-        total_df2 = total_df.loc[total_df['HOUSE_TYPE'] == types[i], ["DEAL_YMD", "OBJ_AMT"]]
-        result_df = total_df2.groupby('DEAL_YMD')['OBJ_AMT'].agg("mean").reset_index()
-        result_df = result_df.rename(columns={"DEAL_YMD": "ds", "OBJ_AMT": "y"})
-        model.fit(result_df)
-        future = model.make_future_dataframe(periods=periods)
-        forecast = model.predict(future)
-        if i <= 1:
-            fig = model.plot(forecast, uncertainty=True, ax=ax[0, i])
-            ax[0, i].set_title(f"서울시 {types[i]} 평균가격 예측 시나리오 {periods}일간")
-            ax[0, i].set_xlabel(f"날짜")
-            ax[0, i].set_ylabel(f"평균가격(만원)")
-            for tick in ax[0, i].get_xticklabels():
-                tick.set_rotation(30)
-        else:
-            fig = model.plot(forecast, uncertainty=True, ax=ax[1, i-2])
-            ax[1, i-2].set_title(f"서울시 {types[i]} 평균가격 예측 시나리오 {periods}일간")
-            ax[1, i-2].set_xlabel(f"날짜")
-            ax[1, i-2].set_ylabel(f"평균가격(만원)")
-            for tick in ax[1, i-2].get_xticklabels():
-                tick.set_rotation(30)
+        axis = ax[i // 2, i % 2]
+        forecast, error = results[i]
+        if error is not None:
+            st.warning(f"{types[i]} 모델을 읽지 못했습니다. python -m ml.train 으로 모델을 학습하세요. ({error})")
+            axis.set_title(f"서울시 {types[i]} 예측 실패")
+            continue
+        models[i].plot(fc.horizon(models[i], forecast, periods), uncertainty=True, ax=axis)
+        axis.set_title(f"서울시 {types[i]} 평균가격 예측 시나리오 {periods}일간")
+        axis.set_xlabel(f"날짜")
+        axis.set_ylabel(f"평균가격(만원)")
+        for tick in axis.get_xticklabels():
+            tick.set_rotation(30)
     return fig
 
 def predictType(total_df):
 
-    total_df['DEAL_YMD'] = pd.to_datetime(total_df['DEAL_YMD'], format="%Y-%m-%d")
-    types = list(total_df['HOUSE_TYPE'].unique())
-    periods = int(st.number_input("향후 예측 기간을 지정하세요(1일 ~ 30일)", min_value=1, max_value=30, step=1))
-
-    font_dirs = [os.getcwd() + '/Nanum_Gothic']
-    font_files = fm.findSystemFonts(fontpaths=font_dirs)
-
-    for font_file in font_files:
-        fm.fontManager.addfont(font_file)
-    fm._load_fontmanager(try_read_cache=False)
+    # 예측 모델은 전체 기간으로 학습하므로 조회 기간과 상관없이 모든 주거형태를 보여준다.
+    types = tuple(str(house_type) for house_type in load_query().house_types)
+    periods = int(st.number_input("향후 예측 기간을 지정하세요(1일 ~ 30일)", min_value=1, max_value=fc.MAX_PERIODS, step=1))
 
-    fontNames = [f.name for f in fm.fontManager.ttflist]
-    fontname = st.selectbox("폰트 선택", unique(fontNames))
+    # 폰트 등록은 프로세스마다 한 번만 하고, 목록은 메모리에 있는 것을 쓴다.
+    fontname = st.selectbox("폰트 선택", font_names())
 
     plt.rc('font', family=fontname)
 
-    fig = predict_plot(total_df, types, periods)
-    st.pyplot(fig)
+    with span('houseType.figure', rows=len(types)):
+        fig = predict_plot(types, periods)
+    tracing.pyplot(fig)
     st.markdown("<hr>", unsafe_allow_html=True)
 
 
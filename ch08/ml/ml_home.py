@@ -1,11 +1,9 @@
 # -*- coding:utf-8 -*-
 import streamlit as st
 import pandas as pd
-from streamlit_option_menu import option_menu
+from menu import option_menu
 
-from ml.houseType import predictType
-from ml.sgg_nm import predictDistrict
-from ml.report import reportMain
+from ml.modes import mode_label
 
 def home():
     st.markdown("### 머신러닝 예측 개요 \n"
@@ -16,7 +14,6 @@ def home():
                 "   + 출처 : https://facebook.github.io/prophet/docs/quick_start.html")
 
 def run_ml(total_df):
-    total_df['DEAL_YMD'] = pd.to_datetime(total_df['DEAL_YMD'], format="%Y-%m-%d")
     st.markdown("## 머신러닝 예측 개요 \n"
                 "머신러닝 예측 페이지입니다."
                 "여기에 독자가 넣고 싶은 추가 내용을 더 넣을 수 있습니다. 👇👇👇"
@@ -31,16 +28,23 @@ def run_ml(total_df):
                                     "nav-link": {"font-size": "18px", "text-align": "left", "margin": "0px",
                                                  "--hover-color": "#eee"},
                                     "nav-link-selected": {"background-color": "green"},
-                                }
+                                },
+                                key='ml_menu'
                             )
+    # 예측 모드는 config.PREDICT_MODE (환경변수 SEOUL_PREDICT_MODE) 로 정한다.
+    st.sidebar.info(f"예측 모드 - {mode_label()}")
 
+    # 예측 페이지 모듈(prophet)은 선택했을 때만 import 한다.
     if selected == 'Home':
         home()
     elif selected == '주거형태별':
+        from ml.houseType import predictType
         predictType(total_df)
     elif selected == '자치구역별':
+        from ml.sgg_nm import predictDistrict
         predictDistrict(total_df)
     elif selected == '보고서':
+        from ml.report import reportMain
         reportMain(total_df)
     else:
         st.warning("Wrong")
\ No newline at end of file
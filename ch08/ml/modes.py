@@ -0,0 +1,18 @@
+# -*- coding:utf-8 -*-
+# 예측 모드 설정 (prophet 을 import 하지 않으므로 메뉴 화면에서도 가볍게 쓸 수 있다.)
+from config import PREDICT_MODE, PREDICT_SAMPLES, PREDICT_SEED
+
+MODES = ['full', 'reduced', 'point']
+
+
+def mode_samples(mode=PREDICT_MODE, samples=PREDICT_SAMPLES):
+    # None 이면 모델에 저장된 값(Prophet 기본값 1000)을 그대로 쓴다.
+    if mode not in MODES:
+        raise ValueError(f"알 수 없는 예측 모드 : {mode} ({', '.join(MODES)})")
+    return {'full': None, 'reduced': samples, 'point': 0}[mode]
+
+
+def mode_label(mode=PREDICT_MODE, samples=PREDICT_SAMPLES, seed=PREDICT_SEED):
+    return {'full': "full : 불확실성 표본 1000개 (Prophet 기본값)",
+            'reduced': f"reduced : 불확실성 표본 {samples}개, seed {seed}",
+            'point': "point : 점 예측만 (불확실성 구간 없음)"}[mode]
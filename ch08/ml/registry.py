@@ -0,0 +1,98 @@
+# -*- coding:utf-8 -*-
+# ml/train.py 가 만든 모델 버전을 관리한다.
+# ml/models/releases/{버전}/{type|district}/{이름}_model.json + metadata.json, 현재 버전은 ml/models/LATEST 에 적는다.
+# 새 버전에서 학습하지 않았거나 학습에 실패한 모델은 직전 버전의 파일을 그대로 가져온다. (carry_forward)
+# 학습된 버전이 하나도 없거나 어느 버전에도 없는 자치구 모델은 예전 위치(ml/models/{자치구}_model.json)에서 읽는다.
+import glob
+import json
+import os
+import shutil
+
+from config import MODEL_DIR
+
+LATEST_FILE = 'LATEST'
+RELEASE_DIR = 'releases'
+METADATA_FILE = 'metadata.json'
+KINDS = ['type', 'district']  # 주거형태별 / 자치구별 모델
+
+
+def release_dir(version, model_dir=MODEL_DIR):
+    return os.path.join(model_dir, RELEASE_DIR, version)
+
+
+def latest(model_dir=MODEL_DIR):
+    path = os.path.join(model_dir, LATEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return f.read().strip() or None
+
+
+def model_path(kind, name, model_dir=MODEL_DIR):
+    version = latest(model_dir)
+    if version is not None:
+        path = os.path.join(release_dir(version, model_dir), kind, f"{name}_model.json")
+        if os.path.exists(path):
+            return path
+    return os.path.join(model_dir, f"{name}_model.json")
+
+
+def load_metadata(version=None, model_dir=MODEL_DIR):
+    version = version or latest(model_dir)
+    if version is None:
+        return None
+    with open(os.path.join(release_dir(version, model_dir), METADATA_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_model(version, kind, name, model_json, model_dir=MODEL_DIR):
+    path = os.path.join(release_dir(version, model_dir), kind)
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, f"{name}_model.json"), 'w') as fout:
+        json.dump(model_json, fout)  # Save model (기존 파일과 같은 형식)
+    return os.path.join(path, f"{name}_model.json")
+
+
+def _link(src, dst):
+    # 같은 파일 시스템이면 하드 링크(수정시각도 같아서 ml/artifact.py 가 그대로 쓴다), 아니면 복사한다.
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def carry_forward(version, model_dir=MODEL_DIR):
+    # 직전 버전(LATEST)에 있고 새 버전에는 없는 모델을 새 버전으로 가져온다.
+    # {kind: {이름: 처음 학습한 버전}} 을 돌려주고, publish 할 metadata 의 'carried' 에 적는다.
+    previous = latest(model_dir)
+    if previous is None or previous == version:
+        return {}
+    previous_carried = (load_metadata(previous, model_dir) or {}).get('carried', {})
+    carried = {}
+    for kind in KINDS:
+        src_dir = os.path.join(release_dir(previous, model_dir), kind)
+        dst_dir = os.path.join(release_dir(version, model_dir), kind)
+        for src in sorted(glob.glob(os.path.join(src_dir, '*_model.json'))):
+            name = os.path.basename(src)[:-len('_model.json')]
+            if os.path.exists(os.path.join(dst_dir, os.path.basename(src))):
+                continue
+            os.makedirs(dst_dir, exist_ok=True)
+            # 모델 JSON 과 변환된 배열 파일(같은 이름으로 시작)을 함께 가져온다.
+            for path in glob.glob(os.path.join(src_dir, f"{glob.escape(name)}_model*")):
+                target = os.path.join(dst_dir, os.path.basename(path))
+                if os.path.isdir(path):
+                    shutil.copytree(path, target, copy_function=_link)
+                else:
+                    _link(path, target)
+            carried.setdefault(kind, {})[name] = previous_carried.get(kind, {}).get(name, previous)
+    return carried
+
+
+def publish(version, metadata, model_dir=MODEL_DIR):
+    # 모델 파일을 모두 쓴 다음에 metadata 와 LATEST 를 바꿔서, 페이지가 반쯤 쓰인 버전을 읽지 않게 한다.
+    with open(os.path.join(release_dir(version, model_dir), METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    path = os.path.join(model_dir, LATEST_FILE)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(f"{path}.tmp", path)
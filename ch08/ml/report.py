@@ -3,43 +3,106 @@ import matplotlib.pyplot as plt
 import streamlit as st
 import pandas as pd
 from prophet import Prophet
-import json
-from prophet.serialize import model_from_json
 from prophet.plot import plot_plotly
-@st.cache_data
-def convert_df(df):
-   return df.to_csv(index=False).encode('utf-8')
+
+from ml import export, forecast as fc
+from config import PREDICT_MODE
+import tracing
+from tracing import span
+from utils import load_query
+
+@st.cache_resource
+def _load_forecast(sgg_nm, signature, mode):
+    # 자치구마다 모델을 한 번만 읽고 최대 기간(30일)으로 예측해 둔다.
+    model = fc.load_model(sgg_nm, mode=mode)
+    return model, fc.predict(model, fc.MAX_PERIODS, mode)
+
+
+def load_forecast(sgg_nm, periods, signature, mode=PREDICT_MODE):
+    model, forecast = _load_forecast(sgg_nm, signature, mode)
+    return model, fc.horizon(model, forecast, periods)
+
+
+@st.cache_resource
+def get_export_cache():
+    return export.ExportCache()
+
+
+def archive_forecast(sgg_nms, signatures, periods, mode):
+    # 전체 자치구 ZIP 용 forecast(sgg_nm, signature). 자치구역별 화면과 같은 load_forecasts(공유 프로세스 풀로
+    # 30일 예측, 모든 세션이 같이 쓰는 캐시)를 캐시에 없는 자치구 파일이 처음 나올 때 한 번만 부르고, 기간만큼 잘라 쓴다.
+    from ml.sgg_nm import load_forecasts
+
+    results = {}
+
+    def forecast(sgg_nm, signature):
+        if not results:
+            results.update(zip(sgg_nms, load_forecasts(tuple(sgg_nms), tuple(signatures), mode)))
+        frame, error = results[sgg_nm]
+        if frame is None:
+            return None, error
+        return frame.iloc[:len(frame) - fc.MAX_PERIODS + periods], None  # fc.horizon 과 같다.
+    return forecast
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def export_sidebar(sgg_nm, periods, signature, forecast):
+    # 고른 컬럼 / 형식의 파일은 (자치구, 기간, 모델 버전, 예측 모드) 별로 한 번만 만든다.
+    cache = get_export_cache()
+    chosen = st.sidebar.multiselect("내보낼 컬럼", list(forecast.columns),
+                                    default=[col for col in export.DEFAULT_COLUMNS if col in forecast.columns])
+    fmt = st.sidebar.radio("파일 형식", export.available_formats(), horizontal=True)
+    if not chosen:
+        st.sidebar.warning("내보낼 컬럼을 하나 이상 고르세요.")
+        return
+    columns = [col for col in forecast.columns if col in chosen]  # 예측 결과의 컬럼 순서로 쓴다.
+    ext, mime = export.FORMATS[fmt]
+    file_name = lambda name: f"{name}_아파트 평균값 예측 {periods}일간.{ext}"
+
+    # 파일은 rerun 마다 읽지 않고 버튼을 눌렀을 때 캐시에서 꺼내(없으면 만들어서) 읽는다.
+    district_file = lambda: export.district_file(cache, sgg_nm, periods, signature, PREDICT_MODE, columns, fmt,
+                                                 lambda: forecast)
+    st.sidebar.download_button(f"결과 다운로드({fmt})", lambda: read_file(district_file()), file_name(sgg_nm), mime,
+                               key='download-district')
+
+    # 전체 자치구 ZIP 은 오래 걸리므로 버튼을 눌렀을 때만 만들고, 만든 뒤에는 같은 조건이면 바로 내려받는다.
+    sgg_nms = sorted(load_query().sgg_names)
+    signatures = tuple(fc.model_signature(name) for name in sgg_nms)
+    zip_path = cache.get(export.archive_key(sgg_nms, periods, signatures, PREDICT_MODE, columns, fmt), 'zip')
+    if zip_path is None and st.sidebar.button("전체 자치구 파일 만들기"):
+        with st.spinner("전체 자치구 예측 파일을 만드는 중입니다."):
+            zip_path = export.archive_file(cache, sgg_nms, periods, signatures, PREDICT_MODE, columns, fmt,
+                                           archive_forecast(sgg_nms, signatures, periods, PREDICT_MODE), file_name)
+    if zip_path is not None:
+        st.sidebar.download_button(f"전체 자치구 다운로드(ZIP, {fmt})", lambda: read_file(zip_path),
+                                   f"서울시 자치구 아파트 평균값 예측 {periods}일간_{ext}.zip", "application/zip",
+                                   key='download-all')
+
 
 def reportMain(total_df):
-    sgg_nm = st.sidebar.selectbox("자치구", sorted(total_df['SGG_NM'].unique()))
-    periods = int(st.sidebar.number_input("향후 예측 기간을 지정하세요(1일 ~ 30일)", min_value=1, max_value=30, step=1))
-
-    with open(f'ml/models/{sgg_nm}_model.json', 'r') as fin:
-        model = model_from_json(json.load(fin))
-    future = model.make_future_dataframe(periods=periods)
-    forecast = model.predict(future)
-
-    output = convert_df(forecast)
-    st.sidebar.download_button(
-        "결과 다운로드(CSV)",
-        output,
-        f"{sgg_nm}_아파트 평균값 예측 {periods}일간.csv",
-        "text/csv",
-        key='download-csv'
-    )
-
-
-    fig = plot_plotly(model, forecast)
-    fig.update_layout(
-        title=dict(text=f"{sgg_nm} 아파트 평균값 예측 {periods}일간",
-                   font=dict(size=20),
-                   automargin=True,
-                   yref='paper'),
-        xaxis_title="날짜",
-        yaxis_title="아파트 평균값(만원)",
-        autosize=False,
-        width=700,
-        height=800,
-    )
-    fig.update_yaxes(tickformat='000')
-    st.plotly_chart(fig)
+    sgg_nm = st.sidebar.selectbox("자치구", sorted(load_query().sgg_names))
+    periods = int(st.sidebar.number_input("향후 예측 기간을 지정하세요(1일 ~ 30일)", min_value=1, max_value=fc.MAX_PERIODS, step=1))
+
+    signature = fc.model_signature(sgg_nm)
+    model, forecast = load_forecast(sgg_nm, periods, signature)
+    export_sidebar(sgg_nm, periods, signature, forecast)
+
+    with span('report.figure', rows=len(forecast)):
+        fig = plot_plotly(model, forecast)
+        fig.update_layout(
+            title=dict(text=f"{sgg_nm} 아파트 평균값 예측 {periods}일간",
+                       font=dict(size=20),
+                       automargin=True,
+                       yref='paper'),
+            xaxis_title="날짜",
+            yaxis_title="아파트 평균값(만원)",
+            autosize=False,
+            width=700,
+            height=800,
+        )
+        fig.update_yaxes(tickformat='000')
+    tracing.plotly_chart(fig)
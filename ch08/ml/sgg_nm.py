@@ -2,82 +2,78 @@
 import matplotlib.pyplot as plt
 import streamlit as st
 import pandas as pd
-import json
-from prophet.serialize import model_from_json
+
+from ml import forecast as fc
+from config import PREDICT_WORKERS, PREDICT_MODE
+from figure_cache import FigureCache, figure_key
+from tracing import span
+from utils import load_query
 
 # plt.rcParams['font.family'] = "Malgun Gothic"
 # 폰트 적용
-import os
-from matplotlib import font_manager as fm
-fpath = os.path.join(os.getcwd(), "Nanum_Gothic/SCDream9.otf")
-prop = fm.FontProperties(fname=fpath)
+from fonts import font_prop
+prop = font_prop("SCDream9.otf")
 
 @st.cache_resource
-def load_models(sgg_nms):
-    models = []
-    for sgg_nm in sgg_nms:
-        print(sgg_nm)
-        with open(f'ml/models/{sgg_nm}_model.json', 'r') as fin:
-            model = model_from_json(json.load(fin))  # Load model
-        models.append(model)
-    models
-    return models
+def load_model(sgg_nm, signature, mode):
+    # 자치구 모델은 그래프를 새로 그려야 할 때 필요한 것만 하나씩 읽는다.
+    return fc.load_model(sgg_nm, mode=mode)  # Load model
 
-def predictDistrict(total_df):
+@st.cache_resource
+def get_pool(max_workers):
+    # 작업 프로세스는 한 번 띄워서 모든 세션이 같이 쓴다.
+    return fc.make_pool(max_workers)
+
+@st.cache_resource
+def load_forecasts(sgg_nms, signatures, mode):
+    # 25개 자치구를 최대 기간(30일)으로 한 번만 예측하고, 모델 파일이 바뀌면 다시 예측한다.
+    pool = get_pool(PREDICT_WORKERS) if PREDICT_WORKERS > 1 else None
+    return fc.predict_all(sgg_nms, fc.MAX_PERIODS, pool, mode=mode)
+
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
 
-    total_df['DEAL_YMD'] = pd.to_datetime(total_df['DEAL_YMD'], format="%Y-%m-%d")
-    sgg_nms = sorted(list(total_df['SGG_NM'].unique()))
-    periods = int(st.number_input("향후 예측 기간을 지정하세요(1일 ~ 30일)", min_value=1, max_value=30, step=1))
+def district_figure(sgg_nms, signatures, results, periods):
+    with span('sgg_nm.figure', rows=len(sgg_nms)):
+        return _district_figure(sgg_nms, signatures, results, periods)
 
-    models = load_models(sgg_nms)
+def _district_figure(sgg_nms, signatures, results, periods):
     fig, ax = plt.subplots(figsize=(20, 10), sharex=True, sharey=False, ncols=5, nrows=5)
     for i in range(0, len(sgg_nms)):
-        future = models[i].make_future_dataframe(periods=periods)
-        forecast = models[i].predict(future)
-        print(sgg_nms[i])
-        if i <= 4:
+        axis = ax[i // 5, i % 5]
+        forecast, error = results[i]
+        if error is not None:
+            # 한 자치구의 모델이 잘못되어도 나머지 그래프는 그린다.
+            axis.set_title(f"서울시 {sgg_nms[i]} 예측 실패", fontproperties=prop)
+            continue
+        model = load_model(sgg_nms[i], signatures[i], PREDICT_MODE)
+        model.plot(fc.horizon(model, forecast, periods), uncertainty=True, ax=axis)
+        axis.set_title(f"서울시 {sgg_nms[i]} 평균가격 예측 시나리오 {periods}일간", fontproperties=prop)
+        axis.set_xlabel(f"날짜", fontproperties=prop)
+        axis.set_ylabel(f"평균가격(만원)", fontproperties=prop)
+        for tick in axis.get_xticklabels():
+            tick.set_rotation(30)
 
-            fig = models[i].plot(forecast, uncertainty=True, ax=ax[0, i])
-            ax[0, i].set_title(f"서울시 {sgg_nms[i]} 평균가격 예측 시나리오 {periods}일간", fontproperties=prop)
-            ax[0, i].set_xlabel(f"날짜", fontproperties=prop)
-            ax[0, i].set_ylabel(f"평균가격(만원)", fontproperties=prop)
-            for tick in ax[0, i].get_xticklabels():
-                tick.set_rotation(30)
-        elif i <= 9:
-
-            fig = models[i].plot(forecast, uncertainty=True, ax=ax[1, i - 5])
-            ax[1, i - 5].set_title(f"서울시 {sgg_nms[i]} 평균가격 예측 시나리오 {periods}일간", fontproperties=prop)
-            ax[1, i - 5].set_xlabel(f"날짜", fontproperties=prop)
-            ax[1, i - 5].set_ylabel(f"평균가격(만원)", fontproperties=prop)
-            for tick in ax[1, i - 5].get_xticklabels():
-                tick.set_rotation(30)
-        elif i <= 14:
+    fig.tight_layout()
+    fig.subplots_adjust(top=0.95)
+    return fig
 
-            fig = models[i].plot(forecast, uncertainty=True, ax=ax[2, i - 10])
-            ax[2, i - 10].set_title(f"서울시 {sgg_nms[i]} 평균가격 예측 시나리오 {periods}일간", fontproperties=prop)
-            ax[2, i - 10].set_xlabel(f"날짜", fontproperties=prop)
-            ax[2, i - 10].set_ylabel(f"평균가격(만원)", fontproperties=prop)
-            for tick in ax[2, i - 10].get_xticklabels():
-                tick.set_rotation(30)
-        elif i <= 19:
+def predictDistrict(total_df):
 
-            fig = models[i].plot(forecast, uncertainty=True, ax=ax[3, i - 15])
-            ax[3, i - 15].set_title(f"서울시 {sgg_nms[i]} 평균가격 예측 시나리오 {periods}일간", fontproperties=prop)
-            ax[3, i - 15].set_xlabel(f"날짜", fontproperties=prop)
-            ax[3, i - 15].set_ylabel(f"평균가격(만원)", fontproperties=prop)
-            for tick in ax[3, i - 15].get_xticklabels():
-                tick.set_rotation(30)
-        elif i <= 24:
+    # 예측 모델은 전체 기간으로 학습하므로 조회 기간과 상관없이 모든 자치구를 보여준다.
+    sgg_nms = sorted(list(load_query().sgg_names))
+    periods = int(st.number_input("향후 예측 기간을 지정하세요(1일 ~ 30일)", min_value=1, max_value=fc.MAX_PERIODS, step=1))
 
-            fig = models[i].plot(forecast, uncertainty=True, ax=ax[4, i - 20])
-            ax[4, i - 20].set_title(f"서울시 {sgg_nms[i]} 평균가격 예측 시나리오 {periods}일간", fontproperties=prop)
-            ax[4, i - 20].set_xlabel(f"날짜", fontproperties=prop)
-            ax[4, i - 20].set_ylabel(f"평균가격(만원)", fontproperties=prop)
-            for tick in ax[4, i - 20].get_xticklabels():
-                tick.set_rotation(30)
-        else:
-            pass
+    signatures = tuple(fc.model_signature(sgg_nm) for sgg_nm in sgg_nms)
+    results = load_forecasts(tuple(sgg_nms), signatures, PREDICT_MODE)
+    for sgg_nm, (_, error) in zip(sgg_nms, results):
+        if error is not None:
+            st.warning(f"{sgg_nm} 예측 실패 : {error}")
 
-    fig.tight_layout()
-    fig.subplots_adjust(top=0.95)
-    st.pyplot(fig)
+    # 그래프는 (기간, 모델 버전, 예측 모드, 폰트) 가 같으면 한 번 그려 둔 PNG 를 그대로 보낸다.
+    key = figure_key('district', periods, signatures, PREDICT_MODE, prop.get_file(), tuple(plt.rcParams['font.family']))
+    png = get_figure_cache().get_or_render(key, lambda: district_figure(sgg_nms, signatures, results, periods))
+    with span('st.image', rows=len(sgg_nms)) as s:
+        st.image(png, width='stretch')
+        s.bytes = len(png)
@@ -0,0 +1,117 @@
+# -*- coding:utf-8 -*-
+# 주거형태별 / 자치구별 Prophet 모델을 현재 데이터로 미리 학습해 새 버전으로 저장한다.
+# 페이지에서는 학습하지 않고 여기서 만든 모델을 읽어서 예측만 한다. (JSON + ml/artifact.py 배열 형식)
+# 실행 : ch08 폴더에서  python -m ml.train                  (전체)
+#                        python -m ml.train --kind type --workers 4
+import argparse
+import hashlib
+import logging
+import time
+from datetime import datetime
+
+import pandas as pd
+from prophet import Prophet
+from prophet.serialize import model_to_json
+
+import utils
+from config import PREDICT_WORKERS
+from cube import Cube
+from ml import forecast as fc
+from ml import artifact, registry
+
+TRAIN_COLS = ['SGG_NM', 'HOUSE_TYPE', 'DEAL_YMD', 'OBJ_AMT']
+DISTRICT_HOUSE_TYPE = '아파트'  # 자치구별 모델은 아파트 일별 평균가격으로 학습한다.
+
+
+def data_hash(data):
+    hashed = pd.util.hash_pandas_object(data[TRAIN_COLS], index=False)
+    return hashlib.sha256(hashed.to_numpy().tobytes()).hexdigest()
+
+
+def training_sets(data, kinds):
+    # (kind, 이름, ds / y 데이터) 목록. 일별 평균가격은 집계 큐브에서 꺼낸다.
+    cube = Cube.build(data)
+    sets = []
+    if 'type' in kinds:
+        for house_type in data['HOUSE_TYPE'].unique():
+            sets.append(('type', str(house_type), cube.query(['DEAL_YMD'], house_type=house_type)))
+    if 'district' in kinds:
+        for sgg_cd, sgg_nm in cube.names.sort_values().items():
+            sets.append(('district', sgg_nm, cube.query(['DEAL_YMD'], sgg_cd=sgg_cd, house_type=DISTRICT_HOUSE_TYPE)))
+    return [(kind, name, daily[['DEAL_YMD', 'mean']].rename(columns={'DEAL_YMD': 'ds', 'mean': 'y'}))
+            for kind, name, daily in sets]
+
+
+def fit(kind, name, train_df):
+    # 작업 프로세스에서 실행된다. 실패해도 다른 모델 학습은 계속한다.
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    info = {'days': len(train_df), 'first_day': str(train_df['ds'].min().date()),
+            'last_day': str(train_df['ds'].max().date())}
+    start = time.perf_counter()
+    try:
+        model = Prophet()
+        model.fit(train_df)
+        info['fit_seconds'] = round(time.perf_counter() - start, 3)
+        return kind, name, model_to_json(model), info
+    except Exception as e:
+        info['error'] = f"{type(e).__name__}: {e}"
+        return kind, name, None, info
+
+
+def train(kinds=registry.KINDS, workers=PREDICT_WORKERS):
+    start = time.perf_counter()
+    signature = utils.source_signature()
+    data = utils.read_snapshot(signature)
+    digest = data_hash(data)
+    version = f"{datetime.now():%Y%m%d-%H%M%S}-{digest[:8]}"
+    sets = training_sets(data, kinds)
+    print(f"version {version} : {len(data):,} rows, {len(sets)} models, {workers} workers")
+
+    if workers > 1:
+        with fc.make_pool(workers) as pool:
+            results = list(pool.map(fit, *zip(*sets)))
+    else:
+        results = [fit(*args) for args in sets]
+
+    models = {kind: {} for kind in kinds}
+    for kind, name, model_json, info in results:
+        if model_json is not None:
+            artifact.convert(registry.write_model(version, kind, name, model_json))
+        models[kind][name] = info
+        print(f"  {kind:<9}{name:<8}{info.get('fit_seconds', '-'):>8}  {info.get('error', '')}")
+
+    failed = [name for kind, name, model_json, _ in results if model_json is None]
+    if len(failed) == len(results):
+        raise RuntimeError(f"모든 모델 학습 실패 : {version}")
+    # 이번에 학습하지 않은 kind 와 학습에 실패한 모델은 직전 버전 것을 그대로 쓴다.
+    carried = registry.carry_forward(version)
+    for kind, names in carried.items():
+        print(f"  {kind:<9}carried from previous release : {', '.join(names)}")
+    metadata = {
+        'version': version,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'source_signature': signature,
+        'data_hash': digest,
+        'rows': len(data),
+        'kinds': list(kinds),
+        'workers': workers,
+        'total_seconds': round(time.perf_counter() - start, 3),
+        'failed': failed,
+        'carried': carried,
+        'models': models,
+    }
+    registry.publish(version, metadata)
+    return metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prophet 모델 학습")
+    parser.add_argument('--kind', nargs='+', choices=registry.KINDS, default=registry.KINDS)
+    parser.add_argument('--workers', type=int, default=PREDICT_WORKERS)
+    args = parser.parse_args()
+
+    metadata = train(args.kind, args.workers)
+    print(f"published {metadata['version']} in {metadata['total_seconds']}s, failed : {metadata['failed']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# -*- coding:utf-8 -*-
+# (자치구, 월, 주거형태) 그룹마다 y = a + b x 단순회귀를 충분통계량으로 푸는 객체
+# 그룹마다 n, Σx, Σy, Σxy, Σx², Σy² 만 저장해 두고 계수 / 표준오차 / 결정계수는 식으로 바로 계산한다.
+# 새 거래가 들어오면 update() 로 합계에 더하기만 하면 되므로 전체를 다시 적합할 필요가 없다.
+# 잔차 진단은 화면에 보이는 그룹의 행만 가지고 residuals() 로 필요할 때 계산한다.
+import numpy as np
+import pandas as pd
+
+from tracing import span
+
+KEYS = ['SGG_NM', 'month', 'HOUSE_TYPE']
+SUMS = ['n', 'sx', 'sy', 'sxy', 'sxx', 'syy']
+
+
+class GroupedOLS:
+    def __init__(self, sums, x='BLDG_AREA', y='OBJ_AMT', keys=KEYS):
+        self.sums = sums  # keys 로 정렬된 MultiIndex, 컬럼은 SUMS
+        self.x, self.y, self.keys = x, y, list(keys)
+        self._fit = None
+
+    @classmethod
+    def build(cls, data, x='BLDG_AREA', y='OBJ_AMT', keys=KEYS):
+        empty = pd.DataFrame(columns=SUMS, dtype='float64',
+                             index=pd.MultiIndex.from_tuples([], names=list(keys)))
+        return cls(empty, x, y, keys).update(data)
+
+    def update(self, data):
+        # 새로 들어온 행의 그룹별 합계를 기존 합계에 더한다.
+        with span('ols.update', rows=len(data)):
+            data = data[[*self.keys, self.x, self.y]].dropna(subset=[self.x, self.y])
+            x, y = data[self.x].astype('float64'), data[self.y].astype('float64')
+            grouped = pd.DataFrame({'n': 1.0, 'sx': x, 'sy': y, 'sxy': x * y, 'sxx': x * x, 'syy': y * y})
+            grouped[self.keys] = data[self.keys]
+            added = grouped.groupby(self.keys, observed=True)[SUMS].sum()
+            self.sums = self.sums.add(added, fill_value=0).sort_index() if len(self.sums) else added.sort_index()
+            self._fit = None
+            return self
+
+    def fit(self):
+        # 모든 그룹의 절편 / 기울기 / 표준오차 / 결정계수. update() 전까지는 한 번 계산한 것을 쓴다.
+        if self._fit is not None:
+            return self._fit
+        s = self.sums
+        n = s['n']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mx, my = s['sx'] / n, s['sy'] / n
+            sxx = s['sxx'] - s['sx'] * mx
+            sxy = s['sxy'] - s['sx'] * my
+            syy = s['syy'] - s['sy'] * my
+            slope = sxy / sxx
+            intercept = my - slope * mx
+            dof = n - 2
+            sse = (syy - slope * sxy).clip(lower=0)
+            mse = sse / dof
+            r2 = 1 - sse / syy
+            self._fit = pd.DataFrame({
+                'n': n.astype('int64'), 'intercept': intercept, 'slope': slope,
+                'se_intercept': np.sqrt(mse * (1 / n + mx ** 2 / sxx)), 'se_slope': np.sqrt(mse / sxx),
+                'r2': r2, 'adj_r2': 1 - (1 - r2) * (n - 1) / dof, 'dof': dof,
+            })
+        return self._fit
+
+    def summary(self, key, alpha=0.05):
+        # 그룹 하나의 결과를 pingouin.linear_regression 과 같은 모양(절편 / 기울기 두 줄)으로 돌려준다.
+        # scipy 는 홈 화면 import 에 들어가지 않도록 여기서 읽는다. (utils 가 ols 를 import 한다)
+        from scipy import stats
+
+        row = self.fit().loc[key]
+        coef = np.array([row['intercept'], row['slope']])
+        se = np.array([row['se_intercept'], row['se_slope']])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = coef / se
+            crit = stats.t.ppf(1 - alpha / 2, row['dof'])
+            return pd.DataFrame({'names': ['Intercept', self.x], 'coef': coef, 'se': se, 'T': t,
+                                 'pval': 2 * stats.t.sf(np.abs(t), row['dof']), 'r2': row['r2'],
+                                 'adj_r2': row['adj_r2'], f'CI[{alpha / 2 * 100:.1f}%]': coef - crit * se,
+                                 f'CI[{(1 - alpha / 2) * 100:.1f}%]': coef + crit * se})
+
+    def residuals(self, key, data):
+        # data 는 그 그룹의 행. 다시 적합하지 않고 저장된 계수로 잔차만 계산한다.
+        row = self.fit().loc[key]
+        data = data.dropna(subset=[self.x, self.y])
+        return data[self.y].to_numpy('float64') - (row['intercept'] + row['slope'] * data[self.x].to_numpy('float64'))
@@ -0,0 +1,91 @@
+# -*- coding:utf-8 -*-
+# 서울 열린데이터광장 OpenAPI(tbLnOpendataRtmsV) 흉내를 내는 로컬 테스트 서버
+# 실행 : python openapi_stub.py --port 8088 --scale 30
+#        python data_collection.py --base-url http://127.0.0.1:8088 --output /tmp/seoul.csv
+#        ch07 도 같은 서버를 쓴다 : python ../ch08/openapi_stub.py --csv data/seoul_real_estate.csv
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from config import CSV_PATH
+
+SERVICE = 'tbLnOpendataRtmsV'
+MAX_ROWS = 1000
+
+
+def load_rows(csv_path=CSV_PATH, scale=1):
+    # OpenAPI 는 모든 값을 문자열로, 날짜는 YYYYMMDD 형태로 돌려준다.
+    data = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    data['DEAL_YMD'] = data['DEAL_YMD'].str.replace('-', '')
+    rows = data.to_dict('records')
+    return rows * scale
+
+
+def result(code, message):
+    return {'RESULT': {'CODE': code, 'MESSAGE': message}}
+
+
+def make_handler(rows, latency=0.0, fail_rate=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            # /{KEY}/json/tbLnOpendataRtmsV/{START}/{END}[/{ACC_YEAR}]
+            parts = self.path.strip('/').split('/')
+            time.sleep(latency)
+            if random.random() < fail_rate:
+                self.send_json(result('ERROR-500', '서버 오류입니다.'))
+                return
+            if len(parts) < 5 or parts[2] != SERVICE:
+                self.send_json(result('ERROR-310', '해당하는 서비스를 찾을 수 없습니다.'))
+                return
+            start, end = int(parts[3]), int(parts[4])
+            if end - start + 1 > MAX_ROWS:
+                self.send_json(result('ERROR-336', '데이터요청은 한번에 최대 1000건을 넘을 수 없습니다.'))
+                return
+            selected = rows
+            if len(parts) > 5 and parts[5]:
+                selected = [row for row in rows if row['ACC_YEAR'] == parts[5]]
+            page = selected[start - 1:end]
+            if not page:
+                self.send_json(result('INFO-200', '해당하는 데이터가 없습니다.'))
+                return
+            self.send_json({SERVICE: {'list_total_count': len(selected),
+                                      'RESULT': {'CODE': 'INFO-000', 'MESSAGE': '정상 처리되었습니다'},
+                                      'row': page}})
+
+        def send_json(self, body):
+            payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json;charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def make_server(port=8088, scale=1, latency=0.0, fail_rate=0.0, csv_path=CSV_PATH):
+    return ThreadingHTTPServer(('127.0.0.1', port), make_handler(load_rows(csv_path, scale), latency, fail_rate))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tbLnOpendataRtmsV stub 서버")
+    parser.add_argument('--port', type=int, default=8088)
+    parser.add_argument('--scale', type=int, default=1, help="원본 데이터를 몇 배로 늘릴지")
+    parser.add_argument('--latency', type=float, default=0.0, help="응답 지연(초)")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="ERROR-500 을 돌려줄 확률")
+    parser.add_argument('--csv', default=str(CSV_PATH), help="응답으로 내려줄 CSV 파일")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.scale, args.latency, args.fail_rate, args.csv)
+    print(f"http://127.0.0.1:{args.port}/서비스키/json/{SERVICE}/1/5")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# -*- coding:utf-8 -*-
+# 모든 화면이 같이 쓰는 조회 기간
+# 사이드바에서 고른 [시작일, 종료일] 과 겹치는 계약 연/월 파티션만 읽으므로 메모리와 시간이 기간 길이에 비례한다.
+# 월은 여러 해를 구분할 수 있도록 2023년 3월 -> 202303 처럼 연월 정수(month key)로 나타낸다.
+import pandas as pd
+
+from config import PERIOD_MONTHS
+
+KEY = 'period'  # 사이드바 date_input 의 session_state key
+
+
+def month_key(dates):
+    # Timestamp / DatetimeIndex / Series 모두 받는다.
+    if isinstance(dates, pd.Series):
+        dates = dates.dt
+    return dates.year * 100 + dates.month
+
+
+def month_label(key):
+    return f"{key // 100}년 {key % 100}월"
+
+
+def month_bounds(key):
+    # 그 달의 첫날과 마지막 날
+    start = pd.Timestamp(key // 100, key % 100, 1)
+    return start, start + pd.offsets.MonthEnd(0)
+
+
+def month_keys(start, end):
+    # 기간과 겹치는 달 목록
+    return [p.year * 100 + p.month for p in pd.period_range(start, end, freq='M')]
+
+
+def default_period(first_day, last_day, months=PERIOD_MONTHS):
+    # 마지막 거래일까지 최근 months 개월 (첫 달은 1일부터)
+    start = (last_day.to_period('M') - (months - 1)).to_timestamp()
+    return max(start, first_day), last_day
+
+
+def _normalize(value, first_day, last_day):
+    # date_input 은 끝 날짜를 고르는 중에는 날짜 하나만 돌려준다.
+    if not value:
+        return default_period(first_day, last_day)
+    start, end = pd.Timestamp(value[0]), pd.Timestamp(value[-1])
+    return max(start, first_day), min(end, last_day)
+
+
+def current(first_day, last_day):
+    # 이번 세션에서 고른 기간. 아직 고르지 않았거나 Streamlit 밖에서 부르면 기본 기간
+    import streamlit as st
+
+    return _normalize(st.session_state.get(KEY), first_day, last_day)
+
+
+def select(first_day, last_day):
+    import streamlit as st
+
+    start, end = default_period(first_day, last_day)
+    st.sidebar.date_input("조회 기간", value=(start.date(), end.date()),
+                          min_value=first_day.date(), max_value=last_day.date(), key=KEY)
+    return current(first_day, last_day)
@@ -0,0 +1,78 @@
+# -*- coding:utf-8 -*-
+# (SGG_NM, HOUSE_TYPE, DEAL_YMD) 순서로 정렬된 데이터 위에서 동작하는 조회 객체
+# 자치구 / 주거형태 / 기간 조건을 전체 행을 훑는 마스크 대신 이진 탐색으로 찾은 연속 구간으로 바꾼다.
+import numpy as np
+import pandas as pd
+
+import period
+from tracing import span
+
+SORT_KEYS = ['SGG_NM', 'HOUSE_TYPE', 'DEAL_YMD']
+DAYS = 1 << 20  # 정렬 키 = (자치구, 주거형태) 조합 번호 * DAYS + 1970-01-01 부터의 일수
+
+
+def _codes(categories, values):
+    # 이름(또는 이름 목록)을 범주 코드 배열로 바꾼다. None 이면 전체
+    if values is None:
+        return np.arange(len(categories))
+    values = [values] if np.ndim(values) == 0 else list(values)
+    codes = categories.get_indexer(values)
+    return np.sort(codes[codes >= 0])
+
+
+def _day(value):
+    return pd.Timestamp(value).to_datetime64().astype('datetime64[D]').astype('int64')
+
+
+class DealQuery:
+    def __init__(self, data):
+        # data 는 sort() 로 정렬된 상태여야 한다.
+        self.data = data
+        self.sgg_names = data['SGG_NM'].cat.categories
+        self.house_types = data['HOUSE_TYPE'].cat.categories
+
+        group = data['SGG_NM'].cat.codes.to_numpy().astype('int64') * len(self.house_types) + \
+            data['HOUSE_TYPE'].cat.codes.to_numpy()
+        days = data['DEAL_YMD'].to_numpy().astype('datetime64[D]').astype('int64')
+        self.keys = group * DAYS + days
+        self.first_day, self.last_day = (int(days.min()), int(days.max())) if len(days) else (0, -1)
+
+    @staticmethod
+    def sort(data):
+        return data.sort_values(SORT_KEYS, kind='stable').reset_index(drop=True)
+
+    def months(self):
+        # 데이터에 있는 달(연월 정수) 목록
+        return sorted(self.data['month'].unique().tolist())
+
+    def periods(self, start=None, end=None, months=None):
+        # 기간 조건을 [시작일, 종료일] 구간 목록으로 바꾼다. 월 조건(연월 정수 목록)은 달마다 한 구간씩
+        first = self.first_day if start is None else max(self.first_day, _day(start))
+        last = self.last_day if end is None else min(self.last_day, _day(end))
+        if months is None:
+            return np.array([first]), np.array([last])
+        bounds = [period.month_bounds(key) for key in sorted(months)]
+        lo = np.array([_day(month_start) for month_start, _ in bounds], dtype='int64')
+        hi = np.array([_day(month_end) for _, month_end in bounds], dtype='int64')
+        return np.maximum(lo, first), np.minimum(hi, last)
+
+    def ranges(self, sgg_nm=None, house_type=None, start=None, end=None, months=None):
+        groups = (_codes(self.sgg_names, sgg_nm)[:, None] * len(self.house_types) +
+                  _codes(self.house_types, house_type)).ravel()
+        first, last = self.periods(start, end, months)
+        # (조합, 기간) 마다 시작 / 끝 위치를 한 번의 searchsorted 로 구한다.
+        lo = np.searchsorted(self.keys, (groups[:, None] * DAYS + first).ravel(), 'left')
+        hi = np.searchsorted(self.keys, (groups[:, None] * DAYS + last).ravel(), 'right')
+        keep = hi > lo
+        return lo[keep], hi[keep]
+
+    def select(self, sgg_nm=None, house_type=None, start=None, end=None, months=None, columns=None):
+        with span('query.select') as s:
+            lo, hi = self.ranges(sgg_nm, house_type, start, end, months)
+            s.rows = int((hi - lo).sum())
+            data = self.data if columns is None else self.data[columns]
+            if len(lo) == 1:
+                return data.iloc[lo[0]:hi[0]]  # 구간이 하나면 복사 없이 view 를 돌려준다.
+            lengths = hi - lo
+            rows = np.repeat(lo - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            return data.take(rows)
@@ -0,0 +1,188 @@
+# -*- coding:utf-8 -*-
+# 실거래가 데이터를 계약 연/월(year=YYYY/month=M) 파티션으로 나눠 쌓아두는 증분 저장소
+# 실행 : python store.py --import-csv   (기존 CSV 로 저장소 만들기)
+#        python store.py --info
+import argparse
+import glob
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import CSV_PATH, STORE_DIR
+
+# 같은 거래인지 판단하는 키
+KEY_COLS = ['SGG_CD', 'BJDONG_CD', 'BONBEON', 'BUBEON', 'DEAL_YMD', 'OBJ_AMT', 'FLOOR']
+COLUMNS = ['ACC_YEAR', 'SGG_CD', 'SGG_NM', 'BJDONG_CD', 'BJDONG_NM', 'LAND_GBN', 'LAND_GBN_NM', 'BONBEON',
+           'BUBEON', 'BLDG_NM', 'DEAL_YMD', 'OBJ_AMT', 'BLDG_AREA', 'TOT_AREA', 'FLOOR', 'RIGHT_GBN', 'CNTL_YMD',
+           'BUILD_YEAR', 'HOUSE_TYPE', 'REQ_GBN', 'RDEALER_LAWDNM']
+INT_COLS = ['ACC_YEAR', 'SGG_CD', 'BJDONG_CD', 'OBJ_AMT']
+FLOAT_COLS = ['LAND_GBN', 'BONBEON', 'BUBEON', 'BLDG_AREA', 'TOT_AREA', 'FLOOR', 'CNTL_YMD', 'BUILD_YEAR']
+SCHEMA = pa.schema([(col, pa.int64() if col in INT_COLS else
+                     pa.float64() if col in FLOAT_COLS else
+                     pa.timestamp('ns') if col == 'DEAL_YMD' else pa.string()) for col in COLUMNS])
+
+WATERMARK_FILE = '_watermark.json'  # '_' 로 시작하는 파일은 pyarrow 가 데이터로 읽지 않는다.
+LOOKBACK_DAYS = 30                  # 실거래 신고기한(계약일로부터 30일) 만큼 이전 거래도 다시 확인한다.
+
+
+def normalize(data):
+    # OpenAPI(문자열) / CSV 어느 쪽에서 와도 같은 타입으로 맞춘다.
+    data = data.reindex(columns=COLUMNS).copy()
+    data['DEAL_YMD'] = pd.to_datetime(data['DEAL_YMD'])
+    for col in INT_COLS:
+        data[col] = pd.to_numeric(data[col]).astype('int64')
+    for col in FLOAT_COLS:
+        data[col] = pd.to_numeric(data[col], errors='coerce').astype('float64')
+    for col in SCHEMA.names:
+        if SCHEMA.field(col).type == pa.string():
+            data[col] = data[col].astype(object).where(data[col].notna() & (data[col] != ''), None)
+    return data
+
+
+def row_keys(data, columns=KEY_COLS):
+    # NaN 이 섞인 키도 비교할 수 있도록 해시값으로 바꾼다.
+    return pd.util.hash_pandas_object(data[columns], index=False)
+
+
+def tag_rows(data):
+    # _key : 거래 키, _id : 거래 키 + 해제사유발생일, _n : 같은 값 안에서의 순번
+    data = data.assign(_key=row_keys(data).to_numpy(), _id=row_keys(data, KEY_COLS + ['CNTL_YMD']).to_numpy())
+    data['_n'] = data.groupby('_id').cumcount()
+    return data
+
+
+def partition_dir(store_dir, year, month):
+    return os.path.join(store_dir, f"year={year}", f"month={month}")
+
+
+def read_partition(path, columns=None):
+    return pq.read_table(path, columns=columns, partitioning=None).to_pandas()
+
+
+def write_part(path, data):
+    os.makedirs(path, exist_ok=True)
+    name = f"part-{time.time_ns()}-{os.getpid()}.parquet"
+    table = pa.Table.from_pandas(data[COLUMNS], schema=SCHEMA, preserve_index=False)
+    pq.write_table(table, os.path.join(path, f"_{name}"))
+    os.replace(os.path.join(path, f"_{name}"), os.path.join(path, name))
+
+
+def split_incoming(part, stored):
+    # 키 + CNTL_YMD 가 같은 행이 저장소에 이미 있는 개수만큼은 건너뛴다.
+    part, stored = tag_rows(part), tag_rows(stored)
+    incoming = part[part['_n'] >= part['_id'].map(stored['_id'].value_counts()).fillna(0)]
+
+    # 저장소에 남은 미해제 행이 이번에 받은 미해제 행보다 많으면, 그만큼은 해제 신고가 들어온 것으로 본다.
+    open_stored = stored.loc[stored['CNTL_YMD'].isna(), '_key'].value_counts()
+    open_part = part.loc[part['CNTL_YMD'].isna(), '_key'].value_counts()
+    spare = open_stored.sub(open_part, fill_value=0).clip(lower=0)
+    cancelled = incoming[incoming['CNTL_YMD'].notna()]
+    is_update = cancelled.groupby('_key').cumcount() < cancelled['_key'].map(spare).fillna(0)
+    updates = cancelled[is_update]
+    fresh = incoming.drop(updates.index)
+    return fresh.drop(columns=['_key', '_id', '_n']), updates
+
+
+def apply_cancellations(path, updates):
+    # 이미 저장된 거래에 해제사유발생일(CNTL_YMD)이 새로 생긴 경우 해당 월 파티션만 다시 쓴다.
+    full = read_partition(path)
+    full['_key'] = row_keys(full).to_numpy()
+    open_rows = full[full['CNTL_YMD'].isna()]
+    open_rows = open_rows.assign(_n=open_rows.groupby('_key').cumcount()).reset_index()
+    updates = updates.assign(_n=updates.groupby('_key').cumcount())
+    cntl = open_rows.merge(updates[['_key', '_n', 'CNTL_YMD']], on=['_key', '_n'],
+                           suffixes=('', '_new')).set_index('index')['CNTL_YMD_new']
+    full.loc[cntl.index, 'CNTL_YMD'] = cntl
+    old_parts = glob.glob(os.path.join(path, "part-*.parquet"))
+    write_part(path, full)
+    for old in old_parts:
+        os.remove(old)
+    return len(cntl)
+
+
+def load_watermark(store_dir=STORE_DIR):
+    path = os.path.join(store_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_watermark(watermark, store_dir=STORE_DIR):
+    path = os.path.join(store_dir, WATERMARK_FILE)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(watermark, f, ensure_ascii=False, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def exists(store_dir=STORE_DIR):
+    return store_dir is not None and os.path.exists(os.path.join(store_dir, WATERMARK_FILE))
+
+
+def version(store_dir=STORE_DIR):
+    watermark = load_watermark(store_dir)
+    return f"{watermark['version']}-{watermark['updated_at']}"
+
+
+def append(data, store_dir=STORE_DIR):
+    # 새로 들어온 행이 속한 월 파티션의 키만 읽어서 중복을 거르므로 비용은 새 데이터 양에 비례한다.
+    data = normalize(data)
+    added, updated = 0, 0
+    months = [data['DEAL_YMD'].dt.year, data['DEAL_YMD'].dt.month]
+    for (year, month), part in data.groupby(months):
+        path = partition_dir(store_dir, year, month)
+        if glob.glob(os.path.join(path, "part-*.parquet")):
+            part, updates = split_incoming(part, read_partition(path, columns=KEY_COLS + ['CNTL_YMD']))
+            if len(updates):
+                updated += apply_cancellations(path, updates)
+        if len(part):
+            write_part(path, part)
+            added += len(part)
+
+    watermark = load_watermark(store_dir) or {'DEAL_YMD': None, 'CNTL_YMD': None, 'rows': 0, 'version': 0}
+    if len(data):
+        deal_max = data['DEAL_YMD'].max().strftime("%Y-%m-%d")
+        watermark['DEAL_YMD'] = max(filter(None, [watermark['DEAL_YMD'], deal_max]))
+        cntl_max = data['CNTL_YMD'].max()
+        if pd.notna(cntl_max):
+            watermark['CNTL_YMD'] = int(max(watermark['CNTL_YMD'] or 0, cntl_max))
+    if added or updated or 'updated_at' not in watermark:
+        watermark['rows'] += added
+        watermark['version'] += 1
+        watermark['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        os.makedirs(store_dir, exist_ok=True)
+        save_watermark(watermark, store_dir)
+    return added, updated
+
+
+def read(store_dir=STORE_DIR, columns=None, filters=None):
+    table = pq.read_table(store_dir, columns=columns, filters=filters, partitioning='hive')
+    data = table.to_pandas().drop(columns=['year', 'month'], errors='ignore')
+    # CSV 와 같이 최근 거래가 먼저 오도록 정렬한다.
+    return data.sort_values('DEAL_YMD', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def import_csv(csv_path=CSV_PATH, store_dir=STORE_DIR):
+    return append(pd.read_csv(csv_path), store_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="실거래가 증분 저장소")
+    parser.add_argument('--import-csv', action='store_true', help="CSV 파일을 저장소에 추가")
+    parser.add_argument('--csv', default=str(CSV_PATH))
+    parser.add_argument('--info', action='store_true')
+    args = parser.parse_args()
+
+    if args.import_csv:
+        added, updated = import_csv(args.csv)
+        print(f"added {added}, updated {updated}")
+    if args.info or not args.import_csv:
+        print(json.dumps(load_watermark(), ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# -*- coding:utf-8 -*-
+# 주요 구간(데이터 로드, 집계, 예측, 그래프 생성 / 전송)의 실행 시간 측정
+# SEOUL_TRACE=1 로 실행하면 rerun 마다 구간별 시간 / 행 수 / 전송 바이트를 사이드바에 보여주고
+# config.TRACE_LOG(JSONL) 에 한 줄씩 덧붙인다. 꺼져 있으면 span() 은 아무것도 하지 않는 객체를 돌려준다.
+# 예)  with span('viz.meanChart.figure') as s:
+#          ...
+#          s.rows = len(result)
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from config import TRACE, TRACE_LOG
+
+_local = threading.local()  # Streamlit 은 세션(스크립트 실행)마다 스레드가 따로 돈다.
+_log_lock = threading.Lock()
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    __slots__ = ('name', 'depth', 'rows', 'bytes', 'start', 'ms', '_spans')
+
+    def __init__(self, name, spans, rows=None):
+        self.name = name
+        self.rows = rows
+        self.bytes = None
+        self._spans = spans
+
+    def __enter__(self):
+        self.depth = getattr(_local, 'depth', 0)
+        _local.depth = self.depth + 1
+        self._spans.append(self)  # 시작 순서대로 쌓아서 안쪽 구간이 바깥 구간 아래에 오게 한다.
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.start) * 1000
+        _local.depth = self.depth
+        return False
+
+    def to_dict(self):
+        return {'name': self.name, 'depth': self.depth, 'ms': round(self.ms, 3), 'rows': self.rows, 'bytes': self.bytes}
+
+
+def enabled():
+    return TRACE and getattr(_local, 'spans', None) is not None
+
+
+def span(name, rows=None):
+    # rerun 밖(작업 프로세스, 명령행 스크립트)에서 부르거나 꺼져 있으면 기록하지 않는다.
+    spans = getattr(_local, 'spans', None) if TRACE else None
+    if spans is None:
+        return _NO_SPAN
+    return Span(name, spans, rows)
+
+
+def traced(name):
+    # 함수 전체를 구간 하나로 잰다.
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def begin():
+    # app.py 에서 rerun 을 시작할 때 부른다.
+    if TRACE:
+        _local.spans, _local.depth, _local.start, _local.page = [], 0, time.perf_counter(), []
+
+
+def page(name):
+    # 메뉴에서 고른 화면 이름. 로그에는 '탐색적 자료분석/Map' 처럼 이어 붙여 남긴다.
+    if TRACE and getattr(_local, 'spans', None) is not None:
+        _local.page.append(str(name))
+
+
+def finish():
+    # rerun 이 끝날 때 구간 목록을 로그에 쓰고 사이드바에 보여준다.
+    spans = getattr(_local, 'spans', None)
+    if not TRACE or spans is None:
+        return
+    _local.spans = None
+    record = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'session': _session_id(),
+              'page': "/".join(_local.page),
+              'total_ms': round((time.perf_counter() - _local.start) * 1000, 3),
+              'spans': [s.to_dict() for s in spans if hasattr(s, 'ms')]}
+    write_log(record)
+    show_panel(record)
+
+
+def write_log(record, path=TRACE_LOG):
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _log_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def show_panel(record):
+    import pandas as pd
+    import streamlit as st
+
+    table = pd.DataFrame(record['spans'], columns=['name', 'depth', 'ms', 'rows', 'bytes'])
+    table['name'] = ["　" * depth + name for depth, name in zip(table['depth'], table['name'])]
+    with st.sidebar.expander(f"실행 시간 {record['total_ms']:,.0f} ms", expanded=True):
+        st.dataframe(table.drop(columns='depth'), hide_index=True, width='stretch')
+        st.caption(f"로그 : {TRACE_LOG}")
+
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+# 그래프 전송 : 보내는 바이트 수를 함께 기록한다.
+def plotly_chart(fig, name='st.plotly_chart', **kwargs):
+    import streamlit as st
+
+    with span(name) as s:
+        st.plotly_chart(fig, **kwargs)
+    if enabled():
+        s.bytes = len(fig.to_json())  # 재는 시간에 포함되지 않도록 구간 밖에서 센다.
+
+
+def pyplot(fig, name='st.pyplot'):
+    # st.pyplot 과 같은 옵션으로 PNG 를 만들어 보내고, 다 쓴 그래프는 닫는다.
+    import streamlit as st
+    from figure_cache import to_png
+
+    with span(name) as s:
+        png = to_png(fig)
+        st.image(png, width='stretch')
+        s.bytes = len(png)
+
+
+def plotly_json(spec, name='st.plotly_chart', **kwargs):
+    # 캐시해 둔 fig.to_json() 을 보낸다. 한 번 검증된 그래프이므로 다시 검증하지 않고 Figure 로만 감싼다.
+    import json
+    import plotly.graph_objects as go
+    import streamlit as st
+
+    with span(name) as s:
+        st.plotly_chart(go.Figure(json.loads(spec), skip_invalid=True, _validate=False), **kwargs)
+        s.bytes = len(spec)
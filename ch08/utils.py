@@ -1,8 +1,242 @@
 # -*- coding:utf-8 -*-
+import glob
+import json
+import os
+import shutil
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-@st.cache_data
-def load_data():
-    data = pd.read_csv("data/seoul_real_estate.csv")
-    return data
\ No newline at end of file
+import period
+import store
+from cube import Cube
+from ols import GroupedOLS
+from query import DealQuery
+from config import BACKEND, CSV_PATH, PERIOD_CACHE_SIZE, SNAPSHOT_DIR, STORE_DIR
+from tracing import span
+
+CATEGORY_COLS = ['SGG_NM', 'HOUSE_TYPE', 'BJDONG_NM', 'REQ_GBN']
+SNAPSHOT_META = '_snapshot.json'  # '_' 로 시작하는 파일은 pyarrow 가 데이터로 읽지 않는다.
+
+
+def source_signature(csv_path=CSV_PATH, store_dir=STORE_DIR):
+    # 원본 데이터가 바뀌었는지 확인하는 용도 (증분 저장소 버전 또는 CSV 크기 + 수정시각)
+    if store.exists(store_dir):
+        return f"store-{store.version(store_dir)}"
+    stat = os.stat(csv_path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def downcast(data):
+    for col in data.select_dtypes('integer').columns:
+        data[col] = pd.to_numeric(data[col], downcast='integer')
+    for col in data.select_dtypes('float').columns:
+        # float32 로 줄여도 값이 그대로일 때만 변환한다. (예: CNTL_YMD 20230510.0 은 제외)
+        small = data[col].astype('float32')
+        if np.array_equal(small.to_numpy('float64'), data[col].to_numpy(), equal_nan=True):
+            data[col] = small
+    return data
+
+
+def read_csv(csv_path=CSV_PATH):
+    data = pd.read_csv(csv_path, dtype={col: 'category' for col in CATEGORY_COLS})
+    data['DEAL_YMD'] = pd.to_datetime(data['DEAL_YMD'], format="%Y-%m-%d")
+    return downcast(data)
+
+
+def read_store(store_dir=STORE_DIR):
+    data = store.read(store_dir)
+    data[CATEGORY_COLS] = data[CATEGORY_COLS].astype('category')
+    return downcast(data)
+
+
+def snapshot_files(meta, snapshot_dir, start, end):
+    # [start, end] 와 겹치는 월 파티션의 파일 목록
+    # 겹치는 파티션이 없어도 컬럼 구성은 같아야 하므로 첫 파티션을 돌려준다. (기간 조건으로 0 행이 된다)
+    overlap = set(period.month_keys(start, end))
+    months = [(year, month) for year, month in meta['months'] if year * 100 + month in overlap] or meta['months'][:1]
+    return sorted(path for year, month in months
+                  for path in glob.glob(os.path.join(store.partition_dir(snapshot_dir, year, month), "part-*.parquet")))
+
+
+def _write_partitions(data, out_dir):
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    partitions = data.groupby([data['DEAL_YMD'].dt.year, data['DEAL_YMD'].dt.month]).indices
+    for (year, month), rows in partitions.items():
+        path = store.partition_dir(out_dir, year, month)
+        os.makedirs(path)
+        pq.write_table(table.take(rows), os.path.join(path, "part-0.parquet"))
+    return {
+        'months': [[int(year), int(month)] for year, month in sorted(partitions)],
+        'first_day': data['DEAL_YMD'].min().strftime("%Y-%m-%d"),
+        'last_day': data['DEAL_YMD'].max().strftime("%Y-%m-%d"),
+        'categories': {col: list(data[col].cat.categories) for col in CATEGORY_COLS},
+    }
+
+
+def build_snapshot(csv_path=CSV_PATH, snapshot_dir=SNAPSHOT_DIR, store_dir=STORE_DIR):
+    # 계약 연/월 파티션으로 나눠 쓰고, 파티션 목록 / 기간 / 범주 목록 / signature 는 메타 파일에 남긴다.
+    # 다른 프로세스가 반쯤 쓰인 폴더를 읽지 않도록 임시 폴더에 다 쓴 뒤 바꿔 넣는다.
+    tmp_dir = f"{snapshot_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    if BACKEND == 'duckdb':
+        # 원본을 메모리에 다 올리지 않고 DuckDB 가 파티션 파일로 바로 옮긴다.
+        import duck
+        source = store_dir if store.exists(store_dir) else csv_path
+        meta = duck.build_snapshot(_connect(), source, tmp_dir, CATEGORY_COLS)
+    else:
+        data = read_store(store_dir) if store.exists(store_dir) else read_csv(csv_path)
+        meta = _write_partitions(data, tmp_dir)
+    meta['signature'] = source_signature(csv_path, store_dir)
+    with open(os.path.join(tmp_dir, SNAPSHOT_META), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    old_dir = f"{snapshot_dir}.{os.getpid()}.old"
+    if os.path.exists(snapshot_dir):
+        os.replace(snapshot_dir, old_dir)
+    os.replace(tmp_dir, snapshot_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return meta
+
+
+def read_meta(snapshot_dir=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(snapshot_dir, SNAPSHOT_META), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def snapshot_meta(signature, csv_path=CSV_PATH, snapshot_dir=SNAPSHOT_DIR, store_dir=STORE_DIR):
+    # 원본이 바뀌었으면 스냅샷을 다시 만든다.
+    meta = read_meta(snapshot_dir)
+    if meta is None or meta['signature'] != signature:
+        meta = build_snapshot(csv_path, snapshot_dir, store_dir)
+    return meta
+
+
+def read_snapshot(signature, csv_path=CSV_PATH, snapshot_dir=SNAPSHOT_DIR, store_dir=STORE_DIR, start=None, end=None):
+    # [start, end] 와 겹치는 월 파티션 파일만 열고, 양 끝 달은 계약일로 한 번 더 거른다. None 이면 전체
+    meta = snapshot_meta(signature, csv_path, snapshot_dir, store_dir)
+    start = pd.Timestamp(start if start is not None else meta['first_day'])
+    end = pd.Timestamp(end if end is not None else meta['last_day'])
+    files = snapshot_files(meta, snapshot_dir, start, end)
+    # 폴더 이름(year=/month=)을 컬럼으로 붙이지 않는다. 연월은 _load_dataset 에서 month 로 만든다.
+    table = pq.read_table(files, filters=[('DEAL_YMD', '>=', start), ('DEAL_YMD', '<=', end)], partitioning=None)
+    data = table.to_pandas()
+    # 파티션마다 범주 순서가 다를 수 있으므로 전체 범주 목록으로 맞춘다. (기간이 달라도 범주 코드가 같다)
+    for col, categories in meta['categories'].items():
+        data[col] = data[col].astype(pd.CategoricalDtype(categories))
+    return data
+
+
+def freeze(data):
+    # 공유 데이터의 배열을 읽기 전용으로 만들어 제자리 수정(df.loc[...] = ...)을 막는다.
+    columns = {}
+    for col in data.columns:
+        if isinstance(data[col].dtype, pd.CategoricalDtype):
+            codes = data[col].cat.codes.to_numpy().copy()
+            codes.flags.writeable = False
+            columns[col] = pd.Categorical.from_codes(codes, dtype=data[col].dtype)
+        else:
+            values = data[col].to_numpy().copy()
+            values.flags.writeable = False
+            columns[col] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def data_span():
+    # 전체 데이터의 첫 / 마지막 계약일 (조회 기간을 고를 수 있는 범위)
+    meta = _snapshot_meta(source_signature())
+    return pd.Timestamp(meta['first_day']), pd.Timestamp(meta['last_day'])
+
+
+def current_period():
+    return period.current(*data_span())
+
+
+@st.cache_resource
+def _snapshot_meta(signature):
+    return snapshot_meta(signature)
+
+
+@st.cache_resource(max_entries=PERIOD_CACHE_SIZE)
+def _load_dataset(signature, start, end):
+    with span('load_data.snapshot') as s:
+        data = read_snapshot(signature, start=start, end=end)
+        s.rows = len(data)
+    # 페이지마다 만들던 파생 컬럼은 한 번만 계산한다. (연월 정수, 예: 202303)
+    data['month'] = period.month_key(data['DEAL_YMD']).astype('int32')
+    # DealQuery 가 구간 조회를 할 수 있도록 (SGG_NM, HOUSE_TYPE, DEAL_YMD) 순서로 정렬해 둔다.
+    return freeze(DealQuery.sort(data))
+
+
+@st.cache_resource
+def _connect():
+    import duck
+    return duck.connect()
+
+
+@st.cache_resource(max_entries=PERIOD_CACHE_SIZE)
+def _load_source(signature, start, end):
+    # DuckDB 백엔드 : 조회 기간과 겹치는 파티션 파일 목록만 들고 있고, 데이터는 쿼리할 때 읽는다.
+    import duck
+    meta = _snapshot_meta(signature)
+    return duck.DuckSource(_connect(), snapshot_files(meta, SNAPSHOT_DIR, start, end), start, end, meta['categories'])
+
+
+def load_data(dates=None):
+    # dates = (시작일, 종료일). 없으면 이번 세션에서 고른 조회 기간을 쓴다.
+    # CSV 나 증분 저장소가 바뀌면 signature 가 달라지므로 스냅샷과 캐시가 함께 갱신된다.
+    # 캐시된 DataFrame 을 복사하지 않고, 데이터를 공유하는 얕은 사본만 돌려준다.
+    # DuckDB 백엔드에서는 기간 전체를 읽어 오므로, 페이지에서는 load_query / load_cube 로 필요한 만큼만 가져온다.
+    if BACKEND == 'duckdb':
+        return load_query(dates).select()
+    with span('load_data') as s:
+        data = _load_dataset(source_signature(), *(dates or current_period())).copy(deep=False)
+        s.rows = len(data)
+    return data
+
+
+@st.cache_resource(max_entries=PERIOD_CACHE_SIZE)
+def _load_query(signature, start, end):
+    if BACKEND == 'duckdb':
+        import duck
+        return duck.DuckQuery(_load_source(signature, start, end))
+    return DealQuery(_load_dataset(signature, start, end))
+
+
+def load_query(dates=None):
+    # 공유 데이터 위의 조회 객체. select() 는 연속 구간이면 복사 없이 view 를 돌려준다.
+    return _load_query(source_signature(), *(dates or current_period()))
+
+
+@st.cache_resource(max_entries=PERIOD_CACHE_SIZE)
+def _load_cube(signature, start, end):
+    if BACKEND == 'duckdb':
+        import duck
+        return duck.DuckCube(_load_source(signature, start, end))
+    data = _load_dataset(signature, start, end)
+    with span('cube.build', rows=len(data)):
+        return Cube.build(data)
+
+
+def load_cube(dates=None):
+    # 데이터 버전 / 조회 기간마다 한 번만 만들고, 모든 세션이 같은 큐브를 공유한다.
+    return _load_cube(source_signature(), *(dates or current_period()))
+
+
+@st.cache_resource(max_entries=PERIOD_CACHE_SIZE)
+def _load_regression(signature, start, end):
+    if BACKEND == 'duckdb':
+        import duck
+        return duck.regression(_load_source(signature, start, end))
+    data = _load_dataset(signature, start, end)
+    with span('ols.build', rows=len(data)):
+        return GroupedOLS.build(data)
+
+
+def load_regression(dates=None):
+    # (자치구, 월, 주거형태) 별 건물면적 -> 물건금액 회귀의 충분통계량. 데이터 버전 / 조회 기간마다 한 번만 만든다.
+    return _load_regression(source_signature(), *(dates or current_period()))
@@ -0,0 +1,88 @@
+# -*- coding:utf-8 -*-
+# 집계값(건수 / 평균 / 분산)만으로 계산하는 두 집단 Welch t-검정
+# 자치구 25곳의 두 달(예: 3월 vs 4월) 검정을 배열 연산 한 번으로 구한다. 결과 컬럼은 pingouin.ttest 와 같은 이름을 쓴다.
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+CORRECTIONS = {'holm': 'Holm', 'fdr_bh': 'Benjamini-Hochberg (FDR)', 'bonf': 'Bonferroni', 'none': '보정 안 함'}
+
+
+def welch_ttest(n1, m1, v1, n2, m2, v2, confidence=0.95):
+    # 인자는 모두 같은 길이의 배열. 표본이 2개 미만인 집단은 NaN 이 된다.
+    n1, m1, v1, n2, m2, v2 = (np.asarray(x, dtype='float64') for x in (n1, m1, v1, n2, m2, v2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        se1, se2 = v1 / n1, v2 / n2
+        se = np.sqrt(se1 + se2)
+        t = (m1 - m2) / se
+        dof = (se1 + se2) ** 2 / (se1 ** 2 / (n1 - 1) + se2 ** 2 / (n2 - 1))
+        pval = 2 * stats.t.sf(np.abs(t), dof)
+        tcrit = stats.t.ppf(0.5 + confidence / 2, dof)
+        ci = np.stack([m1 - m2 - tcrit * se, m1 - m2 + tcrit * se], axis=-1)
+
+        # 효과 크기(cohen-d)와 검정력은 pingouin 과 같이 합동 표준편차 / 자유도 n1 + n2 - 2 로 구한다.
+        pooled = np.sqrt(((n1 - 1) * v1 + (n2 - 1) * v2) / (n1 + n2 - 2))
+        d = np.abs(m1 - m2) / pooled
+        pooled_dof = n1 + n2 - 2
+        nc = d * np.sqrt(n1 * n2 / (n1 + n2))
+        pcrit = stats.t.ppf(1 - (1 - confidence) / 2, pooled_dof)
+        power = stats.nct.sf(pcrit, pooled_dof, nc) + stats.nct.cdf(-pcrit, pooled_dof, nc)
+    return pd.DataFrame({'T': t, 'dof': dof, 'alternative': 'two-sided', 'p-val': pval,
+                         'CI95%': list(np.round(ci, 2)), 'cohen-d': d, 'power': power})
+
+
+def correct(pvals, method='holm', alpha=0.05):
+    # 다중비교 보정. NaN(검정할 수 없는 자치구)은 그대로 두고 나머지만 보정한다.
+    pvals = np.asarray(pvals, dtype='float64')
+    corrected = np.full_like(pvals, np.nan)
+    valid = ~np.isnan(pvals)
+    p = pvals[valid]
+    m = len(p)
+    if method == 'none' or m == 0:
+        corrected[valid] = p
+    elif method == 'bonf':
+        corrected[valid] = np.minimum(p * m, 1)
+    elif method == 'holm':
+        order = np.argsort(p)
+        adjusted = np.maximum.accumulate(p[order] * (m - np.arange(m)))
+        corrected[np.flatnonzero(valid)[order]] = np.minimum(adjusted, 1)
+    elif method == 'fdr_bh':
+        order = np.argsort(p)[::-1]
+        adjusted = np.minimum.accumulate(p[order] * m / np.arange(m, 0, -1))
+        corrected[np.flatnonzero(valid)[order]] = np.minimum(adjusted, 1)
+    else:
+        raise ValueError(f"unknown correction : {method}")
+    return corrected, corrected < alpha
+
+
+def summarize(n, total, sumsq):
+    # 건수 / 합계 / 제곱합 -> 평균 / 표본분산(ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / n
+        var = np.clip((sumsq - total ** 2 / n) / (n - 1), 0, None)
+    return mean, np.where(n > 1, var, np.nan)
+
+
+def month_tests(cube, house_type='아파트', months=(202303, 202304), method='holm', alpha=0.05):
+    # months 는 연월 정수 두 개. 자치구마다 months[0] vs months[1] 검정을 한 번에 하고, 합계를 더한 서울시 전체 검정을 함께 돌려준다.
+    first, second = months
+    totals = cube.month_totals(house_type, months)
+    seoul = totals.sum().to_frame('서울시').T
+    tables = []
+    for frame in [totals, seoul]:
+        n1, n2 = frame[('count', first)].to_numpy(), frame[('count', second)].to_numpy()
+        m1, v1 = summarize(n1, frame[('sum', first)].to_numpy(), frame[('sumsq', first)].to_numpy())
+        m2, v2 = summarize(n2, frame[('sum', second)].to_numpy(), frame[('sumsq', second)].to_numpy())
+        result = welch_ttest(n1, m1, v1, n2, m2, v2)
+        result.index = frame.index.rename('SGG_NM')
+        result.insert(0, f'n{first}', n1.astype('int64'))
+        result.insert(1, f'mean{first}', m1)
+        result.insert(2, f'n{second}', n2.astype('int64'))
+        result.insert(3, f'mean{second}', m2)
+        tables.append(result)
+    districts, overall = tables
+    # 보정은 자치구 검정들끼리만 한다.
+    districts['p-corr'], districts['reject'] = correct(districts['p-val'], method, alpha)
+    # 검정할 수 없는 자치구는 '유의하지 않음(False)' 이 아니라 빈 값으로 둔다.
+    districts['reject'] = districts['reject'].astype('boolean').mask(districts['p-val'].isna())
+    return districts, overall